@@ -0,0 +1,150 @@
+"""
+Airport time zones for CCS Hyper.
+Maps IATA airport codes to IANA time zones so airport-local schedule times
+can be converted to UTC. Zone objects are looked up once per airport and
+cached.
+"""
+
+from datetime import datetime, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+AIRPORT_TIMEZONES = {
+    # United hubs
+    'ORD': 'America/Chicago',
+    'IAH': 'America/Chicago',
+    'DEN': 'America/Denver',
+    'SFO': 'America/Los_Angeles',
+    'LAX': 'America/Los_Angeles',
+    'EWR': 'America/New_York',
+    'IAD': 'America/New_York',
+    'GUM': 'Pacific/Guam',
+    # Domestic
+    'ATL': 'America/New_York',
+    'AUS': 'America/Chicago',
+    'BDL': 'America/New_York',
+    'BNA': 'America/Chicago',
+    'BOS': 'America/New_York',
+    'BWI': 'America/New_York',
+    'CLE': 'America/New_York',
+    'CLT': 'America/New_York',
+    'CMH': 'America/New_York',
+    'DCA': 'America/New_York',
+    'DFW': 'America/Chicago',
+    'DTW': 'America/Detroit',
+    'FLL': 'America/New_York',
+    'HNL': 'Pacific/Honolulu',
+    'IND': 'America/Indiana/Indianapolis',
+    'JAX': 'America/New_York',
+    'JFK': 'America/New_York',
+    'KOA': 'Pacific/Honolulu',
+    'LAS': 'America/Los_Angeles',
+    'LGA': 'America/New_York',
+    'LIH': 'Pacific/Honolulu',
+    'MCI': 'America/Chicago',
+    'MCO': 'America/New_York',
+    'MIA': 'America/New_York',
+    'MSP': 'America/Chicago',
+    'MSY': 'America/Chicago',
+    'OGG': 'Pacific/Honolulu',
+    'ONT': 'America/Los_Angeles',
+    'PDX': 'America/Los_Angeles',
+    'PHL': 'America/New_York',
+    'PHX': 'America/Phoenix',
+    'PIT': 'America/New_York',
+    'RDU': 'America/New_York',
+    'RSW': 'America/New_York',
+    'SAN': 'America/Los_Angeles',
+    'SAT': 'America/Chicago',
+    'SEA': 'America/Los_Angeles',
+    'SJC': 'America/Los_Angeles',
+    'SLC': 'America/Denver',
+    'SMF': 'America/Los_Angeles',
+    'SNA': 'America/Los_Angeles',
+    'STL': 'America/Chicago',
+    'TPA': 'America/New_York',
+    'ANC': 'America/Anchorage',
+    # Canada, Mexico, Caribbean, Latin America
+    'YYZ': 'America/Toronto',
+    'YVR': 'America/Vancouver',
+    'YUL': 'America/Toronto',
+    'CUN': 'America/Cancun',
+    'MEX': 'America/Mexico_City',
+    'SJD': 'America/Mazatlan',
+    'PVR': 'America/Mexico_City',
+    'SJU': 'America/Puerto_Rico',
+    'SJO': 'America/Costa_Rica',
+    'LIR': 'America/Costa_Rica',
+    'PTY': 'America/Panama',
+    'BOG': 'America/Bogota',
+    'LIM': 'America/Lima',
+    'GRU': 'America/Sao_Paulo',
+    'GIG': 'America/Sao_Paulo',
+    'EZE': 'America/Argentina/Buenos_Aires',
+    'SCL': 'America/Santiago',
+    # Europe, Middle East, Africa
+    'LHR': 'Europe/London',
+    'EDI': 'Europe/London',
+    'DUB': 'Europe/Dublin',
+    'AMS': 'Europe/Amsterdam',
+    'BRU': 'Europe/Brussels',
+    'CDG': 'Europe/Paris',
+    'FRA': 'Europe/Berlin',
+    'MUC': 'Europe/Berlin',
+    'ZRH': 'Europe/Zurich',
+    'GVA': 'Europe/Zurich',
+    'MAD': 'Europe/Madrid',
+    'BCN': 'Europe/Madrid',
+    'LIS': 'Europe/Lisbon',
+    'FCO': 'Europe/Rome',
+    'MXP': 'Europe/Rome',
+    'ATH': 'Europe/Athens',
+    'CPH': 'Europe/Copenhagen',
+    'TLV': 'Asia/Jerusalem',
+    'DXB': 'Asia/Dubai',
+    'AMM': 'Asia/Amman',
+    'JNB': 'Africa/Johannesburg',
+    'CPT': 'Africa/Johannesburg',
+    'ACC': 'Africa/Accra',
+    'LOS': 'Africa/Lagos',
+    # Asia-Pacific
+    'NRT': 'Asia/Tokyo',
+    'HND': 'Asia/Tokyo',
+    'KIX': 'Asia/Tokyo',
+    'ICN': 'Asia/Seoul',
+    'PVG': 'Asia/Shanghai',
+    'PEK': 'Asia/Shanghai',
+    'HKG': 'Asia/Hong_Kong',
+    'TPE': 'Asia/Taipei',
+    'MNL': 'Asia/Manila',
+    'SIN': 'Asia/Singapore',
+    'BKK': 'Asia/Bangkok',
+    'DEL': 'Asia/Kolkata',
+    'BOM': 'Asia/Kolkata',
+    'SYD': 'Australia/Sydney',
+    'MEL': 'Australia/Melbourne',
+    'BNE': 'Australia/Brisbane',
+    'AKL': 'Pacific/Auckland',
+    'PPT': 'Pacific/Tahiti',
+}
+
+
+@lru_cache(maxsize=None)
+def airport_zone(code):
+    """ZoneInfo for an airport code, or None when the airport (or its zone) is unknown."""
+    name = AIRPORT_TIMEZONES.get(code.upper())
+    if not name:
+        return None
+    try:
+        return ZoneInfo(name)
+    except ZoneInfoNotFoundError:
+        return None
+
+
+def local_to_utc(year, month, day, minute_of_day, airport):
+    """UTC datetime of an airport-local wall-clock time, or None for an unknown airport."""
+    zone = airport_zone(airport)
+    if zone is None:
+        return None
+    local = datetime(year, month, day, minute_of_day // 60, minute_of_day % 60, tzinfo=zone)
+    return local.astimezone(timezone.utc)
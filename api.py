@@ -4,9 +4,11 @@ from werkzeug.utils import secure_filename
 import os
 import logging
 
-from scraper import scrape_schedule
-from parser import parse_and_group_schedule
+from schedule_parser import parse_schedule
+from schedule_dates import next_day_iso
 from google_client import get_google_auth_url, get_google_credentials, create_google_calendar_service, get_user_info
+from instrumentation import init_app as init_instrumentation, upstream_call
+from profiling import init_app as init_profiling
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -15,6 +17,8 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 CORS(app, supports_credentials=True)
 app.secret_key = os.urandom(24)
+init_instrumentation(app)
+init_profiling(app)
 
 UPLOAD_FOLDER = 'uploads'
 if not os.path.exists(UPLOAD_FOLDER):
@@ -43,8 +47,17 @@ def sync_schedule():
             with open(filepath, 'r', encoding='utf-8') as f:
                 html_content = f.read()
             
-            # Use the new parser
-            trips, month, year = parse_and_group_schedule(html_content)
+            # Master schedules and print views are both accepted
+            result = parse_schedule(html_content)
+            if not result.pairings or result.month is None or result.year is None:
+                # e.g. a print view whose pairing tables weren't recognized; the calendar push needs the month
+                logger.warning(f"No trips found in {filename}")
+                return jsonify({"error": "No trips found in the schedule file."}), 400
+            # Only what the calendar push needs goes into the session cookie
+            trips = [{'pairing_code': pairing.pairing_code, 'description': pairing.description,
+                      'start_date': pairing.start_date, 'end_date': pairing.end_date or next_day_iso(pairing.start_date)}
+                     for pairing in result.pairings]
+            month, year = result.month, result.year
             session['trips_data'] = trips
             session['month'] = month
             session['year'] = year
@@ -89,7 +102,8 @@ def push_to_calendar():
         year = session['year']
         
         # Find or create the 'CCS Hyper' calendar
-        calendar_list = service.calendarList().list().execute()
+        with upstream_call('google', 'calendarList.list'):
+            calendar_list = service.calendarList().list().execute()
         ccs_calendar_id = None
         for calendar_entry in calendar_list.get('items', []):
             if calendar_entry['summary'] == 'CCS Hyper':
@@ -98,16 +112,19 @@ def push_to_calendar():
         
         if not ccs_calendar_id:
             new_calendar = {'summary': 'CCS Hyper', 'timeZone': 'America/New_York'}
-            created_calendar = service.calendars().insert(body=new_calendar).execute()
+            with upstream_call('google', 'calendars.insert'):
+                created_calendar = service.calendars().insert(body=new_calendar).execute()
             ccs_calendar_id = created_calendar['id']
             logger.info("Created 'CCS Hyper' calendar")
 
         # Clear old events from the calendar for the specific month/year
         time_min = f"{year}-{month:02d}-01T00:00:00Z"
         time_max = f"{year}-{month:02d}-31T23:59:59Z"
-        events_result = service.events().list(calendarId=ccs_calendar_id, timeMin=time_min, timeMax=time_max, singleEvents=True).execute()
+        with upstream_call('google', 'events.list'):
+            events_result = service.events().list(calendarId=ccs_calendar_id, timeMin=time_min, timeMax=time_max, singleEvents=True).execute()
         for event in events_result.get('items', []):
-            service.events().delete(calendarId=ccs_calendar_id, eventId=event['id']).execute()
+            with upstream_call('google', 'events.delete'):
+                service.events().delete(calendarId=ccs_calendar_id, eventId=event['id']).execute()
         logger.info(f"Cleared old events for {month}/{year} from 'CCS Hyper' calendar")
 
         # Add new events
@@ -127,7 +144,8 @@ def push_to_calendar():
                     'useDefault': False,
                 },
             }
-            service.events().insert(calendarId=ccs_calendar_id, body=event).execute()
+            with upstream_call('google', 'events.insert'):
+                service.events().insert(calendarId=ccs_calendar_id, body=event).execute()
         
         logger.info(f"Successfully added {len(trips)} trips to the calendar")
         return jsonify({"message": f"Successfully added {len(trips)} trips to your 'CCS Hyper' calendar.", "user": session.get('user_email')})
@@ -4,6 +4,8 @@ import os
 
 # Import the new Supabase API blueprint
 from supabase_api import supabase_api_blueprint
+from instrumentation import init_app as init_instrumentation
+from profiling import init_app as init_profiling
 
 app = Flask(__name__, static_folder='static', template_folder='templates')
 CORS(app)
@@ -11,6 +13,11 @@ CORS(app)
 # Register the blueprint for all Supabase API routes
 app.register_blueprint(supabase_api_blueprint, url_prefix='/api')
 
+# Per-request spans and the Prometheus /metrics endpoint
+init_instrumentation(app)
+# Opt-in stack sampling of slow requests (PROFILE_REQUESTS / PROFILE_TOKEN)
+init_profiling(app)
+
 @app.route('/')
 def index():
     """Serve the main application page."""
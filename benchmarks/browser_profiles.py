@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Browser Profile Benchmark
+Loads a schedule page with headless Chrome under each CcsScraper browser
+profile ('default' and 'lean') and reports page-load time, the resources
+the server had to send, and the browser's memory use, so the savings of the
+lean profile can be quantified.
+
+The page is served locally by a stand-in that mimics a CCS page: a print
+view plus banner images, a web font and a stylesheet, each with simulated
+latency.
+
+Usage (from the repository root; needs Chrome):
+    python -m benchmarks.browser_profiles --runs 5 --images 30 --latency-ms 40
+"""
+
+import time
+import argparse
+import logging
+
+from benchmarks.standins import AssetPageStandIn
+from enhanced_scraper import CcsScraper, BROWSER_PROFILES
+from synthetic_schedules import generate_print_view
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Milliseconds from navigation start to the load event
+LOAD_TIME_SCRIPT = """
+var timing = performance.getEntriesByType('navigation')[0];
+return timing.loadEventEnd - timing.startTime;
+"""
+
+
+def measure(profile, url, server, runs):
+    """Load url `runs` times in one browser; returns a dict of averaged measurements."""
+    scraper = CcsScraper(headless=True, profile=profile)
+    load_ms = []
+    sent = {}
+    heap_mb = nodes = 0.0
+    try:
+        driver = scraper.setup_driver()
+        driver.execute_cdp_cmd('Performance.enable', {})
+        for _ in range(runs):
+            server.reset_calls()
+            started = time.perf_counter()
+            driver.get(url)
+            wall_ms = (time.perf_counter() - started) * 1000
+            load_ms.append(driver.execute_script(LOAD_TIME_SCRIPT) or wall_ms)
+            for endpoint, calls in server.calls.items():
+                sent[endpoint] = sent.get(endpoint, 0) + calls
+        metrics = {m['name']: m['value'] for m in driver.execute_cdp_cmd('Performance.getMetrics', {})['metrics']}
+        heap_mb = metrics.get('JSHeapUsedSize', 0) / 1_000_000
+        nodes = metrics.get('Nodes', 0)
+    finally:
+        scraper.close()
+    return {
+        'load_ms': sum(load_ms) / len(load_ms),
+        'best_ms': min(load_ms),
+        'requests': {endpoint: calls / runs for endpoint, calls in sent.items()},
+        'heap_mb': heap_mb,
+        'nodes': nodes,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare page-load cost of the scraper browser profiles.")
+    parser.add_argument('--runs', type=int, default=5, help="Page loads per profile")
+    parser.add_argument('--images', type=int, default=30, help="Images on the page")
+    parser.add_argument('--pairings', type=int, default=30, help="Pairings in the print view")
+    parser.add_argument('--latency-ms', type=float, default=40, help="Simulated latency per resource")
+    parser.add_argument('profiles', nargs='*', default=list(BROWSER_PROFILES))
+    args = parser.parse_args()
+
+    server = AssetPageStandIn(generate_print_view(pairings=args.pairings, seed=1),
+                              images=args.images, latency_ms=args.latency_ms).start()
+    results = {}
+    try:
+        for profile in args.profiles:
+            logger.info(f"Measuring the {profile} profile")
+            results[profile] = measure(profile, server.url + '/', server, args.runs)
+    finally:
+        server.stop()
+
+    print(f"\n{args.runs} loads per profile, {args.images} images, {args.latency_ms} ms per resource\n")
+    baseline = results.get('default')
+    for profile, result in results.items():
+        line = (f"{profile:<8} load {result['load_ms']:8.1f} ms (best {result['best_ms']:.1f})  "
+                f"JS heap {result['heap_mb']:6.1f} MB  DOM nodes {result['nodes']:7.0f}")
+        if baseline and profile != 'default':
+            line += f"  load {result['load_ms'] / baseline['load_ms']:.2f}x of default"
+        print(line)
+        requests = ', '.join(f"{endpoint} {calls:.0f}" for endpoint, calls in sorted(result['requests'].items()))
+        print(f"         requests per load: {requests}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Parser Benchmark
+Measures parse time and peak memory of the print-view and master-schedule
+parsers on synthetic documents of increasing size, and compares them with
+the stored baseline in benchmarks/parser_baseline.json.
+
+Usage (from the repository root):
+    python -m benchmarks.parser                    # compare with the baseline
+    python -m benchmarks.parser --update-baseline  # record a new baseline
+
+Exits with status 1 when any case is slower or larger than the baseline by
+more than the tolerance factor.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import logging
+import tracemalloc
+
+from schedule_parser import parse_schedule
+from synthetic_schedules import generate_print_view, generate_master_schedule
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'parser_baseline.json')
+DEFAULT_TOLERANCE = 1.5  # flag cases more than 50% slower/larger than the baseline
+
+def _parse(html):
+    # Bypass the result cache so every run measures a real parse
+    return parse_schedule(html, use_cache=False)
+
+
+# name -> (document generator, parse function)
+CASES = {
+    'print_view_small': (lambda: generate_print_view(pairings=10, legs_per_pairing=4, crew_size=5), _parse),
+    'print_view_medium': (lambda: generate_print_view(pairings=60, legs_per_pairing=4, crew_size=8), _parse),
+    'print_view_large': (lambda: generate_print_view(pairings=250, legs_per_pairing=6, crew_size=12), _parse),
+    'master_small': (lambda: generate_master_schedule(pairings=10, days_per_pairing=3), _parse),
+    'master_medium': (lambda: generate_master_schedule(pairings=60, days_per_pairing=3), _parse),
+    'master_large': (lambda: generate_master_schedule(pairings=250, days_per_pairing=4), _parse),
+}
+
+
+def measure(parse, html, repeat=5):
+    """Return (best seconds over `repeat` runs, peak traced KiB of one run)."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        parse(html)
+        timings.append(time.perf_counter() - started)
+
+    # Memory is traced in a separate run so tracing overhead doesn't skew timings
+    tracemalloc.start()
+    try:
+        parse(html)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(timings), peak / 1024
+
+
+def run_cases(names=None, repeat=5):
+    """Run the selected benchmark cases; returns {name: {'seconds', 'peak_kib', 'doc_kib'}}."""
+    results = {}
+    for name in names or CASES:
+        generate, parse = CASES[name]
+        html = generate()
+        seconds, peak_kib = measure(parse, html, repeat)
+        results[name] = {'seconds': round(seconds, 6), 'peak_kib': round(peak_kib, 1),
+                         'doc_kib': round(len(html.encode('utf-8')) / 1024, 1)}
+        logger.info(f"{name}: {seconds * 1000:.1f} ms, peak {peak_kib:,.0f} KiB for a {results[name]['doc_kib']} KiB document")
+    return results
+
+
+def load_baseline(path=BASELINE_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def save_baseline(results, path=BASELINE_PATH):
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def find_regressions(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Return a description of every metric that exceeds baseline * tolerance."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        for metric in ('seconds', 'peak_kib'):
+            if base.get(metric) and result[metric] > base[metric] * tolerance:
+                regressions.append(f"{name}.{metric}: {result[metric]} vs baseline {base[metric]} "
+                                   f"({result[metric] / base[metric]:.2f}x)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the schedule parsers against the stored baseline.")
+    parser.add_argument('--update-baseline', action='store_true', help="Store these results as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help="Allowed slowdown factor")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('cases', nargs='*', help=f"Cases to run (default: all of {', '.join(CASES)})")
+    args = parser.parse_args()
+
+    results = run_cases(args.cases or None, args.repeat)
+    if args.update_baseline:
+        save_baseline(results)
+        logger.info(f"Baseline written to {BASELINE_PATH}")
+        return
+
+    regressions = find_regressions(results, load_baseline(), args.tolerance)
+    for regression in regressions:
+        logger.error(f"Regression: {regression}")
+    if regressions:
+        sys.exit(1)
+    logger.info("No regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
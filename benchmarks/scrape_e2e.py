@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+End-to-end Scrape Benchmark
+Runs CcsScraper.get_detailed_schedule with headless Chrome against the local
+mock CCS site (mock_ccs.py) and reports the total scrape time and the time
+of each scrape step (login, My Schedule, print dialog, preview, extract)
+over several runs.
+
+Usage (from the repository root; needs Chrome):
+    python -m benchmarks.scrape_e2e --runs 5 --page-delay-ms 150 --preview-delay-ms 1000
+    python -m benchmarks.scrape_e2e --variant drifted --profile lean --extract dom
+"""
+
+import time
+import argparse
+import logging
+import tempfile
+import threading
+
+from benchmarks.sync_pipeline import percentile
+from mock_ccs import create_app, VARIANTS, DEFAULT_DELAYS_MS
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark end-to-end scrapes against the mock CCS site.")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--variant', choices=VARIANTS, default='standard')
+    parser.add_argument('--profile', choices=('default', 'lean'), default='default')
+    parser.add_argument('--extract', choices=('html', 'dom'), default='html')
+    parser.add_argument('--pairings', type=int, default=12, help="Pairings in the print view")
+    for kind in DEFAULT_DELAYS_MS:
+        parser.add_argument(f'--{kind}-delay-ms', type=float, default=0)
+    args = parser.parse_args()
+
+    for noisy in ('werkzeug', 'enhanced_scraper', 'locators', 'scrape_steps', 'WDM'):
+        logging.getLogger(noisy).setLevel(logging.WARNING)
+
+    from werkzeug.serving import make_server
+    from enhanced_scraper import CcsScraper
+    from locators import LocatorEngine
+
+    delays = {kind: getattr(args, f'{kind}_delay_ms') for kind in DEFAULT_DELAYS_MS}
+    app = create_app(variant=args.variant, delays_ms=delays, pairings=args.pairings)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    totals = []
+    steps = {}
+    failures = 0
+    # Every run starts from an empty locator cache, like a fresh worker
+    with tempfile.TemporaryDirectory() as cache_dir:
+        try:
+            for run in range(args.runs):
+                locators = LocatorEngine(cache_path=f"{cache_dir}/locators-{run}.json")
+                with CcsScraper(headless=True, profile=args.profile, base_url=base_url, locators=locators) as scraper:
+                    started = time.perf_counter()
+                    result = scraper.get_detailed_schedule('benchmark', 'benchmark', extract=args.extract)
+                    elapsed = time.perf_counter() - started
+                    if not result:
+                        failures += 1
+                        logger.error(f"Run {run + 1} failed:\n{scraper.steps.summary()}")
+                        continue
+                    totals.append(elapsed)
+                    for record in scraper.steps.history:
+                        steps.setdefault(record.step, []).append(record.seconds)
+                logger.info(f"Run {run + 1}/{args.runs}: {elapsed:.2f}s")
+        finally:
+            server.shutdown()
+
+    print(f"\n{args.runs} scrapes, {args.variant} markup, {args.profile} profile, extract={args.extract}, "
+          f"delays ms {delays}\n")
+    print(f"total         p50 {percentile(totals, 50):7.2f}s  p95 {percentile(totals, 95):7.2f}s  "
+          f"({len(totals)} ok, {failures} failed)")
+    for step, seconds in steps.items():
+        print(f"{step:<13} p50 {percentile(seconds, 50):7.2f}s  p95 {percentile(seconds, 95):7.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+"""
+Local stand-ins for the upstream services of the sync pipeline.
+Small threaded HTTP servers emulating the parts of Supabase PostgREST and the
+Google Calendar API that the backend calls, with configurable latency and
+per-endpoint call counters, so the pipeline can be benchmarked offline.
+"""
+
+import re
+import json
+import time
+import uuid
+import random
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qsl
+
+
+class StandInServer(ThreadingHTTPServer):
+    """Threaded HTTP server with simulated latency and call counting."""
+
+    daemon_threads = True
+
+    def __init__(self, handler, latency_ms=0.0, jitter_ms=0.0, seed=0):
+        super().__init__(('127.0.0.1', 0), handler)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.calls = Counter()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def record(self, endpoint):
+        """Count one call and sleep for the simulated upstream latency."""
+        with self._lock:
+            self.calls[endpoint] += 1
+            delay = self.latency_ms + (self._rng.uniform(0, self.jitter_ms) if self.jitter_ms else 0)
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+    def reset_calls(self):
+        with self._lock:
+            self.calls.clear()
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class _JsonHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, like the real services
+
+    def log_message(self, *args):
+        pass
+
+    def _body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return json.loads(self.rfile.read(length)) if length else None
+
+    def _send(self, status, payload=None):
+        body = b'' if payload is None else json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class PostgrestHandler(_JsonHandler):
+    """
+    Emulates /rest/v1/<table> for select (eq filters, order), insert and
+    upsert (on_conflict) against in-memory tables.
+    """
+
+    def _route(self):
+        parsed = urlparse(self.path)
+        match = re.match(r'^/rest/v1/(\w+)$', parsed.path)
+        return (match.group(1) if match else None), parse_qsl(parsed.query)
+
+    def do_GET(self):
+        table, params = self._route()
+        if not table:
+            return self._send(404, {'message': 'not found'})
+        self.server.record(f"GET {table}")
+        rows = self.server.select(table, params)
+        self._send(200, rows)
+
+    def do_POST(self):
+        table, params = self._route()
+        if not table:
+            return self._send(404, {'message': 'not found'})
+        body = self._body()
+        rows = body if isinstance(body, list) else [body]
+        on_conflict = dict(params).get('on_conflict')
+        self.server.record(f"{'UPSERT' if on_conflict else 'INSERT'} {table}")
+        written = self.server.write(table, rows, on_conflict.split(',') if on_conflict else None)
+        if 'return=representation' in (self.headers.get('Prefer') or ''):
+            return self._send(201, written)
+        self._send(201, [])
+
+
+class PostgrestStandIn(StandInServer):
+    """In-memory PostgREST stand-in."""
+
+    label = 'supabase'
+
+    def __init__(self, **kwargs):
+        super().__init__(PostgrestHandler, **kwargs)
+        self.tables = {}
+        self._data_lock = threading.Lock()
+
+    def select(self, table, params):
+        filters = []
+        order = None
+        for key, value in params:
+            if key == 'order':
+                column, _, direction = value.partition('.')
+                order = (column, direction.startswith('desc'))
+            elif value.startswith('eq.'):
+                filters.append((key, value[3:]))
+        with self._data_lock:
+            rows = [dict(r) for r in self.tables.get(table, []) if all(str(r.get(k)) == v for k, v in filters)]
+        if order:
+            rows.sort(key=lambda r: str(r.get(order[0])), reverse=order[1])
+        return rows
+
+    def write(self, table, rows, conflict_columns=None):
+        written = []
+        with self._data_lock:
+            existing = self.tables.setdefault(table, [])
+            index = {tuple(str(r.get(c)) for c in conflict_columns): r for r in existing} if conflict_columns else {}
+            for row in rows:
+                key = tuple(str(row.get(c)) for c in conflict_columns) if conflict_columns else None
+                if key is not None and key in index:
+                    index[key].update(row)
+                    written.append(dict(index[key]))
+                    continue
+                stored = dict(row, id=row.get('id') or str(uuid.uuid4()))
+                existing.append(stored)
+                if key is not None:
+                    index[key] = stored
+                written.append(dict(stored))
+        return written
+
+
+class CalendarHandler(_JsonHandler):
+    """Emulates the Calendar v3 endpoints used by google_client."""
+
+    def _parts(self):
+        path = urlparse(self.path).path
+        path = re.sub(r'^/calendar/v3', '', path)
+        return [p for p in path.split('/') if p]
+
+    def do_GET(self):
+        parts = self._parts()
+        if parts == ['users', 'me', 'calendarList']:
+            self.server.record('calendarList.list')
+            return self._send(200, {'items': self.server.list_calendars()})
+        if len(parts) == 3 and parts[0] == 'calendars' and parts[2] == 'events':
+            self.server.record('events.list')
+            return self._send(200, {'items': self.server.list_events(parts[1])})
+        self._send(404, {'error': 'not found'})
+
+    def do_POST(self):
+        parts = self._parts()
+        body = self._body() or {}
+        if parts == ['calendars']:
+            self.server.record('calendars.insert')
+            return self._send(200, self.server.create_calendar(body))
+        if len(parts) == 3 and parts[0] == 'calendars' and parts[2] == 'events':
+            self.server.record('events.insert')
+            return self._send(200, self.server.insert_event(parts[1], body))
+        self._send(404, {'error': 'not found'})
+
+    def do_DELETE(self):
+        parts = self._parts()
+        if len(parts) == 4 and parts[0] == 'calendars' and parts[2] == 'events':
+            self.server.record('events.delete')
+            self.server.delete_event(parts[1], parts[3])
+            self.send_response(204)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self._send(404, {'error': 'not found'})
+
+
+class CalendarStandIn(StandInServer):
+    """In-memory Google Calendar API stand-in."""
+
+    label = 'google'
+
+    def __init__(self, **kwargs):
+        super().__init__(CalendarHandler, **kwargs)
+        self.calendars = {}
+        self.events = {}
+        self._data_lock = threading.Lock()
+
+    def list_calendars(self):
+        with self._data_lock:
+            return list(self.calendars.values())
+
+    def create_calendar(self, body):
+        with self._data_lock:
+            # Concurrent first pushes can race to create the calendar; keep one
+            for calendar in self.calendars.values():
+                if calendar['summary'] == body.get('summary'):
+                    return calendar
+            calendar = dict(body, id=f"cal-{len(self.calendars) + 1}")
+            self.calendars[calendar['id']] = calendar
+            self.events[calendar['id']] = {}
+            return calendar
+
+    def list_events(self, calendar_id):
+        with self._data_lock:
+            return list(self.events.get(calendar_id, {}).values())
+
+    def insert_event(self, calendar_id, body):
+        event = dict(body, id=uuid.uuid4().hex)
+        with self._data_lock:
+            self.events.setdefault(calendar_id, {})[event['id']] = event
+        return event
+
+    def delete_event(self, calendar_id, event_id):
+        with self._data_lock:
+            self.events.get(calendar_id, {}).pop(event_id, None)
+
+
+class _AssetPageHandler(BaseHTTPRequestHandler):
+    """Serves the page at / and its images, font and stylesheet, each after the simulated latency."""
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def _send_bytes(self, content_type, body):
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == '/':
+            self.server.record('page')
+            self._send_bytes('text/html; charset=utf-8', self.server.page.encode('utf-8'))
+        elif path.startswith('/img/') and path.endswith('.png'):
+            self.server.record('image')
+            self._send_bytes('image/png', self.server.image)
+        elif path == '/font.woff2':
+            self.server.record('font')
+            self._send_bytes('font/woff2', self.server.font)
+        elif path == '/site.css':
+            self.server.record('stylesheet')
+            self._send_bytes('text/css', b"body { font-family: 'CCS Sans', sans-serif; }\n"
+                                         b"@font-face { font-family: 'CCS Sans'; src: url('/font.woff2'); }\n")
+        else:
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+
+class AssetPageStandIn(StandInServer):
+    """
+    A schedule page in the shape of a CCS page: the given HTML body plus
+    `images` banner/avatar images, a web font and a stylesheet, so browser
+    profiles can be compared on what they fetch.
+    """
+
+    label = 'page'
+
+    def __init__(self, body_html, images=20, image_bytes=50_000, **kwargs):
+        super().__init__(_AssetPageHandler, **kwargs)
+        image_tags = ''.join(f'<img src="/img/{i}.png" alt="">' for i in range(images))
+        self.page = ('<!DOCTYPE html><html><head><link rel="stylesheet" href="/site.css"></head>'
+                     f'<body><div class="banner">{image_tags}</div>{body_html}</body></html>')
+        # Payload sizes are what matter here, not valid image data
+        self.image = b'\x89PNG\r\n\x1a\n' + bytes(image_bytes)
+        self.font = bytes(100_000)
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Sync Pipeline Benchmark
+Drives the Flask app (app.py) with concurrent clients against local
+stand-ins for Supabase PostgREST and the Google Calendar API, and reports
+latency percentiles, throughput and upstream call counts for each stage of
+the pipeline:
+
+    parse          schedule_parser on the print view (in-process, uncached)
+    sync           POST /api/sync/ccs     (parse + DB write)
+    calendar push  POST /api/calendar/push (DB read + calendar inserts)
+
+Usage (from the repository root):
+    python -m benchmarks.sync_pipeline --users 20 --concurrency 8 \\
+        --supabase-latency-ms 20 --google-latency-ms 40
+"""
+
+import os
+import time
+import argparse
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from benchmarks.standins import PostgrestStandIn, CalendarStandIn
+from synthetic_schedules import generate_print_view
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def run_concurrent(job, count, concurrency):
+    """Run job(i) for i in range(count) on `concurrency` threads; returns (latencies, errors, wall seconds)."""
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def timed(i):
+        started = time.perf_counter()
+        try:
+            job(i)
+        except Exception as e:
+            with lock:
+                errors.append(str(e))
+            return
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(timed, range(count)))
+    return latencies, errors, time.perf_counter() - started
+
+
+class Scenario:
+    """Result of one benchmark stage."""
+
+    def __init__(self, name, latencies, errors, wall, upstream_calls):
+        self.name = name
+        self.latencies = latencies
+        self.errors = errors
+        self.wall = wall
+        self.upstream_calls = upstream_calls
+
+    def report(self):
+        ms = [latency * 1000 for latency in self.latencies]
+        done = len(self.latencies)
+        lines = [
+            f"{self.name}: {done} ok, {len(self.errors)} failed, {done / self.wall:.1f} req/s",
+            f"    latency ms  p50 {percentile(ms, 50):8.1f}  p95 {percentile(ms, 95):8.1f}  p99 {percentile(ms, 99):8.1f}",
+        ]
+        for endpoint, calls in sorted(self.upstream_calls.items()):
+            lines.append(f"    upstream {endpoint:<22} {calls:6d} calls ({calls / max(done, 1):.1f}/req)")
+        if self.errors:
+            lines.append(f"    first error: {self.errors[0]}")
+        return '\n'.join(lines)
+
+
+def _snapshot(*servers):
+    calls = {}
+    for server in servers:
+        calls.update({f"{server.label}:{k}": v for k, v in server.calls.items()})
+        server.reset_calls()
+    return calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the sync pipeline against local service stand-ins.")
+    parser.add_argument('--users', type=int, default=20, help="Distinct users (one document each)")
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--pairings', type=int, default=30, help="Pairings per document")
+    parser.add_argument('--legs', type=int, default=4)
+    parser.add_argument('--crew', type=int, default=6)
+    parser.add_argument('--supabase-latency-ms', type=float, default=20)
+    parser.add_argument('--google-latency-ms', type=float, default=40)
+    parser.add_argument('--jitter-ms', type=float, default=10)
+    args = parser.parse_args()
+
+    postgrest = PostgrestStandIn(latency_ms=args.supabase_latency_ms, jitter_ms=args.jitter_ms).start()
+    calendar = CalendarStandIn(latency_ms=args.google_latency_ms, jitter_ms=args.jitter_ms, seed=1).start()
+
+    # The backend reads these at import time
+    os.environ['SUPABASE_URL'] = postgrest.url
+    os.environ['SUPABASE_SERVICE_ROLE_KEY'] = 'benchmark-service-role-key'
+    os.environ['GOOGLE_API_ENDPOINT'] = calendar.url + '/'
+
+    # Per-request log lines from the server and HTTP clients would dominate the output
+    for noisy in ('werkzeug', 'httpx', 'googleapiclient.discovery_cache', 'supabase_api', 'google_client'):
+        logging.getLogger(noisy).setLevel(logging.WARNING)
+
+    from werkzeug.serving import make_server
+    from app import app
+    from schedule_parser import parse_schedule
+
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    logger.info(f"Generating {args.users} documents of {args.pairings} pairings")
+    docs = [generate_print_view(pairings=args.pairings, legs_per_pairing=args.legs,
+                                crew_size=args.crew, seed=i) for i in range(args.users)]
+    user_ids = [f"00000000-0000-4000-8000-{i:012d}" for i in range(args.users)]
+    local = threading.local()
+
+    def session():
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        return local.session
+
+    def post(path, payload):
+        response = session().post(base_url + path, json=payload, timeout=120)
+        if response.status_code != 200:
+            raise RuntimeError(f"{path} returned {response.status_code}: {response.text[:200]}")
+
+    scenarios = []
+    try:
+        latencies, errors, wall = run_concurrent(lambda i: parse_schedule(docs[i], use_cache=False), args.users, args.concurrency)
+        scenarios.append(Scenario('parse', latencies, errors, wall, _snapshot(postgrest, calendar)))
+
+        latencies, errors, wall = run_concurrent(
+            lambda i: post('/api/sync/ccs', {'html_content': docs[i], 'user_id': user_ids[i]}),
+            args.users, args.concurrency)
+        scenarios.append(Scenario('sync (parse + DB write)', latencies, errors, wall, _snapshot(postgrest, calendar)))
+
+        latencies, errors, wall = run_concurrent(
+            lambda i: post('/api/calendar/push', {'user_id': user_ids[i], 'credentials': {'token': 'benchmark'}}),
+            args.users, args.concurrency)
+        scenarios.append(Scenario('calendar push', latencies, errors, wall, _snapshot(postgrest, calendar)))
+    finally:
+        server.shutdown()
+        postgrest.stop()
+        calendar.stop()
+
+    print(f"\n{args.users} users, concurrency {args.concurrency}, "
+          f"supabase latency {args.supabase_latency_ms} ms, google latency {args.google_latency_ms} ms "
+          f"(+0..{args.jitter_ms} ms jitter)\n")
+    for scenario in scenarios:
+        print(scenario.report())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Bulk Import of Archived Print-View Schedules
+
+Backfills Supabase from an archive of saved CCS print-view files laid out
+one directory per user:
+
+    <archive>/<user uuid>/**/schedule_printview_*.html
+
+Files are hashed in the main process and skipped when their content hash is
+already in private.print_view_imports. New files are parsed across a process
+pool with a bounded number of documents in flight, and the results are
+written in batched transactions together with their ledger rows, so an
+interrupted import resumes where it stopped.
+
+Usage:
+    python bulk_import.py ARCHIVE_DIR [--workers 4] [--batch-docs 50]
+"""
+
+import os
+import sys
+import time
+import uuid
+import fnmatch
+import hashlib
+import argparse
+import logging
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from schedule_parser import parse_schedule
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+FILE_PATTERN = 'schedule_printview_*.html'
+DEFAULT_BATCH_DOCS = 50
+REPORT_INTERVAL = 5.0  # seconds between throughput log lines
+
+
+def iter_archive(archive_dir):
+    """
+    Yield (user_id, path) for every print-view file, oldest file name first
+    per user. User ids are canonical lowercase UUID text, as Postgres prints
+    them; directories not named after a UUID are skipped.
+    """
+    for name in sorted(os.listdir(archive_dir)):
+        user_dir = os.path.join(archive_dir, name)
+        if not os.path.isdir(user_dir):
+            continue
+        try:
+            user_id = str(uuid.UUID(name))
+        except ValueError:
+            logger.warning(f"Skipping {user_dir}: not a user id")
+            continue
+        paths = []
+        for dirpath, _, filenames in os.walk(user_dir):
+            paths.extend(os.path.join(dirpath, name) for name in fnmatch.filter(filenames, FILE_PATTERN))
+        for path in sorted(paths, key=os.path.basename):
+            yield user_id, path
+
+
+def content_hash(path):
+    """SHA-256 of a file, read in blocks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def parse_document(path):
+    """
+    Parse one archived print view into compact tuples (runs in a worker process).
+
+    Returns a list of (pairing_code, start_date, end_date, block_time,
+    credit_time, flights, crew) where flights and crew are tuples of tuples,
+    so results pickle cheaply.
+    """
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        # Every document is parsed once per import, so caching would only cost memory
+        pairings = parse_schedule(f.read(), format='print_view', use_cache=False).pairings
+
+    parsed = []
+    for pairing in pairings:
+        if not pairing.pairing_code or not pairing.start_date:
+            continue
+        parsed.append(pairing.to_row()[1:] + (
+            tuple(leg.to_row() for leg in pairing.legs),
+            tuple(member.to_row() for member in pairing.crew if member.employee_id),
+        ))
+    return parsed
+
+
+class PostgresImportWriter:
+    """Writes parsed documents and their ledger rows with batched statements."""
+
+    def __init__(self, conn):
+        from psycopg2.extras import execute_values
+        self.conn = conn
+        self.execute_values = execute_values
+
+    def existing_hashes(self):
+        with self.conn.cursor() as cur:
+            cur.execute("SELECT content_hash FROM private.print_view_imports")
+            hashes = {row[0] for row in cur.fetchall()}
+        self.conn.commit()
+        return hashes
+
+    def write_batch(self, documents):
+        """Write a batch of (user_id, path, hash, parsed) in one transaction; returns rows written."""
+        # Later documents win when the same pairing appears more than once in the batch
+        pairings = {}
+        for user_id, _, _, parsed in documents:
+            for code, start, end, block, credit, flights, crew in parsed:
+                pairings[(user_id, code, start)] = (end, block, credit, flights, crew)
+
+        rows = 0
+        try:
+            with self.conn.cursor() as cur:
+                ids = self.execute_values(cur, """
+                    INSERT INTO public.pairings (user_id, pairing_code, start_date, end_date, block_time, credit_time)
+                    VALUES %s
+                    ON CONFLICT (user_id, pairing_code, start_date) DO UPDATE
+                    SET end_date = EXCLUDED.end_date, block_time = EXCLUDED.block_time, credit_time = EXCLUDED.credit_time
+                    RETURNING id, user_id, pairing_code, to_char(start_date AT TIME ZONE 'UTC', 'YYYY-MM-DD')
+                """, [(u, c, s, e, b, cr) for (u, c, s), (e, b, cr, _, _) in pairings.items()], fetch=True)
+                rows += len(ids)
+                pairing_ids = {(str(u), c, s): pid for pid, u, c, s in ids}
+
+                crew_members = {}
+                for *_, crew in pairings.values():
+                    for employee_id, name, _ in crew:
+                        crew_members[employee_id] = name
+                crew_ids = {}
+                if crew_members:
+                    returned = self.execute_values(cur, """
+                        INSERT INTO public.crew_members (employee_id, name) VALUES %s
+                        ON CONFLICT (employee_id) DO UPDATE SET name = EXCLUDED.name
+                        RETURNING employee_id, id
+                    """, list(crew_members.items()), fetch=True)
+                    crew_ids = dict(returned)
+                    rows += len(returned)
+
+                # Flights can only be stored once leg times are known (NOT NULL columns)
+                timed = {key: value for key, value in pairings.items()
+                         if value[3] and all(leg[3] and leg[4] for leg in value[3])}
+                if timed:
+                    replaced = [pairing_ids[key] for key in timed]
+                    cur.execute("DELETE FROM public.flight_crew WHERE flight_id IN "
+                                "(SELECT id FROM public.flights WHERE pairing_id = ANY(%s::uuid[]))", (replaced,))
+                    cur.execute("DELETE FROM public.flights WHERE pairing_id = ANY(%s::uuid[])", (replaced,))
+                    flight_rows, crew_per_flight = [], []
+                    for key, (*_, flights, crew) in timed.items():
+                        for leg in flights:
+                            flight_rows.append((pairing_ids[key],) + leg)
+                            crew_per_flight.append(crew)
+                    flight_ids = self.execute_values(cur, """
+                        INSERT INTO public.flights (pairing_id, flight_number, departure_airport, arrival_airport,
+                                                    scheduled_departure, scheduled_arrival, aircraft_type)
+                        VALUES %s RETURNING id
+                    """, flight_rows, fetch=True)
+                    rows += len(flight_ids)
+                    assignments = [(flight_id, crew_ids[employee_id], position)
+                                   for (flight_id,), crew in zip(flight_ids, crew_per_flight)
+                                   for employee_id, _, position in crew]
+                    if assignments:
+                        self.execute_values(cur, """
+                            INSERT INTO public.flight_crew (flight_id, crew_member_id, position) VALUES %s
+                            ON CONFLICT DO NOTHING
+                        """, assignments)
+                        rows += len(assignments)
+
+                self.execute_values(cur, """
+                    INSERT INTO private.print_view_imports (content_hash, user_id, source_path, pairings_count)
+                    VALUES %s ON CONFLICT DO NOTHING
+                """, [(h, u, p, len(parsed)) for u, p, h, parsed in documents])
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        return rows
+
+
+class ThroughputReporter:
+    """Logs docs/sec and rows/sec while an import runs."""
+
+    def __init__(self, interval=REPORT_INTERVAL):
+        self.interval = interval
+        self.started = self._last_report = time.perf_counter()
+        self.docs = self.rows = self.skipped = 0
+
+    def add(self, docs=0, rows=0, skipped=0):
+        self.docs += docs
+        self.rows += rows
+        self.skipped += skipped
+        now = time.perf_counter()
+        if now - self._last_report >= self.interval:
+            self._last_report = now
+            logger.info(self.summary())
+
+    def summary(self):
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        return (f"{self.docs} docs imported, {self.skipped} skipped, {self.rows} rows written "
+                f"in {elapsed:.1f}s ({self.docs / elapsed:.1f} docs/s, {self.rows / elapsed:,.0f} rows/s)")
+
+
+def run_import(archive_dir, writer, workers=None, batch_docs=DEFAULT_BATCH_DOCS, max_in_flight=None):
+    """Import every new document under archive_dir. Returns the ThroughputReporter."""
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or workers * 2
+    seen = writer.existing_hashes()
+    reporter = ThroughputReporter()
+    batch = []
+
+    def flush():
+        if batch:
+            reporter.add(docs=len(batch), rows=writer.write_batch(batch))
+            batch.clear()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = {}
+
+        def drain(block_until_below):
+            while len(in_flight) >= block_until_below:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    user_id, path, digest = in_flight.pop(future)
+                    try:
+                        batch.append((user_id, path, digest, future.result()))
+                    except Exception as e:
+                        logger.error(f"Failed to parse {path}: {e}")
+                    # Several futures can complete together; keep batches at batch_docs
+                    if len(batch) >= batch_docs:
+                        flush()
+
+        for user_id, path in iter_archive(archive_dir):
+            digest = content_hash(path)
+            if digest in seen:
+                reporter.add(skipped=1)
+                continue
+            seen.add(digest)  # identical copies later in the archive are skipped too
+            drain(max_in_flight)
+            in_flight[pool.submit(parse_document, path)] = (user_id, path, digest)
+
+        drain(1)
+        flush()
+
+    logger.info(reporter.summary())
+    return reporter
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill archived CCS print-view files into Supabase.")
+    parser.add_argument('archive_dir', help="Directory with one sub-directory of print views per user id")
+    parser.add_argument('--workers', type=int, default=None, help="Parser processes (default: CPU count)")
+    parser.add_argument('--batch-docs', type=int, default=DEFAULT_BATCH_DOCS, help="Documents per write transaction")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.archive_dir):
+        logger.error(f"Archive directory not found: {args.archive_dir}")
+        sys.exit(1)
+
+    from db_migrate_to_supabase import get_supabase_conn
+    conn = get_supabase_conn()
+    try:
+        run_import(args.archive_dir, PostgresImportWriter(conn), workers=args.workers, batch_docs=args.batch_docs)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
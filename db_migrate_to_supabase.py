@@ -5,14 +5,30 @@ Database Migration Script: SQLite to Supabase
 This script reads data from a local SQLite database and inserts it into the
 corresponding tables in a Supabase (PostgreSQL) database.
 
+Tables are streamed in fixed-size chunks (keyset pagination on SQLite's rowid)
+and written with PostgreSQL `COPY FROM STDIN`. Every chunk is committed
+together with a checkpoint row, so an interrupted run resumes from the last
+committed chunk. Independent tables are migrated in parallel, in dependency
+order. Integer primary/foreign keys are mapped to deterministic UUIDs.
+Rows owned by users missing from the user id map are skipped, together with
+their children (flights of skipped pairings, crew of those flights), so no
+row references a parent that was never copied.
+
 WARNING: This is a one-way migration. Run with caution.
 """
 
 import os
+import io
 import sys
+import json
+import time
+import uuid
 import logging
 import sqlite3
 import psycopg2
+from collections import namedtuple
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
 # Configure logging
@@ -21,6 +37,177 @@ logger = logging.getLogger(__name__)
 
 # --- Configuration ---
 SQLITE_DB_PATH = 'instance/ccs_hyper.db'
+USER_ID_MAP_PATH = os.getenv('USER_ID_MAP_PATH', 'user_id_map.json')  # {"<sqlite user id>": "<auth.users uuid>"}
+CHUNK_SIZE = int(os.getenv('MIGRATION_CHUNK_SIZE', '5000'))
+MAX_PARALLEL_TABLES = int(os.getenv('MIGRATION_PARALLEL_TABLES', '3'))
+
+# Fixed namespace so the same SQLite id always maps to the same UUID,
+# which keeps foreign keys consistent across tables and across resumed runs
+ID_NAMESPACE = uuid.UUID('5b0f6c1e-3c2d-4a8e-9f4b-2f1c6e7d8a90')
+
+CHECKPOINT_DDL = """
+CREATE TABLE IF NOT EXISTS private.migration_checkpoints (
+  table_name TEXT PRIMARY KEY,
+  last_rowid BIGINT NOT NULL,
+  rows_copied BIGINT NOT NULL,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+)
+"""
+
+CHECKPOINT_UPSERT = """
+INSERT INTO private.migration_checkpoints (table_name, last_rowid, rows_copied)
+VALUES (%s, %s, %s)
+ON CONFLICT (table_name) DO UPDATE
+  SET last_rowid = EXCLUDED.last_rowid, rows_copied = EXCLUDED.rows_copied, updated_at = now()
+"""
+
+# Returned by a column transform to drop the whole row (e.g. an unmapped user)
+SKIP_ROW = object()
+
+# A column is (sqlite name, supabase name, transform or None)
+TableSpec = namedtuple('TableSpec', ['name', 'columns', 'depends_on'])
+
+
+def uuid_for(table_name):
+    """Transform mapping an integer id of `table_name` to its deterministic UUID."""
+    def transform(value):
+        if value is None:
+            return None
+        return str(uuid.uuid5(ID_NAMESPACE, f"{table_name}:{value}"))
+    return transform
+
+
+def kept_uuid_for(table_name, skipped_ids):
+    """Like uuid_for, but skips the row when the referenced `table_name` row was skipped."""
+    to_uuid = uuid_for(table_name)
+    def transform(value):
+        if value in skipped_ids:
+            return SKIP_ROW
+        return to_uuid(value)
+    return transform
+
+
+def now_if_null(timestamp):
+    """Transform filling a missing NOT NULL timestamp with `timestamp`."""
+    def transform(value):
+        return timestamp if value is None else value
+    return transform
+
+
+def find_skipped_ids(sqlite_conn, user_id_map):
+    """
+    SQLite ids of the parent rows that will be skipped: pairings of unmapped
+    users and the flights of those pairings. Child rows referencing them are
+    skipped as well, instead of failing their foreign keys.
+    """
+    pairings = {row_id for row_id, user_id in sqlite_conn.execute("SELECT id, user_id FROM pairings")
+                if str(user_id) not in user_id_map}
+    flights = {row_id for row_id, pairing_id in sqlite_conn.execute("SELECT id, pairing_id FROM flights")
+               if pairing_id in pairings}
+    return {'pairings': pairings, 'flights': flights}
+
+
+def load_user_id_map(path=USER_ID_MAP_PATH):
+    """Load the SQLite user id -> Supabase auth user UUID mapping, if present."""
+    if not os.path.exists(path):
+        logger.warning(f"No user id map at {path}; rows owned by users will be skipped.")
+        return {}
+    with open(path, 'r') as f:
+        return {str(k): v for k, v in json.load(f).items()}
+
+
+def user_id_transform(user_id_map):
+    """Transform mapping a SQLite user id to its auth.users UUID, skipping unmapped users."""
+    def transform(value):
+        return user_id_map.get(str(value), SKIP_ROW)
+    return transform
+
+
+def build_table_specs(user_id_map, skipped_ids=None):
+    """
+    The tables to migrate, mirroring models.py. skipped_ids (see
+    find_skipped_ids) lists the parent rows whose children must be skipped.
+    """
+    to_user = user_id_transform(user_id_map)
+    skipped_ids = skipped_ids or {}
+    # created_at is NOT NULL in Supabase; rows without one get the migration time
+    created_at = now_if_null(datetime.now(timezone.utc).isoformat())
+    return [
+        TableSpec('crew_members', [
+            ('id', 'id', uuid_for('crew_members')),
+            ('name', 'name', None),
+            ('employee_id', 'employee_id', None),
+            ('base', 'base', None),
+            ('seniority', 'seniority', None),
+        ], []),
+        TableSpec('pairings', [
+            ('id', 'id', uuid_for('pairings')),
+            ('user_id', 'user_id', to_user),
+            ('pairing_code', 'pairing_code', None),
+            ('start_date', 'start_date', None),
+            ('end_date', 'end_date', None),
+            ('block_time', 'block_time', None),
+            ('credit_time', 'credit_time', None),
+            ('trip_value', 'trip_value', None),
+            ('created_at', 'created_at', created_at),
+        ], []),
+        TableSpec('flights', [
+            ('id', 'id', uuid_for('flights')),
+            ('pairing_id', 'pairing_id', kept_uuid_for('pairings', skipped_ids.get('pairings', set()))),
+            ('flight_number', 'flight_number', None),
+            ('departure_airport', 'departure_airport', None),
+            ('arrival_airport', 'arrival_airport', None),
+            ('scheduled_departure', 'scheduled_departure', None),
+            ('scheduled_arrival', 'scheduled_arrival', None),
+            ('aircraft_type', 'aircraft_type', None),
+            ('actual_departure', 'actual_departure', None),
+            ('actual_arrival', 'actual_arrival', None),
+            ('notes', 'notes', None),
+        ], ['pairings']),
+        TableSpec('flight_crew', [
+            ('id', 'id', uuid_for('flight_crew')),
+            ('flight_id', 'flight_id', kept_uuid_for('flights', skipped_ids.get('flights', set()))),
+            ('crew_member_id', 'crew_member_id', uuid_for('crew_members')),
+            ('position', 'position', None),
+        ], ['flights', 'crew_members']),
+        TableSpec('user_crew_lists', [
+            ('id', 'id', uuid_for('user_crew_lists')),
+            ('user_id', 'user_id', to_user),
+            ('crew_member_id', 'crew_member_id', uuid_for('crew_members')),
+            ('list_type', 'list_type', None),
+            ('notes', 'notes', None),
+            ('created_at', 'created_at', created_at),
+        ], ['crew_members']),
+        TableSpec('statistics', [
+            ('id', 'id', uuid_for('statistics')),
+            ('user_id', 'user_id', to_user),
+            ('month', 'month', None),
+            ('year', 'year', None),
+            ('total_block', 'total_block', None),
+            ('total_credit', 'total_credit', None),
+            ('flights_count', 'flights_count', None),
+            ('miles_flown', 'miles_flown', None),
+            ('aircraft_types', 'aircraft_types', None),
+            ('created_at', 'created_at', created_at),
+        ], []),
+    ]
+
+
+def dependency_levels(specs):
+    """Group table specs into levels; every table only depends on earlier levels."""
+    remaining = {spec.name: spec for spec in specs}
+    done = set()
+    levels = []
+    while remaining:
+        level = [spec for spec in remaining.values() if all(dep in done for dep in spec.depends_on)]
+        if not level:
+            raise ValueError(f"Circular or missing table dependencies: {sorted(remaining)}")
+        levels.append(level)
+        for spec in level:
+            done.add(spec.name)
+            del remaining[spec.name]
+    return levels
+
 
 def get_supabase_conn():
     """Get a connection to the Supabase database."""
@@ -29,89 +216,178 @@ def get_supabase_conn():
     if not db_url:
         logger.error("SUPABASE_DB_URL not found in environment variables.")
         sys.exit(1)
-    return psycopg2.connect(db_url)
+    conn = psycopg2.connect(db_url)
+    with conn.cursor() as cur:
+        # SQLAlchemy stored naive UTC timestamps
+        cur.execute("SET TIME ZONE 'UTC'")
+    conn.commit()
+    return conn
 
-def get_sqlite_conn():
+
+def get_sqlite_conn(path=SQLITE_DB_PATH):
     """Get a connection to the local SQLite database."""
-    if not os.path.exists(SQLITE_DB_PATH):
-        logger.error(f"SQLite database not found at: {SQLITE_DB_PATH}")
+    if not os.path.exists(path):
+        logger.error(f"SQLite database not found at: {path}")
         sys.exit(1)
-    return sqlite3.connect(SQLITE_DB_PATH)
+    return sqlite3.connect(path)
 
-def migrate_table(sqlite_cur, supabase_cur, table_name, column_map):
-    """Migrates a single table from SQLite to Supabase."""
-    logger.info(f"Starting migration for table: {table_name}")
-    
-    try:
-        sqlite_cur.execute(f"SELECT {', '.join(column_map.keys())} FROM {table_name}")
-        rows = sqlite_cur.fetchall()
-        logger.info(f"Found {len(rows)} rows in SQLite table '{table_name}'.")
 
+def _copy_value(value):
+    """Render one value in PostgreSQL COPY text format."""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    text = value if isinstance(value, str) else str(value)
+    return (text.replace('\\', '\\\\').replace('\t', '\\t')
+                .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+def read_chunks(sqlite_conn, spec, after_rowid=0, chunk_size=CHUNK_SIZE):
+    """
+    Yield (last_rowid, rows) chunks of a SQLite table.
+
+    Keyset pagination on rowid keeps memory bounded to one chunk and lets a
+    resumed run start right after the last committed row.
+    """
+    columns = ', '.join(col for col, _, _ in spec.columns)
+    query = f"SELECT rowid, {columns} FROM {spec.name} WHERE rowid > ? ORDER BY rowid LIMIT ?"
+    last_rowid = after_rowid
+    while True:
+        rows = sqlite_conn.execute(query, (last_rowid, chunk_size)).fetchall()
         if not rows:
-            logger.info(f"No data to migrate for table '{table_name}'.")
             return
+        last_rowid = rows[-1][0]
+        yield last_rowid, [row[1:] for row in rows]
 
-        # Prepare the INSERT statement for PostgreSQL
-        pg_columns = ', '.join(column_map.values())
-        placeholders = ', '.join(['%s'] * len(column_map.values()))
-        insert_query = f"INSERT INTO public.{table_name} ({pg_columns}) VALUES ({placeholders}) ON CONFLICT DO NOTHING"
 
-        supabase_cur.executemany(insert_query, rows)
-        logger.info(f"Successfully migrated {supabase_cur.rowcount} rows to Supabase table '{table_name}'.")
-    
-    except sqlite3.Error as e:
-        logger.error(f"SQLite error during migration of '{table_name}': {e}")
-        raise
-    except psycopg2.Error as e:
-        logger.error(f"Supabase/PostgreSQL error during migration of '{table_name}': {e}")
+def transform_rows(spec, rows):
+    """Apply the column transforms; returns (COPY payload, rows kept, rows skipped)."""
+    transforms = [transform for _, _, transform in spec.columns]
+    buffer = io.StringIO()
+    kept = skipped = 0
+    for row in rows:
+        values = []
+        for value, transform in zip(row, transforms):
+            if transform is not None:
+                value = transform(value)
+                if value is SKIP_ROW:
+                    break
+            values.append(_copy_value(value))
+        else:
+            buffer.write('\t'.join(values))
+            buffer.write('\n')
+            kept += 1
+            continue
+        skipped += 1
+    buffer.seek(0)
+    return buffer, kept, skipped
+
+
+def load_checkpoint(supabase_conn, table_name):
+    """Return (last_rowid, rows_copied) of the last committed chunk, or (0, 0)."""
+    with supabase_conn.cursor() as cur:
+        cur.execute("SELECT last_rowid, rows_copied FROM private.migration_checkpoints WHERE table_name = %s", (table_name,))
+        row = cur.fetchone()
+    supabase_conn.commit()
+    return (row[0], row[1]) if row else (0, 0)
+
+
+def migrate_table(sqlite_conn, supabase_conn, spec, chunk_size=CHUNK_SIZE):
+    """Stream one table from SQLite to Supabase, resuming from its checkpoint."""
+    last_rowid, copied = load_checkpoint(supabase_conn, spec.name)
+    total = sqlite_conn.execute(f"SELECT COUNT(*) FROM {spec.name}").fetchone()[0]
+    if last_rowid:
+        logger.info(f"{spec.name}: resuming after rowid {last_rowid} ({copied} rows already copied)")
+    else:
+        logger.info(f"Starting migration for table: {spec.name} ({total} rows)")
+
+    copy_sql = f"COPY public.{spec.name} ({', '.join(pg for _, pg, _ in spec.columns)}) FROM STDIN"
+    started = time.perf_counter()
+    read = skipped_total = 0
+
+    try:
+        for last_rowid, rows in read_chunks(sqlite_conn, spec, last_rowid, chunk_size):
+            payload, kept, skipped = transform_rows(spec, rows)
+            with supabase_conn.cursor() as cur:
+                if kept:
+                    cur.copy_expert(copy_sql, payload)
+                cur.execute(CHECKPOINT_UPSERT, (spec.name, last_rowid, copied + kept))
+            supabase_conn.commit()
+
+            copied += kept
+            read += len(rows)
+            skipped_total += skipped
+            elapsed = time.perf_counter() - started
+            rate = read / elapsed if elapsed else 0
+            logger.info(f"{spec.name}: {copied}/{total} rows ({copied * 100 / max(total, 1):.1f}%), {rate:,.0f} rows/s")
+    except (sqlite3.Error, psycopg2.Error) as e:
+        supabase_conn.rollback()
+        logger.error(f"Error during migration of '{spec.name}' after rowid {last_rowid}: {e}")
         raise
 
+    if skipped_total:
+        logger.warning(f"{spec.name}: skipped {skipped_total} rows owned by unmapped users or their skipped rows")
+    logger.info(f"Finished {spec.name}: {copied} rows in {time.perf_counter() - started:.1f}s")
+    return copied
+
+
+def _migrate_table_worker(spec, chunk_size):
+    """Migrate one table on its own connections (connections are not shared across threads)."""
+    sqlite_conn = get_sqlite_conn()
+    supabase_conn = get_supabase_conn()
+    try:
+        return migrate_table(sqlite_conn, supabase_conn, spec, chunk_size)
+    finally:
+        sqlite_conn.close()
+        supabase_conn.close()
+
+
+def migrate_all(specs, worker=_migrate_table_worker, chunk_size=CHUNK_SIZE, max_workers=MAX_PARALLEL_TABLES):
+    """Migrate all tables level by level, running the tables of a level in parallel."""
+    results = {}
+    started = time.perf_counter()
+
+    for level in dependency_levels(specs):
+        logger.info(f"Migrating in parallel: {', '.join(spec.name for spec in level)}")
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {spec.name: pool.submit(worker, spec, chunk_size) for spec in level}
+            for name, future in futures.items():
+                results[name] = future.result()  # re-raises, stopping before dependent levels
+
+    elapsed = time.perf_counter() - started
+    total = sum(results.values())
+    logger.info(f"Migrated {total} rows across {len(results)} tables in {elapsed:.1f}s ({total / max(elapsed, 1e-9):,.0f} rows/s)")
+    return results
+
+
 def main():
     """Main migration function."""
-    sqlite_conn = None
-    supabase_conn = None
-    
     try:
-        sqlite_conn = get_sqlite_conn()
         supabase_conn = get_supabase_conn()
-        
-        sqlite_conn.row_factory = sqlite3.Row
-        sqlite_cur = sqlite_conn.cursor()
-        supabase_cur = supabase_conn.cursor()
+        with supabase_conn.cursor() as cur:
+            cur.execute(CHECKPOINT_DDL)
+        supabase_conn.commit()
+        supabase_conn.close()
 
         logger.info("Starting data migration from SQLite to Supabase...")
-
-        # --- Define Table Mappings ---
-        # This is where you map SQLite columns to Supabase columns.
-        # The keys are SQLite column names, values are Supabase column names.
-        # Note: This example assumes a direct mapping. You may need to transform data.
-        # This script does NOT handle user authentication data (auth.users).
-        
-        # Example for a 'pairings' table (adjust to your actual schema)
-        # pairings_map = {
-        #     'id': 'id', # Assuming you want to keep the same UUIDs if they exist
-        #     'user_id': 'user_id',
-        #     'pairing_code': 'pairing_code',
-        #     'start_date': 'start_date',
-        #     'end_date': 'end_date',
-        # }
-        # migrate_table(sqlite_cur, supabase_cur, 'pairings', pairings_map)
-
-        # Add other tables here...
-
-        supabase_conn.commit()
+        # This script does NOT handle user authentication data (auth.users);
+        # map SQLite user ids to existing Supabase users in USER_ID_MAP_PATH.
+        user_id_map = load_user_id_map()
+        sqlite_conn = get_sqlite_conn()
+        try:
+            skipped_ids = find_skipped_ids(sqlite_conn, user_id_map)
+        finally:
+            sqlite_conn.close()
+        specs = build_table_specs(user_id_map, skipped_ids)
+        migrate_all(specs)
         logger.info("Data migration completed successfully.")
 
     except Exception as e:
         logger.error(f"An error occurred during the migration process: {e}")
-        if supabase_conn:
-            supabase_conn.rollback()
-            logger.info("Supabase transaction rolled back.")
-    finally:
-        if sqlite_conn:
-            sqlite_conn.close()
-        if supabase_conn:
-            supabase_conn.close()
+        logger.info("Committed chunks are kept; re-run the script to resume.")
+        sys.exit(1)
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,402 @@
+"""
+Browser driver supervisor for long-running scraper workers.
+Hands out CcsScraper instances from a small pool and keeps an eye on the
+chromedriver process tree behind each one (chromedriver, Chrome and its
+renderers). A driver whose tree grows past the memory budget, or that has
+been alive longer than the age budget, is shut down and replaced when it is
+returned. A watchdog thread kills drivers that blow far past the budget
+even while they are in use. At startup, chrome and chromedriver processes
+orphaned by earlier workers are reaped. Per-driver RSS and age are exported
+as metrics.
+
+A driver process counts as orphaned when its parent is neither another
+driver process nor a live worker (a process named after one of
+DRIVER_WORKER_NAMES). That covers hosts with a child subreaper (tini,
+systemd --user, ...) where orphans are reparented to a live process instead
+of init. A subreaper that is itself named like a worker still hides them.
+
+Process information comes from psutil when it is installed, and from /proc
+otherwise.
+
+Usage:
+    supervisor = DriverSupervisor()
+    with supervisor.lease() as scraper:
+        scraper.get_detailed_schedule(username, password)
+"""
+
+import os
+import time
+import signal
+import logging
+import threading
+from contextlib import contextmanager
+
+from instrumentation import registry
+
+try:
+    import psutil
+except ImportError:  # pragma: no cover - psutil is optional
+    psutil = None
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+DRIVER_MAX_RSS_MB = float(os.environ.get('DRIVER_MAX_RSS_MB', '1500'))  # per driver process tree
+DRIVER_MAX_AGE_S = float(os.environ.get('DRIVER_MAX_AGE_S', '1800'))
+DRIVER_CHECK_INTERVAL_S = float(os.environ.get('DRIVER_CHECK_INTERVAL_S', '30'))
+DRIVER_HARD_LIMIT_FACTOR = 2.0  # busy drivers are killed at this multiple of the memory budget
+# /proc truncates process names to 15 characters
+DRIVER_PROCESS_NAMES = ('chromedriver', 'chrome', 'google-chrome', 'chromium', 'chromium-browse', 'chromium-browser', 'headless_shell')
+# Only Chrome instances started by WebDriver carry one of these flags
+AUTOMATION_MARKERS = ('--enable-automation', '--remote-debugging-port', '--test-type=webdriver')
+# Processes that start drivers, matched by name prefix ('python' covers 'python3.12')
+DRIVER_WORKER_NAMES = tuple(os.environ.get('DRIVER_WORKER_NAMES', 'python,gunicorn,celery,uwsgi').split(','))
+
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+DRIVER_RSS = registry.gauge(
+    'ccs_driver_rss_bytes', 'Resident memory of each scraper driver process tree.', ('driver',))
+DRIVER_AGE = registry.gauge(
+    'ccs_driver_age_seconds', 'Age of each scraper driver.', ('driver',))
+DRIVER_PROCESSES = registry.gauge(
+    'ccs_driver_processes', 'Processes in each scraper driver process tree.', ('driver',))
+DRIVER_RECYCLES = registry.counter(
+    'ccs_driver_recycles_total', 'Scraper drivers shut down and replaced.', ('reason',))
+ORPHANS_REAPED = registry.counter(
+    'ccs_driver_orphans_reaped_total', 'Orphaned chrome/chromedriver processes killed.')
+
+
+# --- Process inspection ---
+
+def process_table():
+    """{pid: (parent pid, process name, command line)} of every visible process."""
+    table = {}
+    if psutil is not None:
+        for process in psutil.process_iter(['pid', 'ppid', 'name', 'cmdline']):
+            info = process.info
+            table[info['pid']] = (info['ppid'], info['name'] or '', ' '.join(info['cmdline'] or ()))
+        return table
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat', encoding='utf-8', errors='replace') as f:
+                stat = f.read()
+            with open(f'/proc/{entry}/cmdline', 'rb') as f:
+                cmdline = f.read().replace(b'\0', b' ').decode('utf-8', 'replace').strip()
+        except OSError:
+            continue  # exited while we looked
+        # The name is in parentheses and may itself contain spaces or ')'
+        name = stat[stat.index('(') + 1:stat.rindex(')')]
+        ppid = int(stat[stat.rindex(')') + 2:].split()[1])
+        table[int(entry)] = (ppid, name, cmdline)
+    return table
+
+
+def process_tree(pid, table=None):
+    """pid and all its descendants."""
+    table = process_table() if table is None else table
+    children = {}
+    for child, (parent, _, _) in table.items():
+        children.setdefault(parent, []).append(child)
+    tree, pending = [], [pid]
+    while pending:
+        current = pending.pop()
+        if current in table or current == pid:
+            tree.append(current)
+            pending.extend(children.get(current, ()))
+    return tree
+
+
+def rss_bytes(pid):
+    """Resident memory of one process, or 0 when it is gone."""
+    if psutil is not None:
+        try:
+            return psutil.Process(pid).memory_info().rss
+        except psutil.Error:
+            return 0
+    try:
+        with open(f'/proc/{pid}/statm') as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return 0
+
+
+def tree_rss_bytes(pid, table=None):
+    """(total resident memory, process count) of pid's process tree."""
+    pids = process_tree(pid, table)
+    return sum(rss_bytes(p) for p in pids), len(pids)
+
+
+def _signal_all(pids):
+    killed = []
+    for p in pids:
+        try:
+            os.kill(p, signal.SIGKILL)
+            killed.append(p)
+        except (ProcessLookupError, PermissionError):
+            pass
+    return killed
+
+
+def kill_tree(pid, table=None):
+    """SIGKILL pid and its descendants; returns the pids signalled."""
+    # children first, so they aren't reparented mid-kill
+    return _signal_all(reversed(process_tree(pid, table)))
+
+
+def _is_driver_process(name):
+    return os.path.basename(name) in DRIVER_PROCESS_NAMES
+
+
+def driver_processes(pid, table=None):
+    """{pid: name} of the driver processes in pid's tree, parents before children."""
+    table = process_table() if table is None else table
+    return {p: table[p][1] for p in process_tree(pid, table) if p in table and _is_driver_process(table[p][1])}
+
+
+def kill_leftovers(processes, table=None):
+    """
+    SIGKILL the processes of an earlier driver_processes() snapshot that are
+    still running under the same name; returns the pids signalled. Pids
+    that exited and were reused by something else are left alone.
+    """
+    table = process_table() if table is None else table
+    return _signal_all(p for p in reversed(list(processes))
+                       if p in table and table[p][1] == processes[p])
+
+
+def _owned_by_us(pid):
+    try:
+        return os.stat(f'/proc/{pid}').st_uid == os.getuid()
+    except OSError:
+        return psutil is not None  # no /proc; psutil only lists what we can see anyway
+
+
+def _is_worker(name):
+    base = os.path.basename(name)
+    return any(base.startswith(worker) for worker in DRIVER_WORKER_NAMES)
+
+
+def find_orphans(table=None):
+    """
+    Pids of this user's chromedriver and WebDriver-started Chrome processes
+    whose parent is neither a driver process nor a live worker: reparented
+    to init, or to a subreaper. Processes started by this process are never
+    orphans.
+    """
+    table = process_table() if table is None else table
+    orphans = []
+    for pid, (ppid, name, cmdline) in table.items():
+        if not _is_driver_process(name):
+            continue
+        if os.path.basename(name) != 'chromedriver' and not any(marker in cmdline for marker in AUTOMATION_MARKERS):
+            continue  # someone's regular browser
+        if ppid == os.getpid():
+            continue
+        if ppid > 1 and ppid in table and (_is_driver_process(table[ppid][1]) or _is_worker(table[ppid][1])):
+            continue  # its driver or worker is still there
+        if _owned_by_us(pid):
+            orphans.append(pid)
+    return orphans
+
+
+def reap_orphans(table=None):
+    """Kill orphaned driver process trees left by earlier workers; returns the pids killed."""
+    table = process_table() if table is None else table
+    killed = []
+    for pid in find_orphans(table):
+        killed.extend(kill_tree(pid, table))
+    if killed:
+        ORPHANS_REAPED.inc(len(killed))
+        logger.warning(f"Reaped {len(killed)} orphaned chrome/chromedriver processes")
+    return killed
+
+
+# --- Supervisor ---
+
+class _Supervised:
+    """A pooled scraper and its bookkeeping."""
+
+    def __init__(self, scraper, number):
+        self.scraper = scraper
+        self.name = f"driver-{number}"
+        self.started = time.monotonic()
+        self.busy = False
+        self.retired = False
+        self.rss = 0
+        self.processes = 0
+
+    @property
+    def pid(self):
+        return self.scraper.driver_pid
+
+    @property
+    def age(self):
+        return time.monotonic() - self.started
+
+
+class DriverSupervisor:
+    """Pool of CcsScraper instances with memory and age budgets."""
+
+    def __init__(self, factory=None, max_rss_mb=DRIVER_MAX_RSS_MB, max_age_s=DRIVER_MAX_AGE_S,
+                 check_interval=DRIVER_CHECK_INTERVAL_S, reap=True):
+        self.factory = factory or _default_factory
+        self.max_rss = max_rss_mb * 1024 * 1024
+        self.max_age_s = max_age_s
+        self.check_interval = check_interval
+        self._idle = []
+        self._entries = []
+        self._created = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        if reap:
+            reap_orphans()
+
+    def _new_entry(self):
+        scraper = self.factory()
+        if scraper.driver is None:
+            scraper.setup_driver()
+        with self._lock:
+            self._created += 1
+            entry = _Supervised(scraper, self._created)
+            self._entries.append(entry)
+        logger.info(f"Started {entry.name} (pid {entry.pid})")
+        return entry
+
+    @contextmanager
+    def lease(self):
+        """Borrow a healthy scraper; it is checked against the budgets when returned."""
+        entry = None
+        while entry is None:
+            with self._lock:
+                entry = self._idle.pop() if self._idle else None
+            if entry is None:
+                entry = self._new_entry()
+                continue
+            reason = self.check(entry)
+            if reason:
+                self.recycle(entry, reason)
+                entry = None
+        entry.busy = True
+        failed = False
+        try:
+            yield entry.scraper
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            entry.busy = False
+            reason = 'error' if failed else self.check(entry)
+            if reason:
+                self.recycle(entry, reason)
+            else:
+                with self._lock:
+                    self._idle.append(entry)
+
+    def measure(self, entry, table=None):
+        """Refresh and export the entry's memory and process count."""
+        pid = entry.pid
+        entry.rss, entry.processes = tree_rss_bytes(pid, table) if pid else (0, 0)
+        DRIVER_RSS.set(entry.rss, driver=entry.name)
+        DRIVER_PROCESSES.set(entry.processes, driver=entry.name)
+        DRIVER_AGE.set(round(entry.age, 1), driver=entry.name)
+
+    def check(self, entry, table=None):
+        """The budget the entry exceeds ('memory', 'age' or 'dead'), or None when it is healthy."""
+        if not entry.scraper.session_alive():
+            return 'dead'
+        self.measure(entry, table)
+        if entry.rss > self.max_rss:
+            return 'memory'
+        if entry.age > self.max_age_s:
+            return 'age'
+        return None
+
+    def recycle(self, entry, reason):
+        """Shut a driver down for good; the next lease starts a fresh one."""
+        with self._lock:
+            if entry.retired:
+                return
+            entry.retired = True
+        logger.warning(f"Recycling {entry.name} ({reason}): {entry.rss / 1024 / 1024:.0f} MB, {entry.age:.0f}s old")
+        DRIVER_RECYCLES.inc(reason=reason)
+        pid = entry.pid
+        processes = driver_processes(pid) if pid else {}
+        if reason != 'memory_hard':
+            entry.scraper.close()
+        if processes:
+            # quit() can leave renderers behind, and a hung driver doesn't quit at all.
+            # The process table is read again, as quit() may have freed pids for reuse.
+            kill_leftovers(processes)
+        with self._lock:
+            if entry in self._idle:
+                self._idle.remove(entry)
+            if entry in self._entries:
+                self._entries.remove(entry)
+        for gauge in (DRIVER_RSS, DRIVER_AGE, DRIVER_PROCESSES):
+            gauge.remove(driver=entry.name)
+
+    def start(self):
+        """Start the watchdog thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._watch, name='driver-watchdog', daemon=True)
+            self._thread.start()
+        return self
+
+    def _watch(self):
+        while not self._stop.wait(self.check_interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error(f"Driver watchdog sweep failed: {e}")
+
+    def sweep(self):
+        """Check every driver once: recycle idle ones over budget, kill busy ones far over it."""
+        table = process_table()
+        with self._lock:
+            entries = list(self._entries)
+        for entry in entries:
+            if entry.busy:
+                pid = entry.pid
+                if pid:
+                    self.measure(entry, table)
+                if entry.rss > self.max_rss * DRIVER_HARD_LIMIT_FACTOR:
+                    # The caller's next WebDriver call fails and its lease ends in recycle('error')
+                    self.recycle(entry, 'memory_hard')
+                continue
+            reason = self.check(entry, table)
+            if reason:
+                with self._lock:
+                    if entry.busy or entry not in self._idle:
+                        continue  # leased in the meantime
+                    self._idle.remove(entry)
+                self.recycle(entry, reason)
+
+    def stats(self):
+        """Per-driver pid, memory, process count, age and state from the last measurement."""
+        with self._lock:
+            entries = list(self._entries)
+        return [{'driver': entry.name, 'pid': entry.pid, 'rss_mb': round(entry.rss / 1024 / 1024, 1),
+                 'processes': entry.processes, 'age_s': round(entry.age, 1), 'busy': entry.busy}
+                for entry in entries]
+
+    def close(self):
+        """Stop the watchdog and shut down every driver."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        with self._lock:
+            entries = list(self._entries)
+            self._idle.clear()
+        for entry in entries:
+            self.recycle(entry, 'shutdown')
+
+
+def _default_factory():
+    from enhanced_scraper import CcsScraper
+    return CcsScraper(headless=True)
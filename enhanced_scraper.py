@@ -6,22 +6,99 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 import os
-from datetime import datetime
+import re
+
+from instrumentation import traced
+from locators import LocatorEngine
+from scrape_steps import StepMachine, Step, RetryPolicy
+from schedule_dates import month_number
+from schedule_parser import PRINT_VIEW_EXTRACT_SCRIPT, parse_print_view_json
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# My Schedule month navigation
+MONTH_LABEL_XPATH = "//*[contains(@class, 'month-title') or contains(@class, 'month-label') or contains(@class, 'sg-header-text')]"
+NEXT_MONTH_XPATH = "//*[contains(@class, 'next-month') or @aria-label='Next Month' or @title='Next Month'] | //i[contains(@class, 'icon-ChevronRight')]/parent::*"
+PREV_MONTH_XPATH = "//*[contains(@class, 'prev-month') or @aria-label='Previous Month' or @title='Previous Month'] | //i[contains(@class, 'icon-ChevronLeft')]/parent::*"
+# True once a print preview window has finished loading its schedule tables
+PREVIEW_READY_SCRIPT = "return document.readyState === 'complete' && document.querySelector('table') !== null;"
+# Present once the My Schedule grid has rendered, even for a month without trips
+MASTER_SCHEDULE_READY_XPATH = "//*[contains(@class, 'sg-data-row') or contains(@class, 'sg-header-text')]"
+MONTH_LABEL_RE = re.compile(r'([A-Za-z]+)\s+(\d{4})')
+
+
+CCS_BASE_URL = os.environ.get('CCS_BASE_URL', 'https://ccs.ual.com')
+
+# Browser profiles for setup_driver. 'default' renders pages like a desktop
+# browser; 'lean' skips everything that isn't needed to read schedule data.
+BROWSER_PROFILES = ('default', 'lean')
+SCRAPER_PROFILE = os.environ.get('SCRAPER_PROFILE', 'default')
+LEAN_WINDOW_SIZE = (1024, 768)  # narrowest layout that still shows the quick links and print button
+# URL patterns the lean profile blocks through the DevTools protocol. Stylesheets
+# stay, since element visibility checks depend on them.
+LEAN_BLOCKED_URLS = [
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.bmp', '*.ico',
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+    '*.mp3', '*.mp4', '*.webm',
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*',
+    '*newrelic.com*', '*nr-data.net*', '*hotjar.com*',
+]
+
+# Retry policy per get_detailed_schedule step. When a step runs out of
+# attempts the run rewinds to `rewind_to` in the same browser session.
+SCRAPE_POLICIES = {
+    'login': RetryPolicy(attempts=2, delay=5),
+    'my_schedule': RetryPolicy(attempts=3, delay=2, rewind_to='login'),
+    'print_dialog': RetryPolicy(attempts=3, delay=2, rewind_to='my_schedule'),
+    'preview': RetryPolicy(attempts=2, delay=2, rewind_to='print_dialog'),
+    'extract': RetryPolicy(attempts=2, delay=1, rewind_to='print_dialog'),
+}
+
+
+def months_from(year, month, count):
+    """List of (year, month) for `count` consecutive months starting at year/month."""
+    months = []
+    for offset in range(count):
+        index = year * 12 + (month - 1) + offset
+        months.append((index // 12, index % 12 + 1))
+    return months
+
 class CcsScraper:
     """Enhanced CCS scraper that retrieves detailed schedule information from the print view"""
     
-    def __init__(self, headless=True, debug=False):
+    def __init__(self, headless=True, debug=False, locators=None, profile=None, base_url=None):
         """Initialize the scraper with options"""
         self.driver = None
+        self.base_url = (base_url or CCS_BASE_URL).rstrip('/')
         self.headless = headless
         self.debug = debug
+        self.profile = profile or SCRAPER_PROFILE
+        if self.profile not in BROWSER_PROFILES:
+            raise ValueError(f"Unknown browser profile {self.profile!r}; expected one of {BROWSER_PROFILES}")
         self.logged_in = False
+        self.main_window = None
+        self.locators = locators or LocatorEngine()
+        self.steps = None  # StepMachine of get_detailed_schedule, kept for resuming
+        self.last_schedule = None  # ParsedSchedule of the last extract='dom' scrape
         
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    @property
+    def driver_pid(self):
+        """Pid of the chromedriver process behind this scraper, or None."""
+        try:
+            return self.driver.service.process.pid
+        except AttributeError:
+            return None
+
+    @traced('scraper.setup_driver')
     def setup_driver(self):
         """Setup Selenium WebDriver with appropriate options"""
         from selenium.webdriver.chrome.options import Options
@@ -36,7 +113,18 @@ class CcsScraper:
         options.add_argument('--disable-gpu')  # Required for Windows
         options.add_argument('--no-sandbox')  # Less secure but more stable
         options.add_argument('--disable-dev-shm-usage')  # Overcome limited resource issues
-        options.add_argument('--window-size=1920,1080')  # Consistent window size
+        if self.profile == 'lean':
+            options.add_argument(f'--window-size={LEAN_WINDOW_SIZE[0]},{LEAN_WINDOW_SIZE[1]}')
+            options.add_argument('--blink-settings=imagesEnabled=false')  # Don't fetch or decode images
+            options.add_argument('--disable-remote-fonts')
+            options.add_argument('--disable-background-networking')
+            options.add_argument('--disable-sync')
+            options.add_argument('--disable-default-apps')
+            options.add_argument('--no-first-run')
+            options.add_argument('--mute-audio')
+            options.add_experimental_option('prefs', {'profile.managed_default_content_settings.images': 2})
+        else:
+            options.add_argument('--window-size=1920,1080')  # Consistent window size
         options.add_argument('--ignore-certificate-errors')  # Handle SSL issues
         options.add_argument('--disable-extensions')  # Disable extensions for reliability
         options.add_argument('--disable-popup-blocking')  # Allow popups we need
@@ -59,11 +147,29 @@ class CcsScraper:
         self.driver.set_page_load_timeout(60)  # Longer page load timeout
         self.driver.set_script_timeout(60)  # Longer script timeout
         
-        # Maximize window to ensure all elements are visible
-        self.driver.maximize_window()
+        if self.profile == 'lean':
+            self.block_resources()
+        else:
+            # Maximize window to ensure all elements are visible
+            self.driver.maximize_window()
         
         return self.driver
+
+    def block_resources(self):
+        """
+        Block LEAN_BLOCKED_URLS in the current window through the DevTools
+        protocol. The block belongs to the window's DevTools target, so each
+        print preview window gets it on switching (switch_to_preview).
+        """
+        try:
+            self.driver.execute_cdp_cmd('Network.enable', {})
+            self.driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': LEAN_BLOCKED_URLS})
+            return True
+        except Exception as e:
+            logger.warning(f"Could not enable resource blocking: {e}")
+            return False
         
+    @traced('scraper.login')
     def login(self, username, password):
         """Login to CCS system"""
         if not self.driver:
@@ -71,7 +177,7 @@ class CcsScraper:
             
         try:
             logger.info("Navigating to CCS login page")
-            self.driver.get("https://ccs.ual.com/CCS/default.aspx")
+            self.driver.get(f"{self.base_url}/CCS/default.aspx")
             
             # Wait for the login page to load - increase timeout to 20 seconds
             logger.info("Waiting for login elements to appear")
@@ -81,41 +187,10 @@ class CcsScraper:
             self.driver.save_screenshot("login_page.png")
             logger.info("Saved screenshot of login page")
             
-            # Try the original IDs that we verified previously
-            try:
-                logger.info("Looking for username field with ID: ctl01_mHolder_txtUserID")
-                username_field = WebDriverWait(self.driver, 20).until(
-                    EC.presence_of_element_located((By.ID, "ctl01_mHolder_txtUserID"))
-                )
-                
-                logger.info("Looking for password field with ID: ctl01_mHolder_txtGlobalPassword")
-                password_field = WebDriverWait(self.driver, 20).until(
-                    EC.presence_of_element_located((By.ID, "ctl01_mHolder_txtGlobalPassword"))
-                )
-                
-                logger.info("Looking for login button with ID: ctl01_mHolder_loginButton")
-                login_button = WebDriverWait(self.driver, 20).until(
-                    EC.element_to_be_clickable((By.ID, "ctl01_mHolder_loginButton"))
-                )
-            except TimeoutException:
-                # Fall back to looking for alternative IDs
-                logger.warning("Could not find fields by verified IDs, trying alternative selectors")
-                
-                # Take a screenshot showing what we're working with
-                self.driver.save_screenshot("login_page_alt.png")
-                
-                # Try to find elements by more general approaches
-                username_field = WebDriverWait(self.driver, 20).until(
-                    EC.presence_of_element_located((By.XPATH, "//input[@type='text'][contains(@id, 'UserID') or contains(@id, 'Username')]"))
-                )
-                
-                password_field = WebDriverWait(self.driver, 20).until(
-                    EC.presence_of_element_located((By.XPATH, "//input[@type='password'][contains(@id, 'Password')]"))
-                )
-                
-                login_button = WebDriverWait(self.driver, 20).until(
-                    EC.element_to_be_clickable((By.XPATH, "//input[@type='submit' or @type='button'][contains(@id, 'login') or contains(@value, 'Login')]"))
-                )
+            # Verified IDs first, general selectors as fallback, all raced in one wait
+            username_field = self.locators.find(self.driver, 'login.username', timeout=20)
+            password_field = self.locators.find(self.driver, 'login.password', timeout=20)
+            login_button = self.locators.find(self.driver, 'login.submit', timeout=20, clickable=True)
             
             # Enter username and password
             logger.info(f"Entering username: {username}")
@@ -142,6 +217,7 @@ class CcsScraper:
                 )
                 logger.info("Login successful, CCS dashboard loaded")
                 self.logged_in = True
+                self.main_window = self.driver.current_window_handle
                 
                 # Take a screenshot of the dashboard
                 self.driver.save_screenshot("dashboard.png")
@@ -163,6 +239,7 @@ class CcsScraper:
             self.driver.save_screenshot("login_exception.png")
             return False
     
+    @traced('scraper.navigate_to_my_schedule')
     def navigate_to_my_schedule(self):
         """Navigate to My Schedule page"""
         if not self.logged_in:
@@ -181,33 +258,8 @@ class CcsScraper:
             # Take a screenshot before looking for the link
             self.driver.save_screenshot("before_my_schedule_click.png")
             
-            # Try to find the My Schedule link using various strategies
-            try:
-                # First strategy: Look for the exact link based on user's screenshot
-                schedule_link = WebDriverWait(self.driver, 15).until(
-                    EC.element_to_be_clickable((By.XPATH, "//a[contains(text(), 'My Schedule')][contains(@class, 'quick-link') or ancestor::div[contains(@class, 'quick-link')]]"))
-                )
-                logger.info("Found My Schedule in Quick Links")
-            except TimeoutException:
-                # Second strategy: Try more general link selectors
-                try:
-                    schedule_link = WebDriverWait(self.driver, 15).until(
-                        EC.element_to_be_clickable((By.XPATH, "//a[contains(text(), 'My Schedule')]"))
-                    )
-                    logger.info("Found My Schedule link by text")
-                except TimeoutException:
-                    # Third strategy: Try by href attribute
-                    try:
-                        schedule_link = WebDriverWait(self.driver, 15).until(
-                            EC.element_to_be_clickable((By.XPATH, "//a[contains(@href, 'schedule') or contains(@href, 'Schedule')]"))
-                        )
-                        logger.info("Found My Schedule link by href")
-                    except TimeoutException:
-                        # Final attempt: Look for any links with nav items
-                        schedule_link = WebDriverWait(self.driver, 15).until(
-                            EC.element_to_be_clickable((By.CSS_SELECTOR, ".nav-item a, .sidebar a, .menu a"))
-                        )
-                        logger.info("Found a navigation link, attempting to use it")
+            # Quick link, link text, href and nav menu strategies, raced in one wait
+            schedule_link = self.locators.find(self.driver, 'my_schedule.link', timeout=15, clickable=True)
             
             # Click the link
             logger.info("Clicking My Schedule link")
@@ -227,6 +279,7 @@ class CcsScraper:
                 return True
             except TimeoutException:
                 logger.error("My Schedule page didn't load properly")
+                self.locators.forget('my_schedule.link')
                 self.driver.save_screenshot("my_schedule_failure.png")
                 return False
                 
@@ -235,8 +288,66 @@ class CcsScraper:
             self.driver.save_screenshot("my_schedule_exception.png")
             return False
     
-    def open_print_dialog(self):
-        """Open the print dialog and select all options"""
+    def current_month(self):
+        """(year, month) shown on the My Schedule page, or None when it can't be read."""
+        for element in self.driver.find_elements(By.XPATH, MONTH_LABEL_XPATH):
+            match = MONTH_LABEL_RE.search(element.text or '')
+            if match:
+                try:
+                    return int(match.group(2)), month_number(match.group(1))
+                except ValueError:
+                    continue
+        return None
+
+    @traced('scraper.navigate_to_month')
+    def navigate_to_month(self, year, month, timeout=20):
+        """Step the My Schedule page to year/month with its previous/next month controls."""
+        shown = self.current_month()
+        if shown is None:
+            logger.error("Could not read the month shown on My Schedule")
+            return False
+
+        while shown != (year, month):
+            forward = (year, month) > shown
+            logger.info(f"Moving {'forward' if forward else 'back'} from {shown[1]}/{shown[0]} towards {month}/{year}")
+            try:
+                button = WebDriverWait(self.driver, timeout).until(
+                    EC.element_to_be_clickable((By.XPATH, NEXT_MONTH_XPATH if forward else PREV_MONTH_XPATH))
+                )
+                button.click()
+                previous = shown
+                WebDriverWait(self.driver, timeout).until(lambda driver: self.current_month() not in (None, previous))
+            except TimeoutException:
+                logger.error(f"Month navigation towards {month}/{year} timed out")
+                self.driver.save_screenshot("month_navigation_failure.png")
+                return False
+            shown = self.current_month()
+        return True
+
+    def return_to_main_window(self):
+        """Close any print preview windows and switch back to the authenticated main window."""
+        if not self.main_window:
+            return False
+        try:
+            for handle in self.driver.window_handles:
+                if handle != self.main_window:
+                    self.driver.switch_to.window(handle)
+                    self.driver.close()
+            self.driver.switch_to.window(self.main_window)
+            return True
+        except Exception as e:
+            logger.error(f"Error returning to the main window: {e}")
+            return False
+
+    @traced('scraper.open_print_dialog')
+    def open_print_dialog(self, wait_for_preview=True):
+        """Open the print dialog and select all options
+
+        With wait_for_preview=True it also waits for the print preview and
+        saves its HTML with save_print_html(); with wait_for_preview=False it
+        returns as soon as the print is submitted, leaving the preview window
+        to the caller.
+        """
         try:
             # First take a screenshot of the page where we're looking for the print button
             self.driver.save_screenshot("before_print.png")
@@ -246,32 +357,7 @@ class CcsScraper:
             # <a placement="bottom" container="body"><i aria-hidden="true" class="icon-PrintSVG"></i>Print</a>
             logger.info("Looking for print button using exact user-provided HTML structure")
             
-            try:
-                # Strategy 1: Find by the exact structure with class "icon-PrintSVG"
-                print_button = WebDriverWait(self.driver, 15).until(
-                    EC.element_to_be_clickable((By.XPATH, "//a[.//i[contains(@class, 'icon-PrintSVG')] and contains(text(), 'Print')]"))
-                )
-                logger.info("Found print button by exact user-provided structure")
-            except TimeoutException:
-                try:
-                    # Strategy 2: Find by icon class alone
-                    print_button = WebDriverWait(self.driver, 15).until(
-                        EC.element_to_be_clickable((By.XPATH, "//i[contains(@class, 'icon-PrintSVG')]/parent::a"))
-                    )
-                    logger.info("Found print button by icon class")
-                except TimeoutException:
-                    try:
-                        # Strategy 3: Find by link with Print text
-                        print_button = WebDriverWait(self.driver, 15).until(
-                            EC.element_to_be_clickable((By.XPATH, "//a[contains(text(), 'Print')]"))
-                        )
-                        logger.info("Found print button by text")
-                    except TimeoutException:
-                        # Strategy 4: Most generic approach
-                        print_button = WebDriverWait(self.driver, 15).until(
-                            EC.element_to_be_clickable((By.XPATH, "//*[contains(@class, 'print') or contains(text(), 'Print')]"))
-                        )
-                        logger.info("Found print button by generic selector")
+            print_button = self.locators.find(self.driver, 'print.open', timeout=15, clickable=True)
             
             # Take a screenshot showing the located print button
             self.driver.save_screenshot("found_print_button.png")
@@ -296,9 +382,14 @@ class CcsScraper:
             except TimeoutException:
                 logger.warning("Could not find print options dialog by title, trying alternatives")
                 # Try to detect by presence of checkboxes
-                WebDriverWait(self.driver, 10).until(
-                    EC.presence_of_element_located((By.XPATH, "//input[@type='checkbox']"))
-                )
+                try:
+                    WebDriverWait(self.driver, 10).until(
+                        EC.presence_of_element_located((By.XPATH, "//input[@type='checkbox']"))
+                    )
+                except TimeoutException:
+                    # The element clicked as the print button did not open the dialog
+                    self.locators.forget('print.open')
+                    raise
                 logger.info("Detected print dialog by checkboxes")
             
             # Take a screenshot of the print dialog
@@ -482,116 +573,33 @@ class CcsScraper:
             
             # Click the print button in the dialog - based on user's screenshot showing gold/orange button
             logger.info("Looking for print/submit button in dialog")
-            try:
-                # Based on user's screenshot - gold/orange button with text "Print"
-                print_submit = WebDriverWait(self.driver, 10).until(
-                    EC.element_to_be_clickable((By.XPATH, "//button[text()='Print']"))
-                )
-                logger.info("Found exact Print button from screenshot")
-            except TimeoutException:
-                try:
-                    # Try by button text with more flexible matching
-                    print_submit = WebDriverWait(self.driver, 10).until(
-                        EC.element_to_be_clickable((By.XPATH, "//button[contains(text(), 'Print')] | //input[@type='button'][@value='Print'] | //input[@type='submit'][@value='Print']"))
-                    )
-                    logger.info("Found print button by text")
-                except TimeoutException:
-                    try:
-                        # Try by gold/orange color or common print button classes
-                        print_submit = WebDriverWait(self.driver, 10).until(
-                            EC.element_to_be_clickable((By.CSS_SELECTOR, ".btn-primary, .btn-print, .print-btn, .gold-btn, .orange-btn"))
-                        )
-                        logger.info("Found print button by class/color")
-                    except TimeoutException:
-                        # Last resort - try any button that's not Cancel
-                        print_submit = WebDriverWait(self.driver, 10).until(
-                            EC.element_to_be_clickable((By.XPATH, "//button[not(contains(text(), 'Cancel'))]"))
-                        )
-                        logger.info("Found non-cancel button (assuming print submit)")
+            # Based on user's screenshot - gold/orange button with text "Print"
+            print_submit = self.locators.find(self.driver, 'print.submit', timeout=10, clickable=True)
             
             # Click the print/submit button
             logger.info("Clicking print/submit button")
+            windows_before = set(self.driver.window_handles)
             print_submit.click()
-            
-            # Wait for print preview to load (could be new tab/window)
-            logger.info("Waiting for print preview to load")
-            self.driver.save_screenshot("after_print_button_click.png")
-            
-            # Wait longer for potential dialog or popup to appear
-            time.sleep(5)
-            
-            # Check if new window/tab opened
-            try:
-                original_window = self.driver.current_window_handle
-                all_windows = self.driver.window_handles
-                
-                # If new window opened, switch to it
-                if len(all_windows) > 1:
-                    logger.info(f"Detected {len(all_windows)} windows/tabs, switching to print preview")
-                    for window in all_windows:
-                        if window != original_window:
-                            self.driver.switch_to.window(window)
-                            logger.info(f"Switched to new window/tab: {self.driver.current_url}")
-                            
-                            # Take screenshot of new window
-                            self.driver.save_screenshot("print_preview_new_window.png")
-                            break
-                else:
-                    # No new window, check if we're still on the same page
-                    logger.info("No new window detected, checking for changes in current page")
-                    self.driver.save_screenshot("still_on_same_page.png")
-                    
-                    # Check if we need to handle a browser print dialog that might be blocking
-                    logger.info("Sending Escape key to dismiss any browser print dialogs")
-                    from selenium.webdriver.common.keys import Keys
-                    from selenium.webdriver.common.action_chains import ActionChains
-                    
-                    # Try to send Escape key to dismiss any native print dialog
-                    try:
-                        ActionChains(self.driver).send_keys(Keys.ESCAPE).perform()
-                        time.sleep(2)
-                        self.driver.save_screenshot("after_escape_key.png")
-                    except Exception as e:
-                        logger.warning(f"Failed to send Escape key: {e}")
-            except Exception as e:
-                logger.warning(f"Error handling windows: {e}")
-                self.driver.save_screenshot("window_handling_error.png")
-            
-            # Wait for print preview content to fully load
-            logger.info("Waiting for print preview content to load")
-            try:
-                # Wait for any indicators that print preview is fully loaded
-                WebDriverWait(self.driver, 15).until(
-                    EC.presence_of_element_located((By.XPATH, "//table | //div[contains(@class, 'print')] | //div[contains(@class, 'crew')]"))
-                )
-                logger.info("Print preview content detected")
-            except TimeoutException:
-                logger.warning("Could not detect specific print preview content, continuing anyway")
-            
-            # Take screenshot of the print preview
-            self.driver.save_screenshot("print_preview_loaded.png")
-            
-            # Extract the HTML content from the print preview
-            logger.info("Extracting HTML from print preview")
-            html_content = self.driver.page_source
-            
-            # Save the HTML to a file for parsing
-            output_dir = "output"
-            os.makedirs(output_dir, exist_ok=True)
-            output_file = os.path.join(output_dir, f"schedule_printview_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html")
-            
-            with open(output_file, "w", encoding="utf-8") as f:
-                f.write(html_content)
-            
-            logger.info(f"Saved print preview HTML to {output_file}")
-            
-            # Return success
+
+            if not wait_for_preview:
+                return True
+
+            # Same window handling, resource blocking and file naming as get_detailed_schedule
+            self._step_preview({'windows_before': windows_before})
+            self.save_print_html(self.driver.page_source)
             return True
-            
+
         except Exception as e:
             logger.error(f"Failed to open print dialog: {str(e)}")
             return False
     
+    def switch_to_preview(self, handle):
+        """Switch to a print preview window, blocking LEAN_BLOCKED_URLS there under the lean profile."""
+        self.driver.switch_to.window(handle)
+        if self.profile == 'lean':
+            self.block_resources()
+
+    @traced('scraper.handle_print_preview_window')
     def handle_print_preview_window(self):
         """Handle switching to print preview window/tab if needed"""
         try:
@@ -614,6 +622,20 @@ class CcsScraper:
             logger.error(f"Error handling print preview window: {e}")
             return False
             
+    def save_print_html(self, html_content, suffix=''):
+        """Save print preview HTML under output/ and return the file path."""
+        timestamp = time.strftime("%Y%m%d_%H%M%S")
+        output_dir = "output"
+        os.makedirs(output_dir, exist_ok=True)
+
+        output_file = os.path.join(output_dir, f"schedule_printview_{timestamp}{suffix}.html")
+        with open(output_file, "w", encoding="utf-8") as f:
+            f.write(html_content)
+
+        logger.info(f"Saved print preview HTML to {output_file}")
+        return output_file
+
+    @traced('scraper.get_print_html')
     def get_print_html(self):
         """Extract the HTML from the print preview"""
         try:
@@ -622,18 +644,7 @@ class CcsScraper:
             
             # Get the HTML content
             html_content = self.driver.page_source
-            
-            # Save to a file with timestamp
-            timestamp = time.strftime("%Y%m%d_%H%M%S")
-            output_dir = "output"
-            os.makedirs(output_dir, exist_ok=True)
-            
-            output_file = os.path.join(output_dir, f"schedule_printview_{timestamp}.html")
-            
-            with open(output_file, "w", encoding="utf-8") as f:
-                f.write(html_content)
-                
-            logger.info(f"Saved print preview HTML to {output_file}")
+            output_file = self.save_print_html(html_content)
             
             # Return the HTML content and file path
             return html_content, output_file
@@ -642,45 +653,288 @@ class CcsScraper:
             logger.error(f"Error extracting print HTML: {e}")
             return None, None
     
-    def get_detailed_schedule(self, username, password, debug=False, pause_after_login=0):
-        """Main method to retrieve the detailed schedule"""
-        self.debug = debug
-        
+    @traced('scraper.extract_print_view')
+    def extract_print_view(self, timeout=30):
+        """
+        Read the print preview in the browser: a script walks the pairing
+        tables of the live DOM and returns only their cell texts, which are
+        built into records here. Returns a ParsedSchedule, or None on failure.
+        """
         try:
-            # Setup and login
-            if not self.login(username, password):
-                logger.error("Login failed, cannot retrieve schedule")
-                return None
-                
-            # Pause after login if requested (for debugging)
-            if pause_after_login > 0:
-                logger.info(f"Pausing for {pause_after_login} seconds after login (debug mode)")
-                time.sleep(pause_after_login)
-                
-            # Navigate to My Schedule
-            if not self.navigate_to_my_schedule():
-                logger.error("Failed to navigate to My Schedule page")
-                return None
-                
-            # Open print dialog and get HTML
-            if not self.open_print_dialog():
-                logger.error("Failed to open print dialog")
-                return None
-                
-            # Extract the HTML from the print preview
-            html_content, file_path = self.get_print_html()
-            
-            if not html_content:
-                logger.error("Failed to extract HTML from print preview")
-                return None
-                
-            logger.info("Successfully retrieved detailed schedule")
-            return file_path
-            
+            WebDriverWait(self.driver, timeout).until(lambda driver: driver.execute_script(PREVIEW_READY_SCRIPT))
+            return parse_print_view_json(self.driver.execute_script(PRINT_VIEW_EXTRACT_SCRIPT))
         except Exception as e:
-            logger.error(f"Error retrieving detailed schedule: {e}")
+            logger.error(f"Error extracting print view from the DOM: {e}")
             return None
-        
+
+    def save_print_json(self, schedule):
+        """Save an extracted schedule as JSON under output/ and return the file path."""
+        timestamp = time.strftime("%Y%m%d_%H%M%S")
+        output_dir = "output"
+        os.makedirs(output_dir, exist_ok=True)
+
+        output_file = os.path.join(output_dir, f"schedule_printview_{timestamp}.json")
+        with open(output_file, "wb") as f:
+            f.write(schedule.to_json())
+
+        logger.info(f"Saved extracted print view to {output_file}")
+        return output_file
+
+    def session_alive(self):
+        """True while the browser session still answers."""
+        if not self.driver:
+            return False
+        try:
+            self.driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def _build_steps(self):
+        """The checkpointed steps of get_detailed_schedule."""
+        return StepMachine([
+            Step('login', self._step_login, SCRAPE_POLICIES['login'], reset=self._reset_session),
+            Step('my_schedule', self._step_my_schedule, SCRAPE_POLICIES['my_schedule']),
+            Step('print_dialog', self._step_print_dialog, SCRAPE_POLICIES['print_dialog'], checkpoint=False),
+            Step('preview', self._step_preview, SCRAPE_POLICIES['preview'], checkpoint=False),
+            Step('extract', self._step_extract, SCRAPE_POLICIES['extract'], checkpoint=False),
+        ], name='scraper')
+
+    def _reset_session(self, context):
+        # Rewinding to login means the session itself is suspect; start it over
+        self.logged_in = False
+        if self.session_alive():
+            self.driver.delete_all_cookies()
+        else:
+            self.close()
+
+    def _step_login(self, context):
+        if self.logged_in and self.session_alive():
+            return True
+        if self.driver and not self.session_alive():
+            logger.warning("Browser session was lost, starting a new one")
+            self.close()
+        if not self.login(context['username'], context['password']):
+            return False
+        if context.get('pause_after_login'):
+            logger.info(f"Pausing for {context['pause_after_login']} seconds after login (debug mode)")
+            time.sleep(context['pause_after_login'])
+        return True
+
+    def _show_month(self, context):
+        # My Schedule opens on its default month; steps that print or read the
+        # grid move it back to the requested one, also after a rewind
+        if context.get('year') and context.get('month'):
+            return self.navigate_to_month(context['year'], context['month'])
+        return True
+
+    def _step_my_schedule(self, context):
+        self.return_to_main_window()
+        return self.navigate_to_my_schedule() and self._show_month(context)
+
+    def _step_print_dialog(self, context):
+        # Start from My Schedule without any preview window left by an earlier attempt
+        self.return_to_main_window()
+        if not self._show_month(context):
+            return False
+        context['windows_before'] = set(self.driver.window_handles)
+        return self.open_print_dialog(wait_for_preview=False)
+
+    def _step_preview(self, context, timeout=30):
+        before = context.get('windows_before', set())
+        try:
+            WebDriverWait(self.driver, 15).until(lambda driver: set(driver.window_handles) - before)
+            self.switch_to_preview((set(self.driver.window_handles) - before).pop())
+        except TimeoutException:
+            # Some CCS versions render the preview in the same window
+            logger.info("No new window for the print preview, waiting in the current one")
+        try:
+            WebDriverWait(self.driver, timeout).until(lambda driver: driver.execute_script(PREVIEW_READY_SCRIPT))
+        except TimeoutException:
+            # The element clicked as the dialog's print button did not print
+            self.locators.forget('print.submit')
+            raise
+        logger.info(f"Print preview ready at {self.driver.current_url}")
+        return True
+
+    def _step_extract(self, context):
+        if context.get('extract') == 'dom':
+            schedule = self.extract_print_view()
+            if schedule is None:
+                return False
+            logger.info(f"Extracted {len(schedule.pairings)} pairings from print preview")
+            self.last_schedule = schedule
+            return self.save_print_json(schedule)
+        return self.save_print_html(self.driver.page_source)
+
+    @traced('scraper.get_master_schedule')
+    def get_master_schedule(self, username, password, year=None, month=None, timeout=20):
+        """
+        Return the page source of the My Schedule grid (the master schedule,
+        `sg-data-row` rows) for the given month, or the current one. This only
+        runs the login and My Schedule steps; a get_detailed_schedule call
+        afterwards resumes from there and prints the same month.
+        """
+        if self.steps is None:
+            self.steps = self._build_steps()
+        context = {'username': username, 'password': password, 'year': year, 'month': month}
+        if not self.steps.run(context, resume=self.session_alive(), stop_after='my_schedule'):
+            logger.error("Could not open My Schedule for the master schedule")
+            return None
+        try:
+            WebDriverWait(self.driver, timeout).until(
+                EC.presence_of_element_located((By.XPATH, MASTER_SCHEDULE_READY_XPATH))
+            )
+        except TimeoutException:
+            logger.error("Master schedule grid did not load")
+            return None
+        return self.driver.page_source
+
+    @traced('scraper.get_detailed_schedule')
+    def get_detailed_schedule(self, username, password, debug=False, pause_after_login=0, extract='html', resume=True,
+                              year=None, month=None):
+        """
+        Main method to retrieve the detailed schedule. With extract='html' the
+        print preview's page source is saved; with extract='dom' the schedule is
+        extracted in the browser and saved as JSON. Returns the saved file path,
+        or None when a step failed after its retries. year/month select the
+        month to print (default: the month My Schedule shows), also when a
+        failing step rewinds to My Schedule.
+
+        Runs as checkpointed steps (see SCRAPE_POLICIES). Calling it again on
+        the same scraper resumes after the last checkpoint (login or My
+        Schedule) while the session is alive, unless resume=False.
+        """
+        self.debug = debug
+        if self.steps is None:
+            self.steps = self._build_steps()
+        context = {'username': username, 'password': password,
+                   'pause_after_login': pause_after_login, 'extract': extract, 'year': year, 'month': month}
+        file_path = self.steps.run(context, resume=resume and self.session_alive())
+        logger.info(f"Scrape steps:\n{self.steps.summary()}")
+        if file_path:
+            logger.info("Successfully retrieved detailed schedule")
+        else:
+            logger.error("Failed to retrieve detailed schedule")
+        return file_path
+
+    @traced('scraper.iter_monthly_schedules')
+    def iter_monthly_schedules(self, username, password, months):
+        """
+        Yield (year, month, html_content, file_path) for each (year, month) in
+        `months`, logging in and opening My Schedule only once.
+
+        Stops early when login, navigation or month navigation fails; a month
+        whose print view fails is logged and skipped.
+        """
+        if not self.login(username, password):
+            logger.error("Login failed, cannot retrieve schedules")
+            return
+        if not self.navigate_to_my_schedule():
+            logger.error("Failed to navigate to My Schedule page")
+            return
+
+        for year, month in months:
+            if not self.navigate_to_month(year, month):
+                return
+            context = {'windows_before': set(self.driver.window_handles)}
+            if not self.open_print_dialog(wait_for_preview=False):
+                logger.error(f"Failed to open print dialog for {month}/{year}")
+                self.return_to_main_window()
+                continue
+            try:
+                self._step_preview(context)
+            except TimeoutException:
+                logger.error(f"Print preview for {month}/{year} did not load")
+                self.return_to_main_window()
+                continue
+            html_content = self.driver.page_source
+            file_path = self.save_print_html(html_content, f"_{year:04d}-{month:02d}")
+            # Back to My Schedule for the next month, in the same session
+            self.return_to_main_window()
+            logger.info(f"Retrieved print view for {month}/{year}")
+            yield year, month, html_content, file_path
+
+    @traced('scraper.iter_monthly_schedules_parallel')
+    def iter_monthly_schedules_parallel(self, username, password, months, max_windows=3,
+                                        preview_timeout=90, poll_interval=0.5):
+        """
+        Like iter_monthly_schedules, but keeps up to `max_windows` print
+        previews loading at once. Prints are submitted from the main window,
+        one month after another. The open preview windows are then polled in
+        turn, and each month is yielded as soon as its preview is ready, so
+        months may arrive out of order.
+        """
+        if not self.login(username, password):
+            logger.error("Login failed, cannot retrieve schedules")
+            return
+        if not self.navigate_to_my_schedule():
+            logger.error("Failed to navigate to My Schedule page")
+            return
+
+        queue = list(months)
+        pending = {}  # preview window handle -> (year, month, submitted at)
+        try:
+            while queue or pending:
+                # Submit prints until the window budget is used
+                while queue and len(pending) < max_windows:
+                    year, month = queue.pop(0)
+                    self.driver.switch_to.window(self.main_window)
+                    if not self.navigate_to_month(year, month):
+                        queue.clear()
+                        break
+                    before = set(self.driver.window_handles)
+                    if not self.open_print_dialog(wait_for_preview=False):
+                        logger.error(f"Failed to open print dialog for {month}/{year}")
+                        continue
+                    try:
+                        WebDriverWait(self.driver, 15).until(lambda driver: set(driver.window_handles) - before)
+                    except TimeoutException:
+                        logger.error(f"No print preview window opened for {month}/{year}")
+                        continue
+                    handle = (set(self.driver.window_handles) - before).pop()
+                    self.switch_to_preview(handle)
+                    pending[handle] = (year, month, time.monotonic())
+                    logger.info(f"Print view for {month}/{year} loading in window {handle}")
+
+                # Collect whichever previews are ready
+                for handle, (year, month, submitted) in list(pending.items()):
+                    try:
+                        self.driver.switch_to.window(handle)
+                        ready = self.driver.execute_script(PREVIEW_READY_SCRIPT)
+                    except Exception as e:
+                        logger.error(f"Print preview window for {month}/{year} was lost: {e}")
+                        pending.pop(handle)
+                        continue
+                    if ready:
+                        html_content = self.driver.page_source
+                        file_path = self.save_print_html(html_content, f"_{year:04d}-{month:02d}")
+                        self.driver.close()
+                        pending.pop(handle)
+                        logger.info(f"Retrieved print view for {month}/{year}")
+                        yield year, month, html_content, file_path
+                    elif time.monotonic() - submitted > preview_timeout:
+                        logger.error(f"Print preview for {month}/{year} did not load within {preview_timeout}s")
+                        self.driver.close()
+                        pending.pop(handle)
+                if pending:
+                    time.sleep(poll_interval)
+        finally:
+            # Also runs when the consumer stops early: close the previews still loading
+            self.return_to_main_window()
+
+    def get_schedule_range(self, username, password, start_year, start_month, count, max_windows=1):
+        """
+        Stream `count` consecutive months from one session: an iterator of
+        (year, month, html, path), each yielded as soon as its print view is
+        saved. Months come in order; max_windows > 1 loads that many print
+        previews in parallel, and they then come in the order they finish.
+        """
+        months = months_from(start_year, start_month, count)
+        if max_windows > 1:
+            return self.iter_monthly_schedules_parallel(username, password, months, max_windows=max_windows)
+        return self.iter_monthly_schedules(username, password, months)
+
     def close(self):
         """Close the browser"""
         if self.driver:
@@ -689,3 +943,6 @@ class CcsScraper:
                 logger.info("Browser closed")
             except Exception as e:
                 logger.error(f"Error closing browser: {e}")
+            self.driver = None
+        self.logged_in = False
+        self.main_window = None
@@ -3,9 +3,8 @@
 import os
 import json
 import logging
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import Flow
-from googleapiclient.discovery import build
+
+from instrumentation import upstream_call
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -17,9 +16,14 @@ SCOPES = ['https://www.googleapis.com/auth/calendar', 'https://www.googleapis.co
 API_SERVICE_NAME = 'calendar'
 API_VERSION = 'v3'
 REDIRECT_URI = 'http://localhost:5001/api/google-callback' # Should match your setup
+API_ENDPOINT = os.environ.get('GOOGLE_API_ENDPOINT') # Optional override, e.g. a local stand-in for benchmarks
+
+# The Google client libraries take a long time to import, so they are
+# imported on first use rather than when the API modules load.
 
 def get_google_auth_url():
     """Get the Google authentication URL for the user to visit."""
+    from google_auth_oauthlib.flow import Flow
     try:
         flow = Flow.from_client_secrets_file(
             CLIENT_SECRETS_FILE,
@@ -37,33 +41,41 @@ def get_google_auth_url():
 
 def get_credentials_from_code(code):
     """Exchange an authorization code for credentials."""
+    from google_auth_oauthlib.flow import Flow
     flow = Flow.from_client_secrets_file(
         CLIENT_SECRETS_FILE,
         scopes=SCOPES,
         redirect_uri=REDIRECT_URI
     )
-    flow.fetch_token(code=code)
+    with upstream_call('google', 'oauth.fetch_token'):
+        flow.fetch_token(code=code)
     return flow.credentials
 
 def create_google_calendar_service(credentials):
     """Create a Google Calendar service object from credentials."""
+    from google.oauth2.credentials import Credentials
+    from googleapiclient.discovery import build
     # If credentials are a dict, convert them back to a Credentials object
     if isinstance(credentials, dict):
         credentials = Credentials(**credentials)
     
-    service = build(API_SERVICE_NAME, API_VERSION, credentials=credentials)
+    client_options = {'api_endpoint': API_ENDPOINT} if API_ENDPOINT else None
+    service = build(API_SERVICE_NAME, API_VERSION, credentials=credentials, client_options=client_options)
     return service
 
 def get_user_info(service):
     """Get user's email address from the service object."""
+    from googleapiclient.discovery import build
     user_info_service = build('oauth2', 'v2', credentials=service._credentials)
-    user_info = user_info_service.userinfo().get().execute()
+    with upstream_call('google', 'userinfo.get'):
+        user_info = user_info_service.userinfo().get().execute()
     return user_info
 
 def add_events_to_calendar(service, pairings):
     """Adds a list of pairing events to the user's 'CCS Hyper' calendar."""
     # Find or create the 'CCS Hyper' calendar
-    calendar_list = service.calendarList().list().execute()
+    with upstream_call('google', 'calendarList.list'):
+        calendar_list = service.calendarList().list().execute()
     ccs_calendar_id = None
     for calendar_entry in calendar_list.get('items', []):
         if calendar_entry['summary'] == 'CCS Hyper':
@@ -72,7 +84,8 @@ def add_events_to_calendar(service, pairings):
     
     if not ccs_calendar_id:
         new_calendar = {'summary': 'CCS Hyper', 'timeZone': 'America/New_York'}
-        created_calendar = service.calendars().insert(body=new_calendar).execute()
+        with upstream_call('google', 'calendars.insert'):
+            created_calendar = service.calendars().insert(body=new_calendar).execute()
         ccs_calendar_id = created_calendar['id']
         logger.info("Created 'CCS Hyper' calendar")
 
@@ -95,7 +108,8 @@ def add_events_to_calendar(service, pairings):
             },
             'reminders': {'useDefault': False},
         }
-        service.events().insert(calendarId=ccs_calendar_id, body=event).execute()
+        with upstream_call('google', 'events.insert'):
+            service.events().insert(calendarId=ccs_calendar_id, body=event).execute()
         count += 1
     
     logger.info(f"Successfully added {count} trips to the calendar")
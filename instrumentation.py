@@ -0,0 +1,378 @@
+"""
+Request tracing and hot-path timing for CCS Hyper.
+Provides spans for timing parsing, Supabase calls, Google API calls and
+scraper steps, a small in-process metrics registry rendered in the
+Prometheus text format at /metrics, and optional export of finished traces
+to a local Zipkin-compatible collector.
+
+Usage:
+    from instrumentation import span, traced, upstream_call
+
+    with span('parse.print_view'):
+        ...
+    with upstream_call('supabase', 'pairings.upsert'):
+        query.execute()
+
+    init_app(app)  # adds per-request spans and the /metrics endpoint
+"""
+
+import os
+import time
+import queue
+import random
+import logging
+import functools
+import threading
+import contextvars
+from contextlib import contextmanager
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+# Zipkin v2 JSON endpoint, e.g. http://localhost:9411/api/v2/spans (unset disables export)
+TRACE_EXPORT_URL = os.environ.get('TRACE_EXPORT_URL')
+TRACE_SERVICE_NAME = os.environ.get('TRACE_SERVICE_NAME', 'ccs-hyper')
+TRACE_SAMPLE_RATE = float(os.environ.get('TRACE_SAMPLE_RATE', '1.0'))
+EXPORT_QUEUE_SIZE = 1000  # finished traces waiting for export; more are dropped
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    labels = list(labels)
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels) + '}'
+
+
+class Counter:
+    """Monotonic counter with a fixed set of label names."""
+
+    kind = 'counter'
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            return self._values.get(key, 0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(zip(self.labelnames, key))} {value}")
+        return lines
+
+
+class Gauge(Counter):
+    """Value that can go up and down, e.g. a resource reading; label sets can be removed."""
+
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = value
+
+    def remove(self, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            self._values.pop(key, None)
+
+
+class Histogram:
+    """Cumulative-bucket histogram with a fixed set of label names."""
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    series[i] += 1
+            series[-2] += seconds
+            series[-1] += 1
+
+    def count(self, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            return series[-1] if series else 0
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._series.items())
+        for key, series in items:
+            labels = list(zip(self.labelnames, key))
+            for bound, cumulative in zip(self.buckets, series):
+                lines.append(f"{self.name}_bucket{_format_labels(labels + [('le', bound)])} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(labels + [('le', '+Inf')])} {series[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {series[-2]:.6f}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {series[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds the process's metrics and renders them for scraping."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name, help_text, labelnames=()):
+        return self._register(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def render(self):
+        with self._lock:
+            metrics = [self._metrics[name] for name in sorted(self._metrics)]
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+SPAN_DURATION = registry.histogram(
+    'ccs_span_duration_seconds', 'Duration of instrumented spans.', ('span', 'status'))
+UPSTREAM_CALLS = registry.counter(
+    'ccs_upstream_calls_total', 'Calls to upstream services.', ('service', 'operation', 'status'))
+UPSTREAM_DURATION = registry.histogram(
+    'ccs_upstream_duration_seconds', 'Latency of calls to upstream services.', ('service', 'operation'))
+HTTP_REQUESTS = registry.counter(
+    'ccs_http_requests_total', 'HTTP requests handled.', ('method', 'endpoint', 'status'))
+HTTP_DURATION = registry.histogram(
+    'ccs_http_request_duration_seconds', 'HTTP request latency.', ('method', 'endpoint'))
+
+
+# --- Tracing ---
+
+_current_span = contextvars.ContextVar('ccs_current_span', default=None)
+
+
+def _new_id(bits=64):
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+
+class Span:
+    """One timed operation; spans started while it is active become its children."""
+
+    def __init__(self, name, parent=None, tags=None, kind=None):
+        self.name = name
+        self.kind = kind
+        self.tags = dict(tags or {})
+        self.parent = parent
+        self.trace = parent.trace if parent else _Trace()
+        self.span_id = _new_id()
+        self.timestamp = time.time()
+        self.started = time.perf_counter()
+        self.duration = None
+        self.status = 'ok'
+
+    def set_tag(self, key, value):
+        self.tags[key] = value
+
+    def finish(self):
+        self.duration = time.perf_counter() - self.started
+        self.trace.finished.append(self)
+        return self.duration
+
+    def to_zipkin(self):
+        span = {
+            'traceId': self.trace.trace_id,
+            'id': self.span_id,
+            'name': self.name,
+            'timestamp': int(self.timestamp * 1_000_000),
+            'duration': max(1, int((self.duration or 0) * 1_000_000)),
+            'localEndpoint': {'serviceName': TRACE_SERVICE_NAME},
+            'tags': {key: str(value) for key, value in self.tags.items()},
+        }
+        if self.parent:
+            span['parentId'] = self.parent.span_id
+        if self.kind:
+            span['kind'] = self.kind
+        return span
+
+
+class _Trace:
+    def __init__(self):
+        self.trace_id = _new_id(128)
+        self.sampled = bool(TRACE_EXPORT_URL) and random.random() < TRACE_SAMPLE_RATE
+        self.finished = []
+
+
+def current_span():
+    """The innermost active span, or None."""
+    return _current_span.get()
+
+
+@contextmanager
+def span(name, kind=None, **tags):
+    """Time a block as a span (nested under the active span) and record its duration."""
+    parent = _current_span.get()
+    active = Span(name, parent, tags, kind)
+    token = _current_span.set(active)
+    try:
+        yield active
+    except BaseException as e:
+        active.status = 'error'
+        active.set_tag('error', type(e).__name__)
+        raise
+    finally:
+        _current_span.reset(token)
+        SPAN_DURATION.observe(active.finish(), span=name, status=active.status)
+        if parent is None and active.trace.sampled:
+            exporter.submit(active.trace)
+
+
+def traced(name):
+    """Decorator form of span()."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def upstream_call(service, operation):
+    """Span around one call to an upstream service, counted and timed per operation."""
+    status = 'ok'
+    started = time.perf_counter()
+    try:
+        with span(f"{service}.{operation}", kind='CLIENT', service=service) as active:
+            yield active
+    except BaseException:
+        status = 'error'
+        raise
+    finally:
+        UPSTREAM_DURATION.observe(time.perf_counter() - started, service=service, operation=operation)
+        UPSTREAM_CALLS.inc(service=service, operation=operation, status=status)
+
+
+class TraceExporter:
+    """Posts finished traces to a Zipkin-compatible collector from a background thread."""
+
+    def __init__(self, url=None, queue_size=EXPORT_QUEUE_SIZE, timeout=2.0):
+        self.url = url
+        self.timeout = timeout
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, trace):
+        if not self.url:
+            return
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            # Export must never slow down or fail a request
+            self.dropped += 1
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='trace-exporter', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        import requests
+        session = requests.Session()
+        while True:
+            traces = [self._queue.get()]
+            while len(traces) < 50:
+                try:
+                    traces.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            spans = [s.to_zipkin() for trace in traces for s in trace.finished]
+            try:
+                session.post(self.url, json=spans, timeout=self.timeout)
+            except Exception as e:
+                logger.warning(f"Trace export to {self.url} failed: {e}")
+
+
+exporter = TraceExporter(TRACE_EXPORT_URL)
+
+
+# --- Flask integration ---
+
+def init_app(app):
+    """Trace every request of `app` and serve the metrics registry at /metrics."""
+    from flask import Response, g, request
+
+    @app.before_request
+    def _start_request_span():
+        g._ccs_request_started = time.perf_counter()
+        g._ccs_request_span = span('http.request', kind='SERVER', method=request.method, path=request.path)
+        g._ccs_request_span.__enter__()
+
+    @app.after_request
+    def _record_request(response):
+        started = g.pop('_ccs_request_started', None)
+        if started is not None:
+            endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+            HTTP_DURATION.observe(time.perf_counter() - started, method=request.method, endpoint=endpoint)
+            HTTP_REQUESTS.inc(method=request.method, endpoint=endpoint, status=response.status_code)
+            active = current_span()
+            if active is not None:
+                active.name = f"{request.method} {endpoint}"
+                active.set_tag('http.status_code', response.status_code)
+        return response
+
+    @app.teardown_request
+    def _finish_request_span(exc):
+        request_span = g.pop('_ccs_request_span', None)
+        if request_span is not None:
+            if exc is not None:
+                request_span.__exit__(type(exc), exc, exc.__traceback__)
+            else:
+                request_span.__exit__(None, None, None)
+
+    def metrics():
+        return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+    app.add_url_rule('/metrics', 'metrics', metrics)
+    return app
@@ -0,0 +1,216 @@
+"""
+Element locator engine for the CCS scraper.
+Each scraper step (the login fields, the My Schedule link, the print buttons)
+has a list of candidate strategies. Instead of waiting on each candidate in
+turn, one wait loop checks all of them on every poll, so a drifted first
+selector costs nothing once another candidate matches. The strategy that
+won is remembered per step in a small JSON file and tried first on the next
+run; the scraper drops it again (forget) when the step after it fails.
+Catch-all selectors that may match the wrong element are never raced or
+remembered: they are only tried once the specific strategies have timed
+out. Hit/miss counts are kept per step and exported as metrics so a change
+in CCS markup shows up as a rise in fallbacks.
+
+Usage:
+    engine = LocatorEngine()
+    button = engine.find(driver, 'print.open', timeout=15, clickable=True)
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, StaleElementReferenceException
+
+from instrumentation import registry
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+LOCATOR_CACHE_PATH = os.environ.get('LOCATOR_CACHE_PATH', os.path.join('output', 'locator_cache.json'))
+POLL_INTERVAL = 0.25  # seconds between checks of all candidates
+FALLBACK_GRACE = 1.0  # seconds a lower-ranked match waits for a better one to appear
+LAST_RESORT_TIMEOUT = 2.0  # seconds for the catch-all selectors, after the specific ones timed out
+
+LOCATOR_LOOKUPS = registry.counter(
+    'ccs_locator_lookups_total', 'Scraper element lookups by step, winning strategy and outcome.',
+    ('step', 'strategy', 'outcome'))
+
+# Candidate strategies per step, best first: (name, By, selector)
+STEPS = {
+    'login.username': (
+        ('id', By.ID, "ctl01_mHolder_txtUserID"),
+        ('xpath', By.XPATH, "//input[@type='text'][contains(@id, 'UserID') or contains(@id, 'Username')]"),
+    ),
+    'login.password': (
+        ('id', By.ID, "ctl01_mHolder_txtGlobalPassword"),
+        ('xpath', By.XPATH, "//input[@type='password'][contains(@id, 'Password')]"),
+    ),
+    'login.submit': (
+        ('id', By.ID, "ctl01_mHolder_loginButton"),
+        ('xpath', By.XPATH, "//input[@type='submit' or @type='button'][contains(@id, 'login') or contains(@value, 'Login')]"),
+    ),
+    'my_schedule.link': (
+        ('quick_link', By.XPATH, "//a[contains(text(), 'My Schedule')][contains(@class, 'quick-link') or ancestor::div[contains(@class, 'quick-link')]]"),
+        ('text', By.XPATH, "//a[contains(text(), 'My Schedule')]"),
+    ),
+    'print.open': (
+        ('icon_and_text', By.XPATH, "//a[.//i[contains(@class, 'icon-PrintSVG')] and contains(text(), 'Print')]"),
+        ('icon', By.XPATH, "//i[contains(@class, 'icon-PrintSVG')]/parent::a"),
+        ('text', By.XPATH, "//a[contains(text(), 'Print')]"),
+    ),
+    'print.submit': (
+        ('exact', By.XPATH, "//button[text()='Print']"),
+        ('text', By.XPATH, "//button[contains(text(), 'Print')] | //input[@type='button'][@value='Print'] | //input[@type='submit'][@value='Print']"),
+        ('class', By.CSS_SELECTOR, ".btn-primary, .btn-print, .print-btn, .gold-btn, .orange-btn"),
+    ),
+}
+
+# Catch-all strategies per step, tried in order only after every strategy in
+# STEPS timed out. They can match the wrong element, so they never win a race
+# and are never remembered.
+LAST_RESORT = {
+    'my_schedule.link': (
+        ('href', By.XPATH, "//a[contains(@href, 'schedule') or contains(@href, 'Schedule')]"),
+        ('nav', By.CSS_SELECTOR, ".nav-item a, .sidebar a, .menu a"),
+    ),
+    'print.open': (
+        ('generic', By.XPATH, "//*[contains(@class, 'print') or contains(text(), 'Print')]"),
+    ),
+    'print.submit': (
+        ('not_cancel', By.XPATH, "//button[not(contains(text(), 'Cancel'))]"),
+    ),
+}
+
+
+class LocatorEngine:
+    """Finds scraper elements by racing each step's candidate strategies in one wait."""
+
+    def __init__(self, cache_path=LOCATOR_CACHE_PATH, steps=STEPS, grace=FALLBACK_GRACE,
+                 last_resort=LAST_RESORT, last_resort_timeout=LAST_RESORT_TIMEOUT):
+        self.cache_path = cache_path
+        self.steps = steps
+        self.grace = grace
+        self.last_resort = last_resort
+        self.last_resort_timeout = last_resort_timeout
+        self._lock = threading.Lock()
+        self._preferred = self._load()
+        self._stats = {}
+
+    def _load(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path, encoding='utf-8') as f:
+                cached = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable locator cache {self.cache_path}: {e}")
+            return {}
+        # Drop strategies that are no longer candidates (e.g. catch-alls remembered by older versions)
+        return {step: name for step, name in cached.items()
+                if any(strategy[0] == name for strategy in self.steps.get(step, ()))}
+
+    def _save(self):
+        if not self.cache_path:
+            return
+        try:
+            directory = os.path.dirname(self.cache_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.cache_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._preferred, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            logger.warning(f"Could not save locator cache {self.cache_path}: {e}")
+
+    def candidates(self, step):
+        """The step's strategies, with the one that last succeeded moved to the front."""
+        strategies = self.steps[step]
+        preferred = self._preferred.get(step)
+        return sorted(strategies, key=lambda strategy: strategy[0] != preferred)
+
+    def find(self, driver, step, timeout=15, clickable=False):
+        """
+        Wait up to `timeout` seconds for any of the step's strategies to match
+        and return the element. Every poll checks all strategies in preference
+        order; when only a lower-ranked one matches, it is held for `grace`
+        seconds in case the preferred element is still rendering. When none
+        matches in time, the step's LAST_RESORT selectors are tried one by
+        one. Raises TimeoutException when nothing matches.
+        """
+        ordered = self.candidates(step)
+        first_fallback = []
+
+        def probe(driver):
+            for rank, (name, by, selector) in enumerate(ordered):
+                for element in driver.find_elements(by, selector):
+                    if clickable and not (element.is_displayed() and element.is_enabled()):
+                        continue
+                    if rank == 0:
+                        return name, element
+                    if not first_fallback:
+                        first_fallback.append(time.monotonic())
+                    if time.monotonic() - first_fallback[0] >= self.grace:
+                        return name, element
+                    return False
+            return False
+
+        try:
+            name, element = WebDriverWait(driver, timeout, poll_frequency=POLL_INTERVAL,
+                                          ignored_exceptions=(StaleElementReferenceException,)).until(probe)
+        except TimeoutException:
+            found = self._find_last_resort(driver, step, clickable)
+            if found is None:
+                self._record(step, None, 'miss')
+                logger.error(f"No locator strategy matched for {step} within {timeout}s")
+                raise
+            name, element = found
+            self._record(step, name, 'last_resort')
+            logger.warning(f"Locator for {step} only matched the catch-all strategy '{name}'")
+            return element
+
+        outcome = 'hit' if name == ordered[0][0] else 'fallback'
+        self._record(step, name, outcome)
+        if outcome == 'fallback':
+            logger.warning(f"Locator for {step} fell back to strategy '{name}'")
+        else:
+            logger.info(f"Found {step} with strategy '{name}'")
+        return element
+
+    def _find_last_resort(self, driver, step, clickable):
+        """(name, element) of the first catch-all strategy that matches, or None."""
+        for name, by, selector in self.last_resort.get(step, ()):
+            condition = EC.element_to_be_clickable((by, selector)) if clickable else EC.presence_of_element_located((by, selector))
+            try:
+                return name, WebDriverWait(driver, self.last_resort_timeout, poll_frequency=POLL_INTERVAL).until(condition)
+            except TimeoutException:
+                continue
+        return None
+
+    def _record(self, step, name, outcome):
+        LOCATOR_LOOKUPS.inc(step=step, strategy=name or '', outcome=outcome)
+        with self._lock:
+            stats = self._stats.setdefault(step, {'hit': 0, 'fallback': 0, 'last_resort': 0, 'miss': 0})
+            stats[outcome] += 1
+            if outcome in ('hit', 'fallback') and self._preferred.get(step) != name:
+                self._preferred[step] = name
+                self._save()
+
+    def forget(self, step):
+        """Drop the remembered strategy of a step, e.g. when the element it found led nowhere."""
+        with self._lock:
+            if self._preferred.pop(step, None) is not None:
+                logger.warning(f"Forgetting the preferred locator strategy for {step}")
+                self._save()
+
+    def stats(self):
+        """Per-step lookup counts and the currently preferred strategy."""
+        with self._lock:
+            return {step: dict(counts, preferred=self._preferred.get(step))
+                    for step, counts in self._stats.items()}
@@ -0,0 +1,38 @@
+-- 0002: Indexes for the hot access paths and a natural key for pairings
+--
+-- Without these, get_pairings, the flights RLS policies (which check
+-- ownership through pairings) and crew lookups all fall back to sequential
+-- scans as the tables grow.
+--
+-- The indexes are built CONCURRENTLY so writes to the tables continue while
+-- they build. That can't run inside a transaction, hence:
+-- migrate:no-transaction
+
+-- get_pairings: WHERE user_id = ? ORDER BY start_date DESC, and the pairings RLS checks
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_pairings_user_id_start_date
+  ON public.pairings (user_id, start_date DESC);
+
+-- Flights of a pairing, and the EXISTS (... pairings.id = flights.pairing_id) policy checks
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_flights_pairing_id
+  ON public.flights (pairing_id);
+
+-- "Which trips is this crew member on" (flight_id is already covered by UNIQUE(flight_id, crew_member_id))
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_flight_crew_crew_member_id
+  ON public.flight_crew (crew_member_id);
+
+-- Reverse lookup from a crew member to the lists they appear on
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_user_crew_lists_crew_member_id
+  ON public.user_crew_lists (crew_member_id);
+
+-- RLS checks on the per-user tables that have no user_id index yet
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_profiles_user_id
+  ON public.profiles (user_id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_settings_user_id
+  ON public.settings (user_id);
+
+-- Natural key for idempotent upserts of synced pairings:
+--   INSERT ... ON CONFLICT (user_id, pairing_code, start_date) DO UPDATE ...
+-- NOTE: existing duplicate pairings must be removed before this can be created.
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS uix_pairings_user_code_start
+  ON public.pairings (user_id, pairing_code, start_date);
@@ -0,0 +1,15 @@
+-- 0003: Ledger of archived print-view documents imported by bulk_import.py
+--
+-- One row per imported document, keyed by the SHA-256 of its content, so a
+-- re-run (or an overlapping archive) skips documents that are already in.
+
+CREATE TABLE IF NOT EXISTS private.print_view_imports (
+  content_hash TEXT PRIMARY KEY,
+  user_id UUID REFERENCES auth.users NOT NULL,
+  source_path TEXT NOT NULL,
+  pairings_count INTEGER NOT NULL,
+  imported_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_print_view_imports_user_id
+  ON private.print_view_imports (user_id);
@@ -0,0 +1,20 @@
+-- 0004: Per-user sync state kept between schedule syncs
+--
+-- Small JSON values keyed by (user_id, key), e.g. the fingerprint of the
+-- last master schedule probe, which lets a tiered sync skip the full
+-- print-view scrape when nothing changed. Written by the backend with the
+-- service role; users can only read their own rows.
+
+CREATE TABLE IF NOT EXISTS public.sync_state (
+  user_id UUID REFERENCES auth.users NOT NULL,
+  key TEXT NOT NULL,
+  value JSONB,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  PRIMARY KEY (user_id, key)
+);
+
+ALTER TABLE public.sync_state ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view their own sync state"
+  ON public.sync_state FOR SELECT
+  USING (auth.uid() = user_id);
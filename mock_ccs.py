@@ -0,0 +1,207 @@
+"""
+Local mock of the CCS web site for offline scraper tests and benchmarks.
+Reproduces the parts of ccs.ual.com that CcsScraper drives: the login form
+(same element IDs), the dashboard's My Schedule quick link, the My Schedule
+master grid with month navigation, the Print button with its Printing
+Options dialog, and the print preview window. Grid and preview are filled
+with synthetic schedules for the month.
+
+Render delays are configurable per page, and the 'drifted' markup variant
+renames IDs and classes so the scraper's fallback locators are exercised.
+
+Usage:
+    python mock_ccs.py --port 5055 --variant drifted --preview-delay-ms 1500
+    CcsScraper(base_url='http://127.0.0.1:5055').get_detailed_schedule('pilot', 'secret')
+"""
+
+import os
+import time
+import argparse
+import logging
+from datetime import date
+
+from flask import Flask, request, session, redirect, render_template_string, abort
+
+from synthetic_schedules import generate_print_view, generate_master_schedule
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+VARIANTS = ('standard', 'drifted')
+DEFAULT_DELAYS_MS = {'login': 0, 'page': 0, 'preview': 0}
+
+# Element IDs and classes per markup variant. 'standard' matches the live
+# site; 'drifted' only matches the scraper's fallback strategies.
+MARKUP = {
+    'standard': {
+        'id_prefix': 'ctl01_mHolder_',
+        'quick_link_class': 'quick-link',
+        'print_link': '<a placement="bottom" container="body" href="javascript:void(0)" id="print-link">'
+                      '<i aria-hidden="true" class="icon-PrintSVG"></i>Print</a>',
+        'submit_button': '<button type="button" class="gold-btn" id="print-submit">Print</button>',
+    },
+    'drifted': {
+        'id_prefix': 'ctl02_mHolder_',
+        'quick_link_class': 'shortcut',
+        'print_link': '<a href="javascript:void(0)" class="toolbar-link" id="print-link">Print</a>',
+        'submit_button': '<button type="button" class="btn-print" id="print-submit">Print Schedule</button>',
+    },
+}
+
+LOGIN_PAGE = """<!DOCTYPE html>
+<html><head><title>CCS Login</title></head><body>
+<form method="post" action="{{ url_for('login') }}">
+  {% if error %}<div class="login-error">{{ error }}</div>{% endif %}
+  <input type="text" id="{{ m.id_prefix }}txtUserID" name="{{ m.id_prefix }}txtUserID">
+  <input type="password" id="{{ m.id_prefix }}txtGlobalPassword" name="{{ m.id_prefix }}txtGlobalPassword">
+  <input type="submit" id="{{ m.id_prefix }}loginButton" value="Login">
+</form>
+</body></html>"""
+
+DASHBOARD_PAGE = """<!DOCTYPE html>
+<html><head><title>CCS</title></head><body>
+<div class="dashboard">
+  <div class="welcome">Welcome, {{ username }}</div>
+  <div class="{{ m.quick_link_class }}"><a href="{{ url_for('schedule') }}#/myschedule">My Schedule</a></div>
+</div>
+</body></html>"""
+
+SCHEDULE_PAGE = """<!DOCTYPE html>
+<html><head><title>My Schedule</title>
+<style>#print-dialog { display: none; } #print-dialog.open { display: block; }</style>
+</head><body>
+<h1>My Schedule</h1>
+<div class="schedule">
+  <a class="prev-month" title="Previous Month" href="{{ url_for('schedule', year=prev[0], month=prev[1]) }}#/myschedule">&lsaquo;</a>
+  <span class="month-title">{{ month_name }} {{ year }}</span>
+  <a class="next-month" title="Next Month" href="{{ url_for('schedule', year=next[0], month=next[1]) }}#/myschedule">&rsaquo;</a>
+  {{ m.print_link|safe }}
+  <div class="schedule-grid">{{ grid|safe }}</div>
+</div>
+<div id="print-dialog">
+  <h4>Printing Options</h4>
+  <div class="paper-size">Paper Size
+    <label><input type="radio" name="paperSize" value="Letter"> Letter Size</label>
+    <label><input type="radio" name="paperSize" value="Legal"> Legal Size</label>
+  </div>
+  <label><input type="checkbox" name="pairings"> Pairings</label>
+  <label><input type="checkbox" name="basic"> Basic Information</label>
+  <label><input type="checkbox" name="layover"> Layover Information</label>
+  <label><input type="checkbox" name="crew"> Crew Information</label>
+  <div>Include Crew Pictures
+    <label><input type="radio" name="crewPictures" id="crewPicturesYes" value="Yes"> Yes</label>
+    <label><input type="radio" name="crewPictures" id="crewPicturesNo" value="No" checked> No</label>
+  </div>
+  {{ m.submit_button|safe }}
+  <button type="button" id="print-cancel">Cancel</button>
+</div>
+<script>
+document.getElementById('print-link').addEventListener('click', function () {
+  document.getElementById('print-dialog').className = 'open';
+});
+document.getElementById('print-cancel').addEventListener('click', function () {
+  document.getElementById('print-dialog').className = '';
+});
+document.getElementById('print-submit').addEventListener('click', function () {
+  document.getElementById('print-dialog').className = '';
+  window.open({{ url_for('print_view', year=year, month=month)|tojson }}, '_blank');
+});
+</script>
+</body></html>"""
+
+
+def _shift_month(year, month, offset):
+    index = year * 12 + (month - 1) + offset
+    return index // 12, index % 12 + 1
+
+
+def create_app(users=None, variant='standard', delays_ms=None, pairings=12, today=None):
+    """
+    Build the mock site. users maps username -> password (None accepts any
+    non-empty credentials); delays_ms sets the 'login', 'page' and 'preview'
+    render delays in milliseconds.
+    """
+    if variant not in VARIANTS:
+        raise ValueError(f"Unknown markup variant {variant!r}; expected one of {VARIANTS}")
+    app = Flask(__name__)
+    app.secret_key = os.urandom(24)
+    markup = MARKUP[variant]
+    delays = dict(DEFAULT_DELAYS_MS, **(delays_ms or {}))
+    today = today or date.today()
+
+    def delay(kind):
+        if delays[kind]:
+            time.sleep(delays[kind] / 1000)
+
+    def require_login():
+        if 'username' not in session:
+            abort(redirect(app.url_for('login')))
+
+    @app.route('/CCS/default.aspx', methods=['GET', 'POST'])
+    def login():
+        error = None
+        if request.method == 'POST':
+            delay('login')
+            username = request.form.get(f"{markup['id_prefix']}txtUserID", '')
+            password = request.form.get(f"{markup['id_prefix']}txtGlobalPassword", '')
+            valid = users.get(username) == password if users is not None else bool(username and password)
+            if valid:
+                session['username'] = username
+                return redirect(app.url_for('dashboard'))
+            error = 'Invalid user ID or password'
+        delay('page')
+        return render_template_string(LOGIN_PAGE, m=markup, error=error)
+
+    @app.route('/CCS/home')
+    def dashboard():
+        require_login()
+        delay('page')
+        return render_template_string(DASHBOARD_PAGE, m=markup, username=session['username'])
+
+    @app.route('/CCS/schedule')
+    def schedule():
+        require_login()
+        delay('page')
+        year = request.args.get('year', today.year, type=int)
+        month = request.args.get('month', today.month, type=int)
+        if not 1 <= month <= 12:
+            abort(400)
+        # The master schedule grid (sg-data-row per duty day), without its document wrapper
+        grid = generate_master_schedule(pairings=pairings, year=year, month=month, seed=year * 100 + month)
+        grid = grid.split('<body>', 1)[1].rsplit('</body>', 1)[0]
+        return render_template_string(
+            SCHEDULE_PAGE, m=markup, year=year, month=month, grid=grid,
+            month_name=date(year, month, 1).strftime('%B'),
+            prev=_shift_month(year, month, -1), next=_shift_month(year, month, 1))
+
+    @app.route('/CCS/printview')
+    def print_view():
+        require_login()
+        delay('preview')
+        year = request.args.get('year', today.year, type=int)
+        month = request.args.get('month', today.month, type=int)
+        if not 1 <= month <= 12:
+            abort(400)
+        return generate_print_view(pairings=pairings, year=year, month=month, seed=year * 100 + month)
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a local mock of the CCS web site.")
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--variant', choices=VARIANTS, default='standard')
+    parser.add_argument('--pairings', type=int, default=12, help="Pairings per month in the print view")
+    for kind in DEFAULT_DELAYS_MS:
+        parser.add_argument(f'--{kind}-delay-ms', type=float, default=0)
+    args = parser.parse_args()
+
+    delays = {kind: getattr(args, f'{kind}_delay_ms') for kind in DEFAULT_DELAYS_MS}
+    app = create_app(variant=args.variant, delays_ms=delays, pairings=args.pairings)
+    logger.info(f"Mock CCS ({args.variant} markup) at http://127.0.0.1:{args.port}/CCS/default.aspx")
+    app.run(host='127.0.0.1', port=args.port, threaded=True)
+
+
+if __name__ == '__main__':
+    main()
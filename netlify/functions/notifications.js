@@ -2,17 +2,38 @@
 
 const { Resend } = require('resend');
 
+const FROM_ADDRESS = 'CCS Hyper <notifications@yourdomain.com>';
+
 exports.handler = async (event, context) => {
     if (event.httpMethod !== 'POST') {
         return { statusCode: 405, body: 'Method Not Allowed' };
     }
 
     const resend = new Resend(process.env.RESEND_API_KEY);
-    const { to, subject, html } = JSON.parse(event.body);
+    const payload = JSON.parse(event.body);
 
     try {
+        // Batched digests from the Python dispatcher: { emails: [{ to, subject, html }, ...] }
+        if (Array.isArray(payload.emails)) {
+            const { error } = await resend.batch.send(
+                payload.emails.map(({ to, subject, html }) => ({ from: FROM_ADDRESS, to, subject, html }))
+            );
+            if (error) {
+                return {
+                    statusCode: error.statusCode || 502,
+                    body: JSON.stringify({ error: error.message })
+                };
+            }
+
+            return {
+                statusCode: 200,
+                body: JSON.stringify({ message: `${payload.emails.length} notifications sent successfully.` })
+            };
+        }
+
+        const { to, subject, html } = payload;
         await resend.emails.send({
-            from: 'CCS Hyper <notifications@yourdomain.com>',
+            from: FROM_ADDRESS,
             to: to,
             subject: subject,
             html: html,
@@ -28,4 +49,4 @@ exports.handler = async (event, context) => {
             body: JSON.stringify({ error: error.message })
         };
     }
-};
\ No newline at end of file
+};
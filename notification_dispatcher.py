@@ -0,0 +1,233 @@
+"""
+Crew-list notification dispatcher for CCS Hyper.
+Collects the crew-list matches found during a schedule sync, coalesces them
+into one digest email per user, drops matches the user was already notified
+about, and sends the digests to the Resend notifications function in
+rate-limited batches.
+"""
+
+import os
+import time
+import html
+import logging
+import threading
+
+from sync_state import MemorySyncStateStore
+from instrumentation import upstream_call
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+NOTIFICATIONS_ENDPOINT = os.environ.get(
+    'NOTIFICATIONS_ENDPOINT', 'http://localhost:8888/.netlify/functions/notifications'
+)
+MAX_BATCH_SIZE = 100  # Resend accepts at most 100 emails per batch call
+FLUSH_DELAY = float(os.environ.get('NOTIFICATION_FLUSH_DELAY', '5'))  # seconds digests wait for a shared batch
+NOTIFIED_MATCHES_KEY = 'notified_crew_matches'
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+LIST_TYPE_LABELS = {
+    'friends': 'Friends I Fly With',
+    'do_not_fly': 'Do Not Fly',
+}
+
+
+def find_crew_matches(pairings, crew_lists):
+    """
+    Return the crew-list matches for the crew on each pairing.
+
+    `pairings` are parsed pairings with a 'crew' list, `crew_lists` are rows
+    of the user's crew lists with 'employee_id' and 'list_type'.
+    """
+    lists_by_employee = {}
+    for entry in crew_lists:
+        if entry.get('employee_id'):
+            lists_by_employee.setdefault(entry['employee_id'], []).append(entry['list_type'])
+
+    matches = []
+    for pairing in pairings:
+        for member in pairing.get('crew', []):
+            for list_type in lists_by_employee.get(member.get('employee_id'), []):
+                matches.append({
+                    'pairing_code': pairing['pairing_code'],
+                    'start_date': pairing.get('start_date'),
+                    'employee_id': member['employee_id'],
+                    'name': member.get('name', ''),
+                    'position': member.get('position', ''),
+                    'list_type': list_type,
+                })
+    return matches
+
+
+def match_key(match):
+    """Stable identity of a match, used to diff one sync against the last."""
+    return f"{match['pairing_code']}|{match.get('start_date')}|{match['employee_id']}|{match['list_type']}"
+
+
+def build_digest_html(matches):
+    """Render one digest email body for all of a user's new matches."""
+    sections = []
+    for list_type, label in LIST_TYPE_LABELS.items():
+        items = [m for m in matches if m['list_type'] == list_type]
+        if not items:
+            continue
+        rows = ''.join(
+            f"<li>{html.escape(m['name'])} ({html.escape(m['position'])}) on trip "
+            f"{html.escape(m['pairing_code'])} starting {html.escape(str(m.get('start_date')))}</li>"
+            for m in items
+        )
+        sections.append(f"<h3>{label}</h3><ul>{rows}</ul>")
+    return "<p>Your latest schedule sync found crew from your lists:</p>" + ''.join(sections)
+
+
+class RateLimiter:
+    """Spaces out calls so no more than `rate` happen per second."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+class NotificationDispatcher:
+    """
+    Queues one digest per user per sync and sends the queue in batches.
+
+    Already-notified matches are tracked in the sync state store, so a match
+    only produces an email the first time it shows up. A failed batch is
+    not kept in the queue, but it leaves the state untouched, so its matches
+    are queued again by the user's next sync.
+
+    Request handlers call flush_later(), which sends the queue from a
+    background timer: the request doesn't wait on retries, and digests
+    queued by other syncs in the meantime share the batch.
+    """
+
+    def __init__(self, endpoint=None, state_store=None, batch_size=MAX_BATCH_SIZE,
+                 rate_limit=2.0, max_retries=3, backoff=1.0, timeout=10, session=None,
+                 flush_delay=FLUSH_DELAY):
+        self.endpoint = endpoint or NOTIFICATIONS_ENDPOINT
+        self.state_store = state_store or MemorySyncStateStore()
+        self.batch_size = min(batch_size, MAX_BATCH_SIZE)
+        self.rate_limiter = RateLimiter(rate_limit)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self._session = session
+        self.flush_delay = flush_delay
+        self._queue = []
+        self._timer = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        """HTTP session, created on first send so the dispatcher is cheap to construct."""
+        if self._session is None:
+            import requests
+            self._session = requests.Session()
+        return self._session
+
+    def queue_sync(self, user_id, email, matches):
+        """
+        Queue a digest of the new matches from one user's sync.
+
+        Returns the number of new matches in the digest (0 if nothing is queued).
+        """
+        current = {}
+        for match in matches:
+            current.setdefault(match_key(match), match)
+
+        already_sent = set(self.state_store.get(user_id, NOTIFIED_MATCHES_KEY, []))
+        new_matches = [m for key, m in current.items() if key not in already_sent]
+
+        if not new_matches:
+            # Forget matches that are no longer on the schedule
+            self.state_store.set(user_id, NOTIFIED_MATCHES_KEY, sorted(already_sent & set(current)))
+            return 0
+
+        digest = {
+            'user_id': user_id,
+            'keys': sorted(current),
+            'email': {
+                'to': email,
+                'subject': f"CCS Hyper: {len(new_matches)} crew list match{'es' if len(new_matches) != 1 else ''}",
+                'html': build_digest_html(new_matches),
+            },
+        }
+        with self._lock:
+            # A newer sync for the same user supersedes a digest not yet sent
+            self._queue = [d for d in self._queue if d['user_id'] != user_id]
+            self._queue.append(digest)
+        return len(new_matches)
+
+    def flush(self):
+        """Send every queued digest. Returns the number of emails delivered."""
+        with self._lock:
+            pending, self._queue = self._queue, []
+
+        delivered = 0
+        for start in range(0, len(pending), self.batch_size):
+            batch = pending[start:start + self.batch_size]
+            if self._send_batch([d['email'] for d in batch]):
+                for digest in batch:
+                    self.state_store.set(digest['user_id'], NOTIFIED_MATCHES_KEY, digest['keys'])
+                delivered += len(batch)
+            else:
+                logger.error(f"Notification batch of {len(batch)} failed after {self.max_retries} retries; "
+                             f"its matches are queued again by the next sync")
+        return delivered
+
+    def flush_later(self):
+        """Flush the queue from a background timer in `flush_delay` seconds, unless one is already due."""
+        with self._lock:
+            if self._timer is not None:
+                return
+            self._timer = threading.Timer(self.flush_delay, self._timed_flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _timed_flush(self):
+        with self._lock:
+            self._timer = None
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"Background notification flush failed: {e}")
+
+    def _send_batch(self, emails):
+        """POST one batch to the notifications function, retrying transient failures."""
+        import requests
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.wait()
+            retry_after = None
+            try:
+                with upstream_call('notifications', 'batch.send') as call:
+                    response = self.session.post(self.endpoint, json={'emails': emails}, timeout=self.timeout)
+                    call.set_tag('http.status_code', response.status_code)
+                if response.status_code < 300:
+                    logger.info(f"Sent notification batch of {len(emails)}")
+                    return True
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    logger.error(f"Notification batch rejected ({response.status_code}): {response.text}")
+                    return False
+                retry_after = response.headers.get('Retry-After')
+                logger.warning(f"Notification batch failed with {response.status_code} (attempt {attempt + 1})")
+            except requests.RequestException as e:
+                logger.warning(f"Notification batch request error (attempt {attempt + 1}): {e}")
+
+            if attempt < self.max_retries:
+                delay = self.backoff * (2 ** attempt)
+                if retry_after and retry_after.isdigit():
+                    delay = max(delay, int(retry_after))
+                time.sleep(delay)
+        return False
@@ -0,0 +1,174 @@
+"""
+Sampling profiler for slow requests in CCS Hyper.
+While a request is being handled, a background thread samples that request
+thread's stack at a fixed interval. Requests slower than the threshold, and
+requests that ask for it with the X-CCS-Profile header, have their samples
+written as a collapsed-stack file. The files work with flamegraph.pl,
+speedscope and inferno. Only the newest files are kept.
+
+Enable with PROFILE_REQUESTS=1 (slow requests) and/or PROFILE_TOKEN=<secret>
+(per-request trigger: send `X-CCS-Profile: <secret>`).
+"""
+
+import os
+import re
+import sys
+import hmac
+import time
+import logging
+import threading
+from collections import Counter
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+PROFILE_REQUESTS = os.environ.get('PROFILE_REQUESTS', '').lower() in ('1', 'true', 'yes')
+PROFILE_THRESHOLD_MS = float(os.environ.get('PROFILE_THRESHOLD_MS', '2000'))
+PROFILE_INTERVAL_MS = float(os.environ.get('PROFILE_INTERVAL_MS', '10'))
+PROFILE_DIR = os.environ.get('PROFILE_DIR', 'profiles')
+PROFILE_MAX_FILES = int(os.environ.get('PROFILE_MAX_FILES', '50'))
+PROFILE_TOKEN = os.environ.get('PROFILE_TOKEN')
+PROFILE_HEADER = 'X-CCS-Profile'
+PROFILE_FILE_HEADER = 'X-CCS-Profile-File'
+MAX_STACK_DEPTH = 128
+
+
+def collapse_stack(frame, depth=MAX_STACK_DEPTH):
+    """Render a frame and its callers as one collapsed-stack line, outermost first."""
+    names = []
+    while frame is not None and len(names) < depth:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class StackSampler:
+    """
+    Samples the stacks of registered threads from one background thread.
+
+    Signal-based samplers (setitimer) only interrupt the main thread, while
+    Flask serves requests on worker threads, so this reads their frames with
+    sys._current_frames() instead. The sampler thread sleeps while no thread
+    is registered.
+    """
+
+    def __init__(self, interval_ms=PROFILE_INTERVAL_MS):
+        self.interval = interval_ms / 1000
+        self._targets = {}
+        self._lock = threading.Lock()
+        self._active = threading.Event()
+        self._thread = None
+
+    def start(self, thread_id=None):
+        """Begin sampling a thread (the calling thread by default); returns its sample Counter."""
+        samples = Counter()
+        with self._lock:
+            self._targets[thread_id or threading.get_ident()] = samples
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+                self._thread.start()
+        self._active.set()
+        return samples
+
+    def stop(self, thread_id=None):
+        """Stop sampling a thread and return its samples."""
+        with self._lock:
+            samples = self._targets.pop(thread_id or threading.get_ident(), Counter())
+            if not self._targets:
+                self._active.clear()
+        return samples
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while True:
+            self._active.wait()
+            time.sleep(self.interval)
+            with self._lock:
+                targets = list(self._targets.items())
+            if not targets:
+                continue
+            frames = sys._current_frames()
+            for thread_id, samples in targets:
+                frame = frames.get(thread_id)
+                if frame is not None and thread_id != own_id:
+                    samples[collapse_stack(frame)] += 1
+
+
+def write_profile(samples, name, directory=PROFILE_DIR, max_files=PROFILE_MAX_FILES):
+    """Write samples as a collapsed-stack file, prune the oldest files, and return the path."""
+    os.makedirs(directory, exist_ok=True)
+    safe_name = re.sub(r'[^A-Za-z0-9_.-]+', '_', name).strip('_')
+    path = os.path.join(directory, f"{time.strftime('%Y%m%d_%H%M%S')}_{time.time_ns() % 1_000_000:06d}_{safe_name}.collapsed")
+    with open(path, 'w') as f:
+        for stack, count in samples.most_common():
+            f.write(f"{stack} {count}\n")
+    prune_profiles(directory, max_files)
+    return path
+
+
+def prune_profiles(directory=PROFILE_DIR, max_files=PROFILE_MAX_FILES):
+    """Delete all but the newest max_files profiles in directory."""
+    paths = [os.path.join(directory, name) for name in os.listdir(directory) if name.endswith('.collapsed')]
+    paths.sort(key=os.path.getmtime, reverse=True)
+    for path in paths[max_files:]:
+        try:
+            os.remove(path)
+        except OSError as e:
+            logger.warning(f"Could not remove old profile {path}: {e}")
+
+
+# --- Flask integration ---
+
+def init_app(app, enabled=None, threshold_ms=None, token=None, directory=None, max_files=None, interval_ms=None):
+    """
+    Profile requests of `app`: every request slower than threshold_ms when
+    enabled, and any request whose X-CCS-Profile header matches token.
+    Returns the sampler, or None when neither mode is configured.
+    """
+    from flask import g, request
+
+    enabled = PROFILE_REQUESTS if enabled is None else enabled
+    threshold = (PROFILE_THRESHOLD_MS if threshold_ms is None else threshold_ms) / 1000
+    token = PROFILE_TOKEN if token is None else token
+    directory = directory or PROFILE_DIR
+    max_files = max_files or PROFILE_MAX_FILES
+    if not enabled and not token:
+        return None
+    sampler = StackSampler(PROFILE_INTERVAL_MS if interval_ms is None else interval_ms)
+
+    @app.before_request
+    def _start_profile():
+        forced = bool(token) and hmac.compare_digest(request.headers.get(PROFILE_HEADER, '').encode(), token.encode())
+        if enabled or forced:
+            g._ccs_profile = (forced, time.perf_counter())
+            sampler.start()
+
+    @app.after_request
+    def _finish_profile(response):
+        profile = g.pop('_ccs_profile', None)
+        if profile is None:
+            return response
+        forced, started = profile
+        samples = sampler.stop()
+        elapsed = time.perf_counter() - started
+        if (forced or elapsed >= threshold) and samples:
+            endpoint = request.url_rule.rule if request.url_rule else request.path
+            try:
+                path = write_profile(samples, f"{request.method}_{endpoint}_{elapsed * 1000:.0f}ms", directory, max_files)
+                logger.info(f"Profiled {request.method} {request.path} ({elapsed * 1000:.0f} ms): {path}")
+                if forced:
+                    response.headers[PROFILE_FILE_HEADER] = os.path.basename(path)
+            except OSError as e:
+                logger.error(f"Failed to write profile: {e}")
+        return response
+
+    @app.teardown_request
+    def _discard_profile(exc):
+        # after_request is skipped when the request fails before a response exists
+        if g.pop('_ccs_profile', None) is not None:
+            sampler.stop()
+
+    return sampler
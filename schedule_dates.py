@@ -0,0 +1,94 @@
+"""
+Date helpers for the schedule parsers.
+Compiled patterns and integer date arithmetic for the date formats found in
+CCS documents, with the ISO strings of each month's days memoized. Parsing
+a row costs a table lookup instead of building and formatting a datetime.
+"""
+
+import re
+import calendar
+from functools import lru_cache
+
+MDY_RE = re.compile(r'(\d{1,2})/(\d{1,2})/(\d{4})')
+CLOCK_RE = re.compile(r'(\d{1,2}):?(\d{2})')  # 'HHMM' or 'HH:MM'
+DURATION_RE = re.compile(r'(\d+)[:.](\d{2})')  # 'H:MM' or 'H.MM'
+MONTH_NUMBERS = {name.lower(): number for number, name in enumerate(calendar.month_name) if name}
+MONTH_NUMBERS.update({name.lower(): number for number, name in enumerate(calendar.month_abbr) if name})
+
+
+@lru_cache(maxsize=256)
+def month_iso_days(year, month):
+    """
+    ISO dates of a month indexed by day: [1] is the 1st, [n] the last day, and
+    [n + 1] the 1st of the following month. Index 0 is unused.
+    """
+    days_in_month = calendar.monthrange(year, month)[1]
+    prefix = f"{year:04d}-{month:02d}-"
+    days = [None] + [f"{prefix}{day:02d}" for day in range(1, days_in_month + 1)]
+    next_year, next_month = (year + 1, 1) if month == 12 else (year, month + 1)
+    days.append(f"{next_year:04d}-{next_month:02d}-01")
+    return tuple(days)
+
+
+def iso_date(year, month, day):
+    """'YYYY-MM-DD' for a calendar day; raises ValueError when the day doesn't exist."""
+    days = month_iso_days(year, month)
+    if not 1 <= day < len(days) - 1:
+        raise ValueError(f"day {day} is out of range for {year}-{month:02d}")
+    return days[day]
+
+
+def next_iso_date(year, month, day):
+    """'YYYY-MM-DD' of the day after the given one."""
+    days = month_iso_days(year, month)
+    if not 1 <= day < len(days) - 1:
+        raise ValueError(f"day {day} is out of range for {year}-{month:02d}")
+    return days[day + 1]
+
+
+def next_day_iso(iso):
+    """'YYYY-MM-DD' of the day after an ISO date."""
+    return next_iso_date(int(iso[:4]), int(iso[5:7]), int(iso[8:10]))
+
+
+def mdy_to_iso(text):
+    """Convert 'MM/DD/YYYY' (or 'M/D/YYYY') to 'YYYY-MM-DD'."""
+    year, month, day = mdy_parts(text)
+    if not 1 <= month <= 12:
+        raise ValueError(f"month {month} is out of range in {text!r}")
+    return iso_date(year, month, day)
+
+
+def month_number(name):
+    """Month number for an English month name or abbreviation ('July', 'Jul')."""
+    try:
+        return MONTH_NUMBERS[name.strip().lower()]
+    except KeyError:
+        raise ValueError(f"unknown month name: {name!r}") from None
+
+
+def mdy_parts(text):
+    """(year, month, day) of a 'MM/DD/YYYY' date."""
+    match = MDY_RE.fullmatch(text.strip())
+    if not match:
+        raise ValueError(f"not a MM/DD/YYYY date: {text!r}")
+    return int(match.group(3)), int(match.group(1)), int(match.group(2))
+
+
+def clock_minutes(text):
+    """Minutes past midnight of a 'HHMM' or 'HH:MM' time, or None when blank or malformed."""
+    match = CLOCK_RE.fullmatch(text.strip()) if text else None
+    if not match:
+        return None
+    hours, minutes = int(match.group(1)), int(match.group(2))
+    if hours > 23 or minutes > 59:
+        return None
+    return hours * 60 + minutes
+
+
+def duration_minutes(text):
+    """Minutes of an 'H:MM' duration, or None when blank or malformed."""
+    match = DURATION_RE.fullmatch(text.strip()) if text else None
+    if not match:
+        return None
+    return int(match.group(1)) * 60 + int(match.group(2))
@@ -0,0 +1,488 @@
+"""
+Schedule parser engine for CCS Hyper.
+One entry point, parse_schedule(), for every CCS document format. The format
+is sniffed from the first few KB of the document and the matching registered
+backend parses it into the common records of schedule_records. Results are
+cached by content hash, so the same document uploaded, synced and pushed
+to the calendar is parsed only once.
+
+The built-in backends stream the document through html.parser once and keep
+only the cells they need, instead of building a full BeautifulSoup tree.
+
+Formats:
+    print_view       CCS 'Print View' (`table.pairing-details`); a live print
+                     preview can also be read in the browser with
+                     PRINT_VIEW_EXTRACT_SCRIPT and parse_print_view_json()
+    master_schedule  Master schedule grid (`div.sg-data-row`)
+"""
+
+import re
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+from html.parser import HTMLParser
+
+from instrumentation import span
+from airport_timezones import airport_zone, local_to_utc
+from schedule_dates import (mdy_to_iso, mdy_parts, month_number, iso_date, next_iso_date, next_day_iso,
+                            clock_minutes, duration_minutes)
+from schedule_records import Leg, CrewAssignment, DutyDay, Pairing, ParsedSchedule
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+SNIFF_CHARS = 8192  # how much of the document format detection looks at first
+PARSE_CACHE_SIZE = 32  # parsed documents kept in memory
+
+PAIRING_HEADER_RE = re.compile(r'Pairing (\w+) - (\d{2}/\d{2}/\d{4})')
+DATE_TITLE_RE = re.compile(r'Date: (\d+/\d+/\d+)')
+
+# Cell layout of print-view rows. Leg times are airport-local, blocks are H:MM.
+FLIGHT_COLUMNS = ('flight_number', 'departure_airport', 'arrival_airport', 'date',
+                  'departure_time', 'arrival_time', 'aircraft_type', 'block')
+CREW_COLUMNS = ('name', 'position', 'employee_id')
+FLIGHT_COLUMN = {name: index for index, name in enumerate(FLIGHT_COLUMNS)}
+CREW_COLUMN = {name: index for index, name in enumerate(CREW_COLUMNS)}
+
+
+class ScheduleFormatError(ValueError):
+    """Raised when a document matches no registered schedule format."""
+
+
+def _classes(attrs):
+    for name, value in attrs:
+        if name == 'class' and value:
+            return value.split()
+    return ()
+
+
+# --- Print view backend ---
+
+class _PrintViewHandler(HTMLParser):
+    """Collects the header text and flight/crew row cells of each pairing-details table."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.tables = []  # (header parts, flight rows, crew rows, totals rows)
+        self._depth = 0  # nesting depth inside the current pairing-details table
+        self._table = None
+        self._has_header = False
+        self._row = None
+        self._cell = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'table':
+            if self._depth:
+                self._depth += 1
+            elif 'pairing-details' in _classes(attrs):
+                self._depth = 1
+                self._table = ([], [], [], [])
+                self._has_header = False
+            return
+        if not self._depth:
+            return
+        if tag == 'tr':
+            self._end_row()
+            classes = _classes(attrs)
+            if 'flight-row' in classes:
+                self._row = (self._table[1], [])
+            elif 'crew-row' in classes:
+                self._row = (self._table[2], [])
+            elif 'pairing-totals' in classes:
+                self._row = (self._table[3], [])
+        elif tag == 'td':
+            if not self._has_header and 'pairing-header' in _classes(attrs):
+                self._has_header = True
+                self._cell = self._table[0]
+            elif self._row is not None:
+                self._cell = []
+                self._row[1].append(self._cell)
+            else:
+                self._cell = None
+
+    def handle_endtag(self, tag):
+        if not self._depth:
+            return
+        if tag == 'td':
+            self._cell = None
+        elif tag == 'tr':
+            self._end_row()
+        elif tag == 'table':
+            self._depth -= 1
+            if not self._depth:
+                self._end_row()
+                self.tables.append(self._table)
+                self._table = None
+
+    def handle_data(self, data):
+        if self._cell is not None:
+            self._cell.append(data)
+
+    def _end_row(self):
+        if self._row is not None:
+            rows, cells = self._row
+            rows.append([''.join(parts).strip() for parts in cells])
+        self._row = None
+        self._cell = None
+
+
+def _cell(cells, index):
+    return cells[index] if index < len(cells) else ''
+
+
+def _parse_leg(cells, fallback_date):
+    """
+    Build a Leg from a flight row. Returns (leg, local arrival date) with the
+    scheduled times in UTC when the departure airport's zone is known. The
+    arrival date is local to the arrival airport, or to the departure
+    airport when the arrival airport's zone is unknown.
+    """
+    departure_airport, arrival_airport = cells[FLIGHT_COLUMN['departure_airport']], cells[FLIGHT_COLUMN['arrival_airport']]
+    block = duration_minutes(_cell(cells, FLIGHT_COLUMN['block']))
+    date_parts = fallback_date
+    date_text = _cell(cells, FLIGHT_COLUMN['date'])
+    if date_text:
+        try:
+            date_parts = mdy_parts(date_text)
+        except ValueError:
+            logger.warning(f"Unparseable leg date {date_text!r}; using the pairing start date")
+
+    departure = arrival = None
+    departure_minute = clock_minutes(_cell(cells, FLIGHT_COLUMN['departure_time']))
+    if departure_minute is not None:
+        departure = local_to_utc(*date_parts, departure_minute, departure_airport)
+    if departure is not None:
+        if block is not None:
+            arrival = departure + timedelta(minutes=block)
+        else:
+            arrival_minute = clock_minutes(_cell(cells, FLIGHT_COLUMN['arrival_time']))
+            if arrival_minute is not None:
+                arrival = local_to_utc(*date_parts, arrival_minute, arrival_airport)
+            if arrival is not None:
+                # The row only has the departure date; arrivals after local midnight are on a later day
+                while arrival < departure:
+                    arrival += timedelta(days=1)
+                block = int((arrival - departure).total_seconds() // 60)
+
+    arrival_date = None
+    if arrival is not None:
+        # Never astimezone(None): that would use the host's time zone
+        zone = airport_zone(arrival_airport) or airport_zone(departure_airport)
+        arrival_date = arrival.astimezone(zone).date().isoformat()
+    elif date_parts:
+        arrival_date = iso_date(*date_parts)
+
+    leg = Leg(
+        cells[FLIGHT_COLUMN['flight_number']], departure_airport, arrival_airport,
+        aircraft_type=_cell(cells, FLIGHT_COLUMN['aircraft_type']) or None,
+        scheduled_departure=departure.isoformat() if departure else None,
+        scheduled_arrival=arrival.isoformat() if arrival else None,
+        block_minutes=block,
+    )
+    return leg, arrival_date
+
+
+def _parse_totals(rows):
+    """{label: minutes} from 'Label | H:MM | Label | H:MM' totals rows."""
+    totals = {}
+    for cells in rows:
+        for label, value in zip(cells[::2], cells[1::2]):
+            minutes = duration_minutes(value)
+            if minutes is not None:
+                totals[label.strip(':').lower()] = minutes
+    return totals
+
+
+def parse_print_view(html):
+    """Parse a CCS print view into a ParsedSchedule."""
+    handler = _PrintViewHandler()
+    handler.feed(html)
+    handler.close()
+    return build_print_view((''.join(header_parts), flight_rows, crew_rows, totals_rows)
+                            for header_parts, flight_rows, crew_rows, totals_rows in handler.tables)
+
+
+def parse_print_view_json(data):
+    """
+    Build a ParsedSchedule from the output of PRINT_VIEW_EXTRACT_SCRIPT (the
+    JSON string, or the already decoded list).
+    """
+    if isinstance(data, (str, bytes)):
+        data = json.loads(data)
+    try:
+        tables = [(header, flight_rows, crew_rows, totals_rows)
+                  for header, flight_rows, crew_rows, totals_rows in data]
+    except (TypeError, ValueError):
+        raise ScheduleFormatError("Extracted print view is not a list of pairing tables") from None
+    return build_print_view(tables)
+
+
+def build_print_view(tables):
+    """
+    Build a ParsedSchedule from pairing tables given as (header text, flight
+    rows, crew rows, totals rows), each row a list of cell texts in
+    FLIGHT_COLUMNS / CREW_COLUMNS order.
+    """
+    pairings = []
+    for header, flight_rows, crew_rows, totals_rows in tables:
+        match = PAIRING_HEADER_RE.search(header)
+        if not match:
+            logger.warning("Skipping pairing table without a recognizable header")
+            continue
+        start_date = mdy_to_iso(match.group(2))
+        start_parts = mdy_parts(match.group(2))
+
+        # Legs, block total and last arrival date in one pass over the flight rows
+        legs = []
+        block_total = 0
+        all_legs_timed = True
+        last_day = None
+        for cells in flight_rows:
+            if len(cells) < 3:
+                continue
+            leg, arrival_date = _parse_leg(cells, start_parts)
+            legs.append(leg)
+            if leg.block_minutes is None:
+                all_legs_timed = False
+            else:
+                block_total += leg.block_minutes
+            last_day = arrival_date or last_day
+
+        totals = _parse_totals(totals_rows)
+        block_time = block_total if legs and all_legs_timed else totals.get('block')
+        crew = tuple(
+            CrewAssignment(cells[CREW_COLUMN['employee_id']], cells[CREW_COLUMN['name']], cells[CREW_COLUMN['position']])
+            for cells in crew_rows if len(cells) >= len(CREW_COLUMNS)
+        )
+        pairings.append(Pairing(
+            pairing_code=match.group(1),
+            start_date=start_date,
+            # Exclusive, like the master schedule's: the day after the last arrival
+            end_date=next_day_iso(last_day) if last_day and last_day >= start_date else None,
+            legs=tuple(legs),
+            crew=crew,
+            block_time=block_time,
+            credit_time=totals.get('credit'),
+        ))
+
+    month = year = None
+    if pairings:
+        year, month = int(pairings[0].start_date[:4]), int(pairings[0].start_date[5:7])
+    return ParsedSchedule('print_view', tuple(pairings), month, year)
+
+
+# Runs in the print preview window (WebDriver execute_script) and returns, as
+# one JSON string, the same tables _PrintViewHandler collects, so only the cell
+# texts cross the WebDriver wire. Decode with parse_print_view_json().
+PRINT_VIEW_EXTRACT_SCRIPT = """
+var kinds = {'flight-row': 1, 'crew-row': 2, 'pairing-totals': 3};
+var tables = [];
+document.querySelectorAll('table.pairing-details').forEach(function (table) {
+    if (table.parentElement.closest('table.pairing-details')) {
+        return;  // nested tables belong to their outer pairing table
+    }
+    var header = table.querySelector('td.pairing-header');
+    var entry = [header ? header.textContent : '', [], [], []];
+    table.querySelectorAll('tr').forEach(function (row) {
+        for (var kind in kinds) {
+            if (row.classList.contains(kind)) {
+                entry[kinds[kind]].push(Array.prototype.map.call(row.cells, function (cell) {
+                    return cell.textContent.trim();
+                }));
+                return;
+            }
+        }
+    });
+    tables.push(entry);
+});
+return JSON.stringify(tables);
+"""
+
+
+# --- Master schedule backend ---
+
+class _MasterScheduleHandler(HTMLParser):
+    """Collects the month header and the cells of each sg-data-row."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.header = None
+        self.rows = []  # dicts with 'pairing', 'day' (text parts or None) and 'details'
+        self._stack = []  # one entry per open div: the text-part list it captures, or None
+        self._row = None
+        self._row_depth = None
+        self._detail = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag != 'div':
+            return
+        classes = _classes(attrs)
+        capture = None
+        if self._row is None:
+            if 'sg-data-row' in classes:
+                self._row = {'pairing': None, 'day': None, 'details': []}
+                self._row_depth = len(self._stack)
+            elif 'sg-header-text' in classes and self.header is None:
+                capture = self.header = []
+        else:
+            if 'sg-pairing' in classes and self._row['pairing'] is None:
+                capture = self._row['pairing'] = []
+            elif 'sg-description-row' in classes:
+                self._detail = [None, None]
+                self._row['details'].append(self._detail)
+            elif 'sg-description-label' in classes and self._detail and self._detail[0] is None:
+                capture = self._detail[0] = []
+            elif 'sg-description-data' in classes and self._detail and self._detail[1] is None:
+                capture = self._detail[1] = []
+            elif self._row['day'] is None and DATE_TITLE_RE.search(dict(attrs).get('title') or ''):
+                capture = self._row['day'] = []
+        self._stack.append(capture)
+
+    def handle_endtag(self, tag):
+        if tag != 'div' or not self._stack:
+            return
+        self._stack.pop()
+        if self._row is not None and len(self._stack) == self._row_depth:
+            self.rows.append(self._row)
+            self._row = None
+            self._detail = None
+
+    def handle_data(self, data):
+        # Like BeautifulSoup's .text, a div's text includes its descendants'
+        for capture in self._stack:
+            if capture is not None:
+                capture.append(data)
+
+
+def parse_master_schedule(html):
+    """Parse a master schedule into a ParsedSchedule, grouping consecutive days into pairings."""
+    handler = _MasterScheduleHandler()
+    handler.feed(html)
+    handler.close()
+
+    month_year_str = ''.join(handler.header).strip() if handler.header is not None else 'July 2025'
+    month_name, year_str = month_year_str.split()
+    month = month_number(month_name)
+    year = int(year_str)
+
+    pairings = []
+    current = None  # [code, start_date, end_date, days]
+    for row in handler.rows:
+        if row['pairing'] is None:
+            continue
+        pairing_code = ''.join(row['pairing']).strip()
+        if current is None or current[0] != pairing_code:
+            if current:
+                pairings.append(Pairing(current[0], current[1], current[2], days=tuple(current[3])))
+            current = [pairing_code, None, None, []]
+
+        date = None
+        if row['day'] is not None:
+            day = int(''.join(row['day']).strip())
+            date = iso_date(year, month, day)
+            if not current[1]:
+                current[1] = date
+            current[2] = next_iso_date(year, month, day)
+
+        details = tuple(
+            (''.join(label).strip(), ''.join(value).strip())
+            for label, value in row['details'] if label is not None and value is not None
+        )
+        current[3].append(DutyDay(date, details))
+
+    if current:
+        pairings.append(Pairing(current[0], current[1], current[2], days=tuple(current[3])))
+    return ParsedSchedule('master_schedule', tuple(pairings), month, year)
+
+
+# --- Registry ---
+
+_registry = OrderedDict()  # format name -> (sniff, parse), tried in registration order
+
+
+def register_parser(name, sniff, parse):
+    """
+    Register a backend: sniff(text) -> bool is given the start of the
+    document, parse(html) -> ParsedSchedule does the work.
+    """
+    _registry[name] = (sniff, parse)
+
+
+def registered_formats():
+    return list(_registry)
+
+
+def detect_format(html):
+    """Return the name of the format of html, or None when no backend recognizes it."""
+    head = html[:SNIFF_CHARS]
+    for name, (sniff, _) in _registry.items():
+        if sniff(head):
+            return name
+    # Markers can sit past the sniff window behind a long <head>; a substring scan is still cheap
+    if len(html) > SNIFF_CHARS:
+        for name, (sniff, _) in _registry.items():
+            if sniff(html):
+                return name
+    return None
+
+
+class _ParseCache:
+    """Small thread-safe LRU of parse results keyed by (format, content hash)."""
+
+    def __init__(self, maxsize=PARSE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+            return result
+
+    def put(self, key, result):
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+parse_cache = _ParseCache()
+
+
+def parse_schedule(html, format=None, use_cache=True):
+    """
+    Parse a CCS schedule document of any registered format.
+    Raises ScheduleFormatError when the format is unknown or unrecognized.
+    """
+    format = format or detect_format(html)
+    if format not in _registry:
+        raise ScheduleFormatError(f"Unrecognized schedule format: {format or 'no backend matched'}")
+
+    key = None
+    if use_cache:
+        key = (format, hashlib.sha1(html.encode('utf-8', 'surrogatepass')).hexdigest())
+        cached = parse_cache.get(key)
+        if cached is not None:
+            return cached
+
+    with span(f"parse.{format}"):
+        result = _registry[format][1](html)
+    if key is not None:
+        parse_cache.put(key, result)
+    return result
+
+
+register_parser('print_view', lambda text: 'pairing-details' in text, parse_print_view)
+register_parser('master_schedule', lambda text: 'sg-data-row' in text or 'sg-header-text' in text, parse_master_schedule)
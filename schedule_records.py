@@ -0,0 +1,171 @@
+"""
+Common record model for parsed CCS schedules.
+Every schedule parser backend emits these records, whatever the source
+format, so the sync, calendar and import paths consume one shape. The
+records are frozen, slotted and hold tuples only, which keeps large parse
+results compact and makes cached results safe to share. Airport, aircraft
+and position codes are interned, since the same few codes repeat on every
+leg.
+"""
+
+import sys
+import json
+from dataclasses import dataclass
+
+from schedule_dates import next_day_iso
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+_intern = sys.intern
+
+
+def dumps(value):
+    """Serialize records (or lists/dicts of them) to JSON bytes, using orjson when available."""
+    if orjson is not None:
+        # Passthrough so records serialize through to_dict() rather than their raw fields
+        return orjson.dumps(value, default=_to_dict, option=orjson.OPT_PASSTHROUGH_DATACLASS)
+    return json.dumps(value, default=_to_dict, separators=(',', ':')).encode('utf-8')
+
+
+def _to_dict(value):
+    if hasattr(value, 'to_dict'):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+@dataclass(frozen=True, slots=True)
+class Leg:
+    """One flight leg of a pairing."""
+    flight_number: str
+    departure_airport: str
+    arrival_airport: str
+    aircraft_type: str | None = None
+    scheduled_departure: str | None = None  # ISO 8601, UTC
+    scheduled_arrival: str | None = None  # ISO 8601, UTC
+    block_minutes: int | None = None
+
+    # Column order of to_row(), matching public.flights
+    ROW_COLUMNS = ('flight_number', 'departure_airport', 'arrival_airport',
+                   'scheduled_departure', 'scheduled_arrival', 'aircraft_type')
+
+    def __post_init__(self):
+        object.__setattr__(self, 'departure_airport', _intern(self.departure_airport))
+        object.__setattr__(self, 'arrival_airport', _intern(self.arrival_airport))
+        if self.aircraft_type:
+            object.__setattr__(self, 'aircraft_type', _intern(self.aircraft_type))
+
+    def to_row(self):
+        return (self.flight_number, self.departure_airport, self.arrival_airport,
+                self.scheduled_departure, self.scheduled_arrival, self.aircraft_type)
+
+    def to_dict(self):
+        return {
+            'flight_number': self.flight_number,
+            'departure_airport': self.departure_airport,
+            'arrival_airport': self.arrival_airport,
+            'aircraft_type': self.aircraft_type,
+            'scheduled_departure': self.scheduled_departure,
+            'scheduled_arrival': self.scheduled_arrival,
+            'block_minutes': self.block_minutes,
+        }
+
+    def to_json(self):
+        return dumps(self.to_dict())
+
+
+@dataclass(frozen=True, slots=True)
+class CrewAssignment:
+    """A crew member assigned to a pairing."""
+    employee_id: str
+    name: str
+    position: str
+
+    # Column order of to_row()
+    ROW_COLUMNS = ('employee_id', 'name', 'position')
+
+    def __post_init__(self):
+        object.__setattr__(self, 'position', _intern(self.position))
+
+    def to_row(self):
+        return (self.employee_id, self.name, self.position)
+
+    def to_dict(self):
+        return {'name': self.name, 'position': self.position, 'employee_id': self.employee_id}
+
+    def to_json(self):
+        return dumps(self.to_dict())
+
+
+@dataclass(frozen=True, slots=True)
+class DutyDay:
+    """One master-schedule day: its date and the (label, value) description rows."""
+    date: str
+    details: tuple = ()
+
+    def to_dict(self):
+        day = {'date': self.date} if self.date else {}
+        for label, value in self.details:
+            day[label.lower().replace(':', '')] = value
+        return day
+
+
+@dataclass(frozen=True, slots=True)
+class Pairing:
+    """A pairing (trip) with its legs, crew and duty days."""
+    pairing_code: str
+    start_date: str
+    end_date: str | None = None  # exclusive: the day after the last day, as Google all-day events expect
+    legs: tuple = ()
+    crew: tuple = ()
+    days: tuple = ()
+    block_time: int | None = None  # minutes
+    credit_time: int | None = None  # minutes
+
+    # Column order of to_row(), matching public.pairings
+    ROW_COLUMNS = ('user_id', 'pairing_code', 'start_date', 'end_date', 'block_time', 'credit_time')
+
+    @property
+    def description(self):
+        """Calendar description, built on access from the duty days (or the legs when there are none)."""
+        if self.days:
+            return '\n\n'.join('\n'.join(f"{label} {value}" for label, value in day.details)
+                               for day in self.days) + '\n\n'
+        return '\n'.join(f"{leg.flight_number} {leg.departure_airport}-{leg.arrival_airport}" for leg in self.legs)
+
+    def to_row(self, user_id=None):
+        """Tuple of ROW_COLUMNS for bulk writes; end_date falls back to the day after start_date."""
+        return (user_id, self.pairing_code, self.start_date, self.end_date or next_day_iso(self.start_date),
+                self.block_time, self.credit_time)
+
+    def to_dict(self):
+        """Plain-dict form, compatible with the output of the original parsers."""
+        return {
+            'pairing_code': self.pairing_code,
+            'start_date': self.start_date,
+            'end_date': self.end_date,
+            'block_time': self.block_time,
+            'credit_time': self.credit_time,
+            'description': self.description,
+            'flights': [leg.to_dict() for leg in self.legs],
+            'crew': [member.to_dict() for member in self.crew],
+            'days': [day.to_dict() for day in self.days],
+        }
+
+    def to_json(self):
+        return dumps(self.to_dict())
+
+
+@dataclass(frozen=True, slots=True)
+class ParsedSchedule:
+    """The result of parsing one schedule document."""
+    format: str
+    pairings: tuple
+    month: int | None = None
+    year: int | None = None
+
+    def to_json(self):
+        return dumps({'format': self.format, 'month': self.month, 'year': self.year,
+                      'pairings': self.pairings})
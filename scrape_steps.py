@@ -0,0 +1,165 @@
+"""
+Checkpointed step runner for the CCS scraper.
+A scrape is a fixed sequence of steps (login, My Schedule, print dialog,
+preview, extract). The runner executes them in order and records the timing
+and outcome of every attempt. When a step fails it is retried in the same
+live browser session according to its RetryPolicy, rather than throwing the
+browser away and starting over from login. When its retries run out, the
+runner can rewind to an earlier step (e.g. re-open the print dialog when the
+preview never appears). Steps marked as checkpoints leave the session in a
+state a later run can resume from.
+
+Usage:
+    machine = StepMachine([
+        Step('login', do_login, RetryPolicy(attempts=2, delay=5)),
+        Step('extract', do_extract, RetryPolicy(rewind_to='login'), checkpoint=False),
+    ], name='scraper')
+    result = machine.run(context)  # the last step's result, or None
+"""
+
+import time
+import logging
+from dataclasses import dataclass, field
+
+from instrumentation import span
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MAX_REWINDS = 2  # rewinds to an earlier step allowed per run
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """How often a step is attempted, the wait between attempts, and where to rewind to when it keeps failing."""
+    attempts: int = 2
+    delay: float = 2.0  # seconds before the second attempt
+    backoff: float = 2.0  # multiplier for each further attempt
+    rewind_to: str | None = None
+
+    def delay_before(self, attempt):
+        """Seconds to wait before attempt number `attempt` (2, 3, ...)."""
+        return self.delay * self.backoff ** (attempt - 2)
+
+
+@dataclass(frozen=True)
+class Step:
+    """
+    A named step. run(context) returns a truthy result on success; a falsy
+    result or an exception is a failure. reset(context), when given, is
+    called before the runner rewinds to this step.
+    """
+    name: str
+    run: object
+    policy: RetryPolicy = field(default_factory=RetryPolicy)
+    checkpoint: bool = True  # whether a later run may resume after this step
+    reset: object | None = None
+
+
+@dataclass(frozen=True)
+class StepRecord:
+    """Timing and outcome of one step attempt."""
+    step: str
+    attempt: int
+    ok: bool
+    seconds: float
+    error: str | None = None
+
+
+class StepMachine:
+    """Runs steps in order with per-step retries, rewinds and resumable checkpoints."""
+
+    def __init__(self, steps, name='steps', max_rewinds=MAX_REWINDS, sleep=time.sleep):
+        self.steps = list(steps)
+        self.name = name
+        self.max_rewinds = max_rewinds
+        self.sleep = sleep
+        self._index = {step.name: position for position, step in enumerate(self.steps)}
+        self.checkpoint = None  # name of the last completed checkpoint step
+        self.history = []  # StepRecords of the last run
+        self.results = {}  # step name -> result of its last successful attempt
+
+    def reset(self):
+        """Forget the checkpoint, so the next run starts from the first step."""
+        self.checkpoint = None
+
+    def resume_index(self):
+        """Position of the step after the last checkpoint."""
+        if self.checkpoint is None:
+            return 0
+        return self._index[self.checkpoint] + 1
+
+    def run(self, context=None, resume=True, stop_after=None):
+        """
+        Run the steps, starting after the last checkpoint when resume is set.
+        Returns the result of the last step (or of `stop_after`, which ends the
+        run early), or None when a step failed for good.
+        """
+        context = {} if context is None else context
+        self.history = []
+        position = self.resume_index() if resume else 0
+        if position:
+            logger.info(f"Resuming {self.name} after checkpoint '{self.checkpoint}'")
+        if position >= len(self.steps):
+            position = 0
+        last = len(self.steps) - 1 if stop_after is None else self._index[stop_after]
+        # The stop step runs even when the checkpoint is already past it
+        position = min(position, last)
+        attempts = {}
+        rewinds = 0
+
+        while position <= last:
+            step = self.steps[position]
+            attempt = attempts[step.name] = attempts.get(step.name, 0) + 1
+            if attempt > 1:
+                self.sleep(step.policy.delay_before(attempt))
+
+            ok, result, error = self._attempt(step, attempt, context)
+            if ok:
+                self.results[step.name] = result
+                if step.checkpoint:
+                    self.checkpoint = step.name
+                position += 1
+                continue
+
+            if attempt < step.policy.attempts:
+                logger.warning(f"{self.name} step '{step.name}' failed (attempt {attempt}/{step.policy.attempts}): {error}")
+                continue
+
+            target = step.policy.rewind_to
+            if target is None or rewinds >= self.max_rewinds:
+                logger.error(f"{self.name} step '{step.name}' failed after {attempt} attempts: {error}")
+                return None
+
+            rewinds += 1
+            position = self._index[target]
+            logger.warning(f"{self.name} step '{step.name}' kept failing; rewinding to '{target}'")
+            for later in self.steps[position:]:
+                attempts.pop(later.name, None)
+            # The rewound-to step and everything after it have to run again
+            self.checkpoint = next((earlier.name for earlier in reversed(self.steps[:position]) if earlier.checkpoint), None)
+            if self.steps[position].reset is not None:
+                self.steps[position].reset(context)
+
+        return self.results.get(self.steps[last].name)
+
+    def _attempt(self, step, attempt, context):
+        started = time.perf_counter()
+        result = error = None
+        with span(f"{self.name}.step.{step.name}", attempt=attempt):
+            try:
+                result = step.run(context)
+            except Exception as e:
+                error = str(e) or type(e).__name__
+        ok = bool(result)
+        if not ok and error is None:
+            error = 'step returned no result'
+        self.history.append(StepRecord(step.name, attempt, ok, time.perf_counter() - started, None if ok else error))
+        return ok, result, error
+
+    def summary(self):
+        """One line per attempt of the last run, for logs."""
+        return '\n'.join(f"{record.step:<14} attempt {record.attempt}  {'ok' if record.ok else 'FAILED':<6} "
+                         f"{record.seconds:7.2f}s" + (f"  {record.error}" if record.error else '')
+                         for record in self.history)
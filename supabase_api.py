@@ -6,12 +6,12 @@ This module provides all backend routes that interact with the Supabase database
 from flask import Blueprint, request, jsonify
 import logging
 from supabase_client import SupabaseClient
-from enhanced_parser import EnhancedParser
-# The enhanced_scraper module exposes the CcsScraper class which provides
-# all scraping capabilities. The previous import used a non-existent
-# `EnhancedScraper` name which would raise an ImportError at runtime.
-from enhanced_scraper import CcsScraper
+from schedule_parser import parse_schedule, ScheduleFormatError
+from schedule_records import Pairing
 from google_client import get_google_auth_url, get_credentials_from_code, create_google_calendar_service, add_events_to_calendar
+from notification_dispatcher import NotificationDispatcher, find_crew_matches
+from sync_state import SupabaseSyncStateStore
+from instrumentation import upstream_call
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -20,17 +20,41 @@ logger = logging.getLogger(__name__)
 # Create a Flask Blueprint
 supabase_api_blueprint = Blueprint('supabase_api', __name__)
 
-# Get Supabase client
-try:
-    supabase = SupabaseClient.get_client()
-except Exception as e:
-    logger.error(f"Failed to initialize Supabase client: {e}")
-    supabase = None
+# Supabase client, created on first use so importing this module stays cheap.
+# Tests may assign a client here directly.
+_UNSET = object()
+supabase = _UNSET
+
+def get_supabase():
+    """Return the Supabase client, creating it on first use (None if it cannot be created)."""
+    global supabase
+    if supabase is _UNSET:
+        try:
+            supabase = SupabaseClient.get_client()
+        except Exception as e:
+            logger.error(f"Failed to initialize Supabase client: {e}")
+            supabase = None
+    return supabase
+
+# Natural key of a pairing, backed by a unique index (migrations/0002)
+PAIRINGS_UPSERT_KEY = 'user_id,pairing_code,start_date'
+
+# One dispatcher per process so digests from concurrent syncs share a batch queue.
+# Created on first use; tests may assign a dispatcher here directly.
+notification_dispatcher = None
+
+def get_notification_dispatcher():
+    """Return the dispatcher, keeping notified matches in public.sync_state so dedup survives restarts."""
+    global notification_dispatcher
+    if notification_dispatcher is None:
+        notification_dispatcher = NotificationDispatcher(state_store=SupabaseSyncStateStore(get_supabase()))
+    return notification_dispatcher
 
 # --- User Authentication Routes ---
 
 @supabase_api_blueprint.route('/auth/signup', methods=['POST'])
 def signup():
+    supabase = get_supabase()
     if not supabase:
         return jsonify({"error": "Database connection not configured"}), 500
     
@@ -43,15 +67,16 @@ def signup():
         return jsonify({"error": "Email, password, and username are required"}), 400
 
     try:
-        res = supabase.auth.sign_up({
-            "email": email,
-            "password": password,
-            "options": {
-                "data": {
-                    "username": username
+        with upstream_call('supabase', 'auth.sign_up'):
+            res = supabase.auth.sign_up({
+                "email": email,
+                "password": password,
+                "options": {
+                    "data": {
+                        "username": username
+                    }
                 }
-            }
-        })
+            })
         return jsonify(res.data), 200
     except Exception as e:
         logger.error(f"Signup error: {e}")
@@ -59,6 +84,7 @@ def signup():
 
 @supabase_api_blueprint.route('/auth/login', methods=['POST'])
 def login():
+    supabase = get_supabase()
     if not supabase:
         return jsonify({"error": "Database connection not configured"}), 500
 
@@ -70,7 +96,8 @@ def login():
         return jsonify({"error": "Email and password are required"}), 400
 
     try:
-        res = supabase.auth.sign_in_with_password({"email": email, "password": password})
+        with upstream_call('supabase', 'auth.sign_in'):
+            res = supabase.auth.sign_in_with_password({"email": email, "password": password})
         return jsonify(res.data), 200
     except Exception as e:
         logger.error(f"Login error: {e}")
@@ -78,6 +105,7 @@ def login():
 
 @supabase_api_blueprint.route('/auth/logout', methods=['POST'])
 def logout():
+    supabase = get_supabase()
     if not supabase:
         return jsonify({"error": "Database connection not configured"}), 500
 
@@ -95,44 +123,69 @@ def logout():
 
 @supabase_api_blueprint.route('/sync/ccs', methods=['POST'])
 def sync_from_ccs():
+    supabase = get_supabase()
     if not supabase:
         return jsonify({"error": "Database connection not configured"}), 500
 
     data = request.get_json()
     html_content = data.get('html_content')
     user_id = data.get('user_id') # This should be securely obtained from the auth token
+    notify = data.get('notify') # Optional: email a digest of crew-list matches to the account's address
 
     if not html_content or not user_id:
         return jsonify({"error": "HTML content and user ID are required"}), 400
 
     try:
-        parser = EnhancedParser(html_content)
-        pairings_data = parser.parse()
-
-        # Here you would insert/update the data in Supabase
-        # This is a simplified example
-        for pairing in pairings_data:
-            # Check if pairing exists
-            existing = supabase.table('pairings').select('id').eq('pairing_code', pairing['pairing_code']).eq('user_id', user_id).execute()
-            
-            if not existing.data:
-                supabase.table('pairings').insert({
-                    'user_id': user_id,
-                    'pairing_code': pairing['pairing_code'],
-                    'start_date': pairing['start_date'],
-                    'end_date': pairing['end_date'],
-                    # ... other fields
-                }).execute()
-
-        return jsonify({"message": f"Successfully synced {len(pairings_data)} pairings."}), 200
+        pairings = parse_schedule(html_content).pairings
+
+        # Upsert all pairings in one round trip, keyed on the natural key
+        # (user_id, pairing_code, start_date) so re-syncing is idempotent
+        rows = [dict(zip(Pairing.ROW_COLUMNS, pairing.to_row(user_id))) for pairing in pairings]
+        if rows:
+            with upstream_call('supabase', 'pairings.upsert'):
+                supabase.table('pairings').upsert(rows, on_conflict=PAIRINGS_UPSERT_KEY).execute()
+
+        if notify:
+            notify_crew_matches(user_id, [pairing.to_dict() for pairing in pairings])
+
+        return jsonify({"message": f"Successfully synced {len(pairings)} pairings."}), 200
+    except ScheduleFormatError as e:
+        logger.warning(f"CCS sync rejected: {e}")
+        return jsonify({"error": "Unrecognized schedule format"}), 400
     except Exception as e:
         logger.error(f"CCS sync error: {e}")
         return jsonify({"error": "Failed to parse and sync schedule"}), 500
 
+def notify_crew_matches(user_id, pairings_data):
+    """
+    Queue a digest of new crew-list matches from this sync for the user's
+    account email; it is sent in the background with other users' digests.
+    """
+    try:
+        with upstream_call('supabase', 'auth.admin.get_user_by_id'):
+            email = get_supabase().auth.admin.get_user_by_id(user_id).user.email
+        if not email:
+            logger.warning(f"No email address on the account of user {user_id}; skipping notification")
+            return
+        with upstream_call('supabase', 'user_crew_lists.select'):
+            res = get_supabase().table('user_crew_lists').select('list_type, crew_members(employee_id, name)').eq('user_id', user_id).execute()
+        crew_lists = [
+            {'list_type': row['list_type'], 'employee_id': (row.get('crew_members') or {}).get('employee_id')}
+            for row in res.data
+        ]
+        matches = find_crew_matches(pairings_data, crew_lists)
+        dispatcher = get_notification_dispatcher()
+        if dispatcher.queue_sync(user_id, email, matches):
+            dispatcher.flush_later()
+    except Exception as e:
+        # Notifications are best effort and must never fail the sync itself
+        logger.error(f"Crew match notification error: {e}")
+
 # --- Data Fetching Routes ---
 
 @supabase_api_blueprint.route('/pairings', methods=['GET'])
 def get_pairings():
+    supabase = get_supabase()
     if not supabase:
         return jsonify({"error": "Database connection not configured"}), 500
 
@@ -148,7 +201,8 @@ def get_pairings():
     user_id = parts[1]
 
     try:
-        res = supabase.table('pairings').select('*').eq('user_id', user_id).order('start_date', desc=True).execute()
+        with upstream_call('supabase', 'pairings.select'):
+            res = supabase.table('pairings').select('*').eq('user_id', user_id).order('start_date', desc=True).execute()
         return jsonify(res.data), 200
     except Exception as e:
         logger.error(f"Error fetching pairings: {e}")
@@ -179,6 +233,7 @@ def calendar_callback():
 
 @supabase_api_blueprint.route('/calendar/push', methods=['POST'])
 def calendar_push():
+    supabase = get_supabase()
     if not supabase:
         return jsonify({"error": "Database connection not configured"}), 500
 
@@ -191,7 +246,8 @@ def calendar_push():
 
     try:
         # Fetch pairings from Supabase
-        pairings_res = supabase.table('pairings').select('*').eq('user_id', user_id).execute()
+        with upstream_call('supabase', 'pairings.select'):
+            pairings_res = supabase.table('pairings').select('*').eq('user_id', user_id).execute()
         pairings = pairings_res.data
 
         # Create Google Calendar service
@@ -1,29 +1,225 @@
+"""
+Supabase client provider for CCS Hyper.
+One SupabaseClientProvider per process owns a pooled httpx client (keep-alive,
+HTTP/2 when the `h2` package is installed, timeouts) and creates the
+service-role Supabase client on first use, under a lock so concurrent
+requests in a threaded server never build two. User-scoped PostgREST
+clients for RLS-checked queries share the same connection pool, so they
+don't pay a new TLS handshake per request.
+
+Connection failures are retried in the transport while a retry budget
+allows: each request earns a fraction of a retry, so an outage can't
+multiply the load on Supabase. Error responses (e.g. 503) are left to
+postgrest's own retries of idempotent requests.
+
+Usage:
+    supabase = SupabaseClient.get_client()           # service role
+    rows = get_provider().for_user(access_token).from_('pairings').select('*').execute()
+"""
+
 import os
-from supabase import create_client, Client
+import time
+import logging
+import threading
+import importlib.util
+
 from dotenv import load_dotenv
 
+from instrumentation import registry
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+SUPABASE_POOL_SIZE = int(os.environ.get('SUPABASE_POOL_SIZE', '20'))  # connections per process
+SUPABASE_KEEPALIVE = int(os.environ.get('SUPABASE_KEEPALIVE', '10'))  # idle connections kept open
+SUPABASE_KEEPALIVE_EXPIRY_S = float(os.environ.get('SUPABASE_KEEPALIVE_EXPIRY_S', '30'))
+SUPABASE_TIMEOUT_S = float(os.environ.get('SUPABASE_TIMEOUT_S', '10'))
+SUPABASE_CONNECT_TIMEOUT_S = float(os.environ.get('SUPABASE_CONNECT_TIMEOUT_S', '5'))
+SUPABASE_RETRIES = int(os.environ.get('SUPABASE_RETRIES', '2'))  # per request
+SUPABASE_RETRY_RATIO = float(os.environ.get('SUPABASE_RETRY_RATIO', '0.2'))  # retries earned per request
+SUPABASE_HTTP2 = os.environ.get('SUPABASE_HTTP2', 'auto')  # 'auto', '1' or '0'
+RETRY_BUDGET_RESERVE = 10  # retries always available, e.g. right after startup
+RETRY_BACKOFF_S = 0.1
+REST_PATH = '/rest/v1'
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}
+
+SUPABASE_RETRIES_TOTAL = registry.counter(
+    'ccs_supabase_retries_total', 'Supabase connection failures retried, or not retried because the retry budget was spent.',
+    ('outcome',))
+
+
+def http2_available():
+    return importlib.util.find_spec('h2') is not None
+
+
+class RetryBudget:
+    """Token bucket of retries: each request deposits `ratio` of a retry, each retry spends one."""
+
+    def __init__(self, ratio=SUPABASE_RETRY_RATIO, reserve=RETRY_BUDGET_RESERVE):
+        self.ratio = ratio
+        self.capacity = reserve
+        self.tokens = float(reserve)
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + self.ratio)
+
+    def withdraw(self):
+        """Take one retry; False when the budget is spent."""
+        with self._lock:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+class RetryingTransport:
+    """
+    httpx transport that retries connection failures within a RetryBudget.
+    Failures to connect are retried for every method (nothing was sent);
+    errors on an established connection, e.g. a keep-alive connection the
+    server had closed, only for idempotent methods.
+    """
+
+    def __init__(self, transport, retries=SUPABASE_RETRIES, budget=None, sleep=time.sleep):
+        self.transport = transport
+        self.retries = retries
+        self.budget = budget or RetryBudget()
+        self.sleep = sleep
+
+    def handle_request(self, request):
+        import httpx
+        self.budget.deposit()
+        attempt = 0
+        while True:
+            try:
+                return self.transport.handle_request(request)
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as e:
+                error, retryable = e, True
+            except (httpx.RemoteProtocolError, httpx.ReadError, httpx.WriteError) as e:
+                error, retryable = e, request.method in IDEMPOTENT_METHODS
+            if not retryable or attempt >= self.retries:
+                raise error
+            if not self.budget.withdraw():
+                SUPABASE_RETRIES_TOTAL.inc(outcome='budget_exhausted')
+                raise error
+            attempt += 1
+            SUPABASE_RETRIES_TOTAL.inc(outcome='retried')
+            logger.warning(f"Supabase {request.method} {request.url.path} failed ({type(error).__name__}: {error}); "
+                           f"retry {attempt}/{self.retries}")
+            self.sleep(RETRY_BACKOFF_S * 2 ** (attempt - 1))
+
+    def close(self):
+        self.transport.close()
+
+    def __enter__(self):
+        self.transport.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.transport.__exit__(*exc_info)
+
+
+class SupabaseClientProvider:
+    """Lazily creates the pooled HTTP client, the service-role client and user-scoped PostgREST clients."""
+
+    def __init__(self, url=None, key=None, anon_key=None, pool_size=SUPABASE_POOL_SIZE,
+                 keepalive=SUPABASE_KEEPALIVE, timeout=SUPABASE_TIMEOUT_S, retries=SUPABASE_RETRIES,
+                 http2=None, transport=None):
+        """transport replaces the network transport (e.g. httpx.MockTransport in tests)."""
+        load_dotenv()  # Load environment variables from .env file
+        self.url = (url or os.environ.get('SUPABASE_URL') or '').rstrip('/')
+        self.key = key or os.environ.get('SUPABASE_SERVICE_ROLE_KEY')  # Use service role for backend operations
+        self.anon_key = anon_key or os.environ.get('SUPABASE_ANON_KEY')  # never the service key: it bypasses RLS
+        self.pool_size = pool_size
+        self.keepalive = keepalive
+        self.timeout = timeout
+        self.retries = retries
+        if http2 is None:
+            http2 = http2_available() if SUPABASE_HTTP2 == 'auto' else SUPABASE_HTTP2 == '1'
+        self.http2 = http2
+        self.transport = transport
+        self._http = None
+        self._client = None
+        self._lock = threading.Lock()
+
+    def http_client(self):
+        """The shared, pooled httpx client."""
+        if self._http is None:
+            with self._lock:
+                if self._http is None:
+                    self._http = self._build_http_client()
+        return self._http
+
+    def _build_http_client(self):
+        import httpx
+        if self.http2 and not http2_available():
+            logger.warning("HTTP/2 requested but the h2 package is not installed; using HTTP/1.1")
+            self.http2 = False
+        limits = httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.keepalive,
+                              keepalive_expiry=SUPABASE_KEEPALIVE_EXPIRY_S)
+        transport = self.transport or httpx.HTTPTransport(http2=self.http2, limits=limits)
+        return httpx.Client(
+            transport=RetryingTransport(transport, retries=self.retries),
+            timeout=httpx.Timeout(self.timeout, connect=SUPABASE_CONNECT_TIMEOUT_S),
+            follow_redirects=True,
+        )
+
+    def get_client(self):
+        """The service-role Supabase client, created on first use."""
+        if self._client is None:
+            http = self.http_client()
+            with self._lock:
+                if self._client is None:
+                    if not self.url or not self.key:
+                        raise ValueError("Supabase URL and Service Role Key must be set in environment variables.")
+                    # Imported here: the supabase package is slow to import and only needed once a client is made
+                    from supabase import create_client
+                    from supabase.lib.client_options import SyncClientOptions
+                    self._client = create_client(self.url, self.key, SyncClientOptions(httpx_client=http))
+                    logger.info(f"Supabase client created (pool {self.pool_size}, http2={self.http2})")
+        return self._client
+
+    def for_user(self, access_token, schema='public'):
+        """
+        PostgREST client acting as the user behind `access_token` (a Supabase
+        JWT), so row level security applies. Cheap to create per request.
+        """
+        if not self.url or not self.anon_key:
+            raise ValueError("Supabase URL and Anon Key must be set in environment variables.")
+        from postgrest import SyncPostgrestClient
+        headers = {'apikey': self.anon_key, 'Authorization': f'Bearer {access_token}'}
+        return SyncPostgrestClient(f"{self.url}{REST_PATH}", schema=schema, headers=headers,
+                                   http_client=self.http_client())
+
+    def close(self):
+        """Close the pooled connections; the next use creates new clients."""
+        with self._lock:
+            if self._http is not None:
+                self._http.close()
+            self._http = self._client = None
+
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def get_provider():
+    """The process-wide SupabaseClientProvider."""
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                _provider = SupabaseClientProvider()
+    return _provider
+
+
 class SupabaseClient:
-    _instance = None
+    """Access to the process-wide service-role client (kept for existing callers)."""
 
     @staticmethod
     def get_client():
-        """Static access method."""
-        if SupabaseClient._instance is None:
-            SupabaseClient()
-        return SupabaseClient._instance
-
-    def __init__(self):
-        """Virtually private constructor."""
-        if SupabaseClient._instance is not None:
-            raise Exception("This class is a singleton! Use get_client() to get the instance.")
-        else:
-            load_dotenv() # Load environment variables from .env file
-            
-            url = os.environ.get("SUPABASE_URL")
-            key = os.environ.get("SUPABASE_SERVICE_ROLE_KEY") # Use service role for backend operations
-            
-            if not url or not key:
-                raise ValueError("Supabase URL and Service Role Key must be set in environment variables.")
-            
-            self.client: Client = create_client(url, key)
-            SupabaseClient._instance = self.client
+        return get_provider().get_client()
@@ -1,89 +1,307 @@
 #!/usr/bin/env python3
 """
 Supabase Migration Runner
-This script automates the process of applying SQL migrations to a Supabase database.
-It reads a .sql file and executes it against the Supabase project's database.
+This script applies the versioned SQL migrations in the `migrations/` directory
+to the Supabase project's database.
+
+Each file is named `<version>_<description>.sql` and is applied at most once,
+in its own transaction. A file with a `-- migrate:no-transaction` line runs
+statement by statement in autocommit instead, which statements such as
+CREATE INDEX CONCURRENTLY require. Applied versions and their checksums are recorded in
+`public.schema_migrations`, so a deploy only executes the pending files and
+fails loudly if an already-applied file has been edited.
 """
 
 import os
+import re
 import sys
+import time
+import hashlib
+import argparse
 import logging
 import psycopg2
-from urllib.parse import urlparse
+from collections import namedtuple
 from dotenv import load_dotenv
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler("migration_runner.log"),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger(__name__)
 
+# --- Configuration ---
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+MIGRATION_FILENAME_RE = re.compile(r'^(\d+)_(\w+)\.sql$')
+DOLLAR_QUOTE_RE = re.compile(r'\$([A-Za-z_][A-Za-z0-9_]*)?\$')
+MIGRATION_LOCK_ID = 4_342_611  # pg_advisory_lock key so concurrent deploys don't race
+NO_TRANSACTION_RE = re.compile(r'^--\s*migrate:no-transaction\s*$', re.MULTILINE)
+
+SCHEMA_MIGRATIONS_DDL = """
+CREATE TABLE IF NOT EXISTS public.schema_migrations (
+  version TEXT PRIMARY KEY,
+  filename TEXT NOT NULL,
+  checksum TEXT NOT NULL,
+  execution_ms INTEGER,
+  applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+)
+"""
+
+Migration = namedtuple('Migration', ['version', 'filename', 'path', 'checksum'])
+
+
+class MigrationError(Exception):
+    """Raised when the migrations on disk don't match the database history."""
+
+
 def get_db_connection_string():
     """Construct the database connection string from environment variables."""
     load_dotenv()
-    
+
     db_url = os.getenv("SUPABASE_DB_URL")
     if not db_url:
         # Fallback for older .env files or different naming conventions
         project_id = os.getenv("SUPABASE_PROJECT_ID")
         db_password = os.getenv("SUPABASE_DB_PASSWORD")
         region = os.getenv("SUPABASE_REGION", "us-east-1")
-        
+
         if not project_id or not db_password:
             logger.error("Supabase connection details not found in environment variables.")
             logger.error("Please set SUPABASE_DB_URL or SUPABASE_PROJECT_ID and SUPABASE_DB_PASSWORD.")
             sys.exit(1)
-        
+
         db_url = f"postgresql://postgres:{db_password}@{project_id}.{region}.supabase.io:5432/postgres"
-        
+
     return db_url
 
-def run_migrations(connection_string, sql_file_path):
-    """Connect to the database and execute the SQL from the file."""
+
+def split_sql_statements(sql_script):
+    """
+    Split a SQL script into individual statements.
+
+    Semicolons inside quoted strings, quoted identifiers, comments and
+    dollar-quoted bodies (e.g. plpgsql `$$ ... $$`) do not end a statement.
+    Chunks that contain only whitespace or comments are dropped.
+    """
+    statements = []
+    start = 0
+    has_code = False
+    i = 0
+    n = len(sql_script)
+
+    while i < n:
+        ch = sql_script[i]
+        nxt = sql_script[i + 1] if i + 1 < n else ''
+
+        if ch == '-' and nxt == '-':
+            end = sql_script.find('\n', i)
+            i = n if end == -1 else end + 1
+            continue
+
+        if ch == '/' and nxt == '*':
+            depth = 1
+            i += 2
+            while i < n and depth:
+                if sql_script.startswith('/*', i):
+                    depth += 1
+                    i += 2
+                elif sql_script.startswith('*/', i):
+                    depth -= 1
+                    i += 2
+                else:
+                    i += 1
+            continue
+
+        if ch == "'":
+            # E'...' strings allow backslash escapes
+            escapes = i > 0 and sql_script[i - 1] in 'eE' and (i < 2 or not (sql_script[i - 2].isalnum() or sql_script[i - 2] == '_'))
+            i += 1
+            while i < n:
+                if escapes and sql_script[i] == '\\':
+                    i += 2
+                elif sql_script[i] == "'":
+                    if sql_script.startswith("''", i):
+                        i += 2
+                    else:
+                        break
+                else:
+                    i += 1
+            i += 1
+            has_code = True
+            continue
+
+        if ch == '"':
+            end = i + 1
+            while True:
+                end = sql_script.find('"', end)
+                if end == -1 or not sql_script.startswith('""', end):
+                    break
+                end += 2
+            i = n if end == -1 else end + 1
+            has_code = True
+            continue
+
+        if ch == '$' and not (i > 0 and (sql_script[i - 1].isalnum() or sql_script[i - 1] == '_')):
+            match = DOLLAR_QUOTE_RE.match(sql_script, i)
+            if match:
+                tag = match.group(0)
+                end = sql_script.find(tag, i + len(tag))
+                i = n if end == -1 else end + len(tag)
+                has_code = True
+                continue
+
+        if ch == ';':
+            if has_code:
+                statements.append(sql_script[start:i].strip())
+            start = i + 1
+            has_code = False
+        elif not ch.isspace():
+            has_code = True
+        i += 1
+
+    if has_code:
+        statements.append(sql_script[start:].strip())
+    return statements
+
+
+def file_checksum(path):
+    """SHA-256 of a migration file's contents."""
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def discover_migrations(migrations_dir=MIGRATIONS_DIR):
+    """Return the migrations on disk, ordered by version."""
+    migrations = {}
+    for filename in os.listdir(migrations_dir):
+        match = MIGRATION_FILENAME_RE.match(filename)
+        if not match:
+            continue
+        version = match.group(1)
+        if version in migrations:
+            raise MigrationError(f"Duplicate migration version {version}: {migrations[version].filename} and {filename}")
+        path = os.path.join(migrations_dir, filename)
+        migrations[version] = Migration(version, filename, path, file_checksum(path))
+    return [migrations[v] for v in sorted(migrations, key=int)]
+
+
+def pending_migrations(migrations, applied):
+    """
+    Return the migrations that still have to be applied.
+
+    `applied` maps version to the checksum recorded when it was applied.
+    An applied migration whose file has changed since is an error.
+    """
+    for migration in migrations:
+        recorded = applied.get(migration.version)
+        if recorded is not None and recorded != migration.checksum:
+            raise MigrationError(
+                f"Migration {migration.filename} was modified after it was applied "
+                f"(recorded checksum {recorded[:12]}, file {migration.checksum[:12]}). "
+                f"Add a new migration instead of editing an applied one."
+            )
+    return [m for m in migrations if m.version not in applied]
+
+
+def _record(cursor, migration, execution_ms):
+    cursor.execute(
+        "INSERT INTO public.schema_migrations (version, filename, checksum, execution_ms) VALUES (%s, %s, %s, %s)",
+        (migration.version, migration.filename, migration.checksum, execution_ms)
+    )
+
+
+def apply_migration(conn, migration):
+    """
+    Apply one migration file and record it, all in a single transaction.
+    A no-transaction migration runs each statement in autocommit and is
+    recorded after the last one succeeded.
+    """
+    with open(migration.path, 'r') as f:
+        script = f.read()
+    statements = split_sql_statements(script)
+    in_transaction = not NO_TRANSACTION_RE.search(script)
+
+    logger.info(f"Applying {migration.filename} ({len(statements)} statements"
+                f"{'' if in_transaction else ', outside a transaction'})")
+    started = time.perf_counter()
+    if not in_transaction:
+        conn.commit()
+        conn.autocommit = True
+    try:
+        with conn.cursor() as cursor:
+            for statement in statements:
+                try:
+                    cursor.execute(statement)
+                except psycopg2.Error as e:
+                    logger.error(f"Error executing statement in {migration.filename}: {statement[:200]}")
+                    logger.error(f"PostgreSQL Error: {e}")
+                    if not in_transaction:
+                        logger.error("Statements before it stay applied. A failed CREATE INDEX CONCURRENTLY "
+                                     "leaves an INVALID index that IF NOT EXISTS skips; drop it before re-running.")
+                    raise
+    finally:
+        conn.autocommit = False
+    execution_ms = int((time.perf_counter() - started) * 1000)
+    with conn.cursor() as cursor:
+        _record(cursor, migration, execution_ms)
+    conn.commit()
+    logger.info(f"Applied {migration.filename} in {execution_ms} ms")
+
+
+def run_migrations(connection_string, migrations_dir=MIGRATIONS_DIR, baseline=None, dry_run=False):
+    """
+    Connect to the database and apply every pending migration.
+
+    `baseline` marks all migrations up to and including that version as
+    applied without running them (for databases set up by hand before the
+    runner existed).
+    """
     conn = None
     try:
+        migrations = discover_migrations(migrations_dir)
+
         logger.info("Connecting to the Supabase database...")
         conn = psycopg2.connect(connection_string)
-        cursor = conn.cursor()
         logger.info("Connection successful.")
 
-        logger.info(f"Reading SQL migration file: {sql_file_path}")
-        with open(sql_file_path, 'r') as f:
-            sql_script = f.read()
+        with conn.cursor() as cursor:
+            # Held until the connection closes; a concurrent deploy waits here. Taken
+            # first: CREATE TABLE IF NOT EXISTS is not safe against a concurrent create.
+            cursor.execute("SELECT pg_advisory_lock(%s)", (MIGRATION_LOCK_ID,))
+            cursor.execute(SCHEMA_MIGRATIONS_DDL)
+            cursor.execute("SELECT version, checksum FROM public.schema_migrations")
+            applied = dict(cursor.fetchall())
+        conn.commit()
 
-        # Split script into individual statements to execute one by one
-        # This provides better error handling than executing the whole file at once
-        sql_commands = [cmd.strip() for cmd in sql_script.split(';') if cmd.strip()]
+        pending = pending_migrations(migrations, applied)
 
-        logger.info(f"Found {len(sql_commands)} SQL commands to execute.")
+        if baseline is not None:
+            with conn.cursor() as cursor:
+                for migration in [m for m in pending if int(m.version) <= int(baseline)]:
+                    logger.info(f"Baselining {migration.filename} as already applied")
+                    if not dry_run:
+                        _record(cursor, migration, None)
+            conn.commit()
+            pending = [m for m in pending if int(m.version) > int(baseline)]
 
-        for command in sql_commands:
+        logger.info(f"{len(applied)} migrations already applied, {len(pending)} pending.")
+
+        for migration in pending:
+            if dry_run:
+                logger.info(f"Would apply {migration.filename}")
+                continue
             try:
-                logger.info(f"Executing: {command[:80]}...") # Log first 80 chars
-                cursor.execute(command)
-            except psycopg2.Error as e:
-                logger.error(f"Error executing command: {command}")
-                logger.error(f"PostgreSQL Error: {e}")
-                conn.rollback() # Rollback on error
-                # Decide if you want to stop on first error or continue
-                # For migrations, it's often best to stop.
+                apply_migration(conn, migration)
+            except psycopg2.Error:
+                conn.rollback()
                 return False
 
-        conn.commit()
-        cursor.close()
         logger.info("All migrations applied successfully.")
         return True
 
+    except MigrationError as e:
+        logger.error(str(e))
+        return False
     except psycopg2.OperationalError as e:
         logger.error(f"Could not connect to the database: {e}")
         return False
     except FileNotFoundError:
-        logger.error(f"SQL migration file not found at: {sql_file_path}")
+        logger.error(f"Migrations directory not found at: {migrations_dir}")
         return False
     except Exception as e:
         logger.error(f"An unexpected error occurred: {e}")
@@ -93,18 +311,32 @@ def run_migrations(connection_string, sql_file_path):
             conn.close()
             logger.info("Database connection closed.")
 
+
 if __name__ == "__main__":
+    # Configure logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+        handlers=[
+            logging.FileHandler("migration_runner.log"),
+            logging.StreamHandler()
+        ]
+    )
+
+    parser = argparse.ArgumentParser(description="Apply pending Supabase migrations.")
+    parser.add_argument('--dir', default=MIGRATIONS_DIR, help="Migrations directory")
+    parser.add_argument('--baseline', help="Mark migrations up to this version as applied without running them")
+    parser.add_argument('--dry-run', action='store_true', help="List pending migrations without applying them")
+    args = parser.parse_args()
+
     logger.info("Starting Supabase migration runner script.")
-    
-    # Define the path to the migration file
-    MIGRATION_FILE = "supabase_migrations.sql"
-    
+
     # Get the connection string
     db_conn_str = get_db_connection_string()
-    
+
     # Run the migrations
-    success = run_migrations(db_conn_str, MIGRATION_FILE)
-    
+    success = run_migrations(db_conn_str, args.dir, baseline=args.baseline, dry_run=args.dry_run)
+
     if success:
         logger.info("Migration script finished successfully.")
         sys.exit(0)
@@ -0,0 +1,285 @@
+"""
+Adaptive sync planner for CCS Hyper.
+Decides when each user's CCS schedule is synced instead of polling everyone
+at a fixed rate. Each user gets an interval between SYNC_MIN_INTERVAL_S and
+SYNC_MAX_INTERVAL_S:
+
+- users whose schedule changed often in recent syncs are synced more often;
+- users with a trip starting within TRIP_WINDOW_DAYS are synced at least
+  every TRIP_INTERVAL_S (last-minute trades and reassignments);
+- on bid-award days (BID_AWARD_DAYS, days of the month) everyone is synced
+  at least every BID_AWARD_INTERVAL_S.
+
+Syncs go through TieredSync, so an unchanged schedule only costs the master
+schedule probe. Scraper load is counted in units (a probe is one unit, a
+full print-view scrape FULL_SCRAPE_COST more) and kept under
+SYNC_BUDGET_PER_HOUR: when the plan would exceed the budget, all intervals
+are stretched evenly, and a token bucket caps the syncs actually started.
+
+Usage:
+    tiered = TieredSync(SupabaseSyncStateStore(client))
+    planner = SyncPlanner(lambda user_id: tiered.sync(user_id, *credentials[user_id]))
+    planner.add_user(user_id, trips=['2025-07-14'])
+    planner.start()
+"""
+
+import os
+import time
+import logging
+import threading
+from datetime import date, datetime
+from dataclasses import dataclass, field
+
+from instrumentation import registry
+from sync_state import MemorySyncStateStore
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+SYNC_BUDGET_PER_HOUR = float(os.environ.get('SYNC_BUDGET_PER_HOUR', '240'))  # scrape units
+SYNC_MIN_INTERVAL_S = float(os.environ.get('SYNC_MIN_INTERVAL_S', '900'))
+SYNC_MAX_INTERVAL_S = float(os.environ.get('SYNC_MAX_INTERVAL_S', '21600'))
+TRIP_WINDOW_DAYS = 2
+TRIP_INTERVAL_S = 1800
+BID_AWARD_DAYS = os.environ.get('BID_AWARD_DAYS', '')  # e.g. '18-20'
+BID_AWARD_INTERVAL_S = 900
+PROBE_COST = 1.0
+FULL_SCRAPE_COST = 4.0  # on top of the probe
+HISTORY_KEY = 'sync_history'  # sync state key of the recent [timestamp, changed] pairs
+HISTORY_SIZE = 20
+CHANGE_RATE_DECAY = 0.8  # weight of each older sync in the change rate
+TICK_INTERVAL_S = 30
+
+SYNC_PLANNED_LOAD = registry.gauge(
+    'ccs_sync_planned_load', 'Expected scraper load of the sync plan, in scrape units per hour.')
+SYNC_DEFERRED = registry.counter(
+    'ccs_sync_deferred_total', 'Due syncs postponed to stay within the scraper budget.')
+
+
+def parse_days(spec):
+    """Days of the month from a spec like '18-20,25'."""
+    days = set()
+    for part in filter(None, (part.strip() for part in spec.split(','))):
+        first, _, last = part.partition('-')
+        days.update(range(int(first), int(last or first) + 1))
+    return frozenset(days)
+
+
+def change_rate(history, decay=CHANGE_RATE_DECAY):
+    """
+    Share of recent syncs that found a change, weighting newer syncs more.
+    Users without history count as 0.5 until they have some.
+    """
+    if not history:
+        return 0.5
+    weight = total = changed = 0.0
+    for _, was_changed in reversed(history):
+        weight = weight * decay if weight else 1.0
+        total += weight
+        changed += weight if was_changed else 0.0
+    return changed / total
+
+
+def days_until_next_trip(trips, today):
+    """Days from today to the start of the next trip (0 while one is under way), or None."""
+    upcoming = []
+    for start, end in trips:
+        if date.fromisoformat(end) >= today:
+            upcoming.append(max((date.fromisoformat(start) - today).days, 0))
+    return min(upcoming) if upcoming else None
+
+
+def merge_trips(trips, pairings, year, month, today):
+    """
+    Stored trips with those starting in the synced month replaced by the
+    month's pairings, so trips of other months (e.g. early next month) stay.
+    Trips that ended before today are dropped.
+    """
+    synced = f"{year:04d}-{month:02d}" if year and month else None
+    merged = {trip for trip in trips if synced is None or not trip[0].startswith(synced)}
+    merged.update((p.start_date, p.end_date or p.start_date) for p in pairings)
+    return tuple(sorted(trip for trip in merged if date.fromisoformat(trip[1]) >= today))
+
+
+@dataclass
+class UserPlan:
+    """Sync plan of one user."""
+    user_id: str
+    history: list = field(default_factory=list)  # [timestamp, changed] of recent syncs
+    trips: tuple = ()  # (start_date, end_date) ISO dates
+    interval: float = None  # seconds, before any budget stretch
+    last_at: float = None
+    syncs: int = 0
+
+
+class SyncPlanner:
+    """Plans per-user sync intervals and runs the due syncs within a global scraper budget."""
+
+    def __init__(self, sync, state_store=None, budget_per_hour=SYNC_BUDGET_PER_HOUR,
+                 min_interval=SYNC_MIN_INTERVAL_S, max_interval=SYNC_MAX_INTERVAL_S,
+                 bid_award_days=BID_AWARD_DAYS, clock=time.time):
+        """
+        sync(user_id) runs one tiered sync and returns its SyncOutcome, or
+        None when it failed.
+        """
+        self.sync = sync
+        self.state_store = state_store or MemorySyncStateStore()
+        self.budget_per_hour = budget_per_hour
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.bid_award_days = parse_days(bid_award_days) if isinstance(bid_award_days, str) else frozenset(bid_award_days)
+        self.clock = clock
+        # Up to five minutes of budget can be spent at once
+        self.capacity = max(budget_per_hour / 12, PROBE_COST + FULL_SCRAPE_COST)
+        self.tokens = self.capacity
+        self.stretch = 1.0
+        self.plans = {}
+        self._refilled_at = clock()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add_user(self, user_id, trips=()):
+        """Plan syncs for a user; their change history is loaded from the state store."""
+        history = self.state_store.get(user_id, HISTORY_KEY, [])
+        plan = UserPlan(user_id, history=[list(entry) for entry in history])
+        if history:
+            plan.last_at = history[-1][0]
+        with self._lock:
+            self.plans[user_id] = plan
+        self.set_trips(user_id, trips)
+
+    def remove_user(self, user_id):
+        with self._lock:
+            self.plans.pop(user_id, None)
+
+    def set_trips(self, user_id, trips):
+        """Upcoming trips of a user, as start dates or (start, end) date pairs."""
+        trips = tuple((trip, trip) if isinstance(trip, str) else tuple(trip) for trip in trips)
+        with self._lock:
+            plan = self.plans.get(user_id)
+            if plan is not None:
+                plan.trips = trips
+                plan.interval = self.interval_for(plan, self.clock())
+
+    def interval_for(self, plan, now):
+        """Seconds between syncs of a user, before any budget stretch."""
+        rate = change_rate(plan.history)
+        # Geometric between the bounds: a rate of 0 gives the maximum, 1 the minimum
+        interval = self.max_interval * (self.min_interval / self.max_interval) ** rate
+        today = datetime.fromtimestamp(now).date()
+        days = days_until_next_trip(plan.trips, today)
+        if days is not None and days <= TRIP_WINDOW_DAYS:
+            interval = min(interval, TRIP_INTERVAL_S)
+        if today.day in self.bid_award_days:
+            interval = min(interval, BID_AWARD_INTERVAL_S)
+        return max(self.min_interval, min(interval, self.max_interval))
+
+    def expected_cost(self, plan):
+        """Scrape units one sync of the user is expected to cost."""
+        return PROBE_COST + change_rate(plan.history) * FULL_SCRAPE_COST
+
+    def replan(self, now=None):
+        """Recompute every interval and the budget stretch; returns the planned load in units/hour."""
+        now = self.clock() if now is None else now
+        with self._lock:
+            for plan in self.plans.values():
+                plan.interval = self.interval_for(plan, now)
+            load = sum(self.expected_cost(plan) * 3600 / plan.interval for plan in self.plans.values())
+            was_stretched = self.stretch > 1.0
+            self.stretch = max(1.0, load / self.budget_per_hour) if self.budget_per_hour else 1.0
+        SYNC_PLANNED_LOAD.set(load)
+        if self.stretch > 1.0 and not was_stretched:
+            logger.warning(f"Planned sync load {load:.0f} units/h is over the budget of "
+                           f"{self.budget_per_hour:.0f}; stretching intervals by {self.stretch:.2f}x")
+        return load
+
+    def due(self, now=None):
+        """Users due for a sync, most overdue first."""
+        now = self.clock() if now is None else now
+        with self._lock:
+            overdue = []
+            for plan in self.plans.values():
+                if plan.last_at is None:
+                    overdue.append((float('inf'), plan.user_id))
+                    continue
+                ratio = (now - plan.last_at) / (plan.interval * self.stretch)
+                if ratio >= 1.0:
+                    overdue.append((ratio, plan.user_id))
+        return [user_id for _, user_id in sorted(overdue, reverse=True)]
+
+    def tick(self):
+        """Replan and run the due syncs the budget allows. Returns the user ids synced."""
+        now = self.clock()
+        self.replan(now)
+        self.tokens = min(self.capacity, self.tokens + (now - self._refilled_at) * self.budget_per_hour / 3600)
+        self._refilled_at = now
+        synced = []
+        due = self.due(now)
+        for position, user_id in enumerate(due):
+            if self.tokens < PROBE_COST:
+                SYNC_DEFERRED.inc(len(due) - position)
+                logger.info(f"Scraper budget spent; deferring {len(due) - position} due syncs")
+                break
+            self.tokens -= PROBE_COST
+            self._run(user_id)
+            synced.append(user_id)
+        return synced
+
+    def _run(self, user_id):
+        try:
+            outcome = self.sync(user_id)
+        except Exception as e:
+            logger.error(f"Sync of user {user_id} failed: {e}")
+            outcome = None
+        now = self.clock()
+        with self._lock:
+            plan = self.plans.get(user_id)
+            if plan is None:
+                return
+            # A failed sync is retried after the user's normal interval
+            plan.last_at = now
+            plan.syncs += 1
+            if outcome is None:
+                return
+            plan.history = (plan.history + [[now, bool(outcome.changed)]])[-HISTORY_SIZE:]
+            if outcome.tier == 'full':
+                self.tokens -= FULL_SCRAPE_COST
+            schedule = outcome.schedule
+            if schedule is not None:
+                plan.trips = merge_trips(plan.trips, schedule.pairings, outcome.year, outcome.month,
+                                         datetime.fromtimestamp(now).date())
+            plan.interval = self.interval_for(plan, now)
+            history = list(plan.history)
+        self.state_store.set(user_id, HISTORY_KEY, history)
+
+    def start(self, tick_interval=TICK_INTERVAL_S):
+        """Run tick() in a background thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, args=(tick_interval,), name='sync-planner', daemon=True)
+            self._thread.start()
+        return self
+
+    def _loop(self, tick_interval):
+        while not self._stop.wait(tick_interval):
+            try:
+                self.tick()
+            except Exception as e:
+                logger.error(f"Sync planner tick failed: {e}")
+
+    def stats(self):
+        """Per-user interval (after the budget stretch), change rate and syncs run."""
+        with self._lock:
+            return {plan.user_id: {'interval': plan.interval * self.stretch if plan.interval else None,
+                                   'change_rate': round(change_rate(plan.history), 3),
+                                   'syncs': plan.syncs}
+                    for plan in self.plans.values()}
+
+    def close(self):
+        """Stop the background thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
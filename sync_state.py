@@ -0,0 +1,66 @@
+"""
+Per-user sync state for CCS Hyper.
+Keeps small pieces of state between schedule syncs (e.g. which crew-list
+matches a user has already been notified about, or the fingerprint of the
+last master schedule) so each sync can be diffed against the previous one.
+
+MemorySyncStateStore lives in the process; SupabaseSyncStateStore persists
+to public.sync_state (migrations/0004) so state survives restarts and is
+shared between workers. Values must be JSON-serializable for the latter.
+"""
+
+import copy
+import logging
+import threading
+from datetime import datetime, timezone
+
+from instrumentation import upstream_call
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class MemorySyncStateStore:
+    """Thread-safe in-process store of per-user sync state values."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = {}
+
+    def get(self, user_id, key, default=None):
+        """Return the stored value for a user and key, or default."""
+        with self._lock:
+            value = self._state.get((user_id, key), default)
+            return copy.deepcopy(value)
+
+    def set(self, user_id, key, value):
+        """Store a value for a user and key, replacing any previous value."""
+        with self._lock:
+            self._state[(user_id, key)] = copy.deepcopy(value)
+
+
+class SupabaseSyncStateStore:
+    """Sync state persisted in the public.sync_state table through a Supabase client."""
+
+    def __init__(self, client, table='sync_state'):
+        self.client = client
+        self.table = table
+
+    def get(self, user_id, key, default=None):
+        """Return the stored value for a user and key, or default (also when the lookup fails)."""
+        try:
+            with upstream_call('supabase', f'{self.table}.select'):
+                res = (self.client.table(self.table).select('value')
+                       .eq('user_id', user_id).eq('key', key).limit(1).execute())
+        except Exception as e:
+            logger.error(f"Failed to read sync state {key} for {user_id}: {e}")
+            return default
+        return res.data[0]['value'] if res.data else default
+
+    def set(self, user_id, key, value):
+        """Store a value for a user and key, replacing any previous value."""
+        row = {'user_id': user_id, 'key': key, 'value': value,
+               'updated_at': datetime.now(timezone.utc).isoformat()}
+        with upstream_call('supabase', f'{self.table}.upsert'):
+            self.client.table(self.table).upsert(row, on_conflict='user_id,key').execute()
@@ -0,0 +1,119 @@
+"""
+Synthetic CCS schedule documents.
+Generates deterministic print-view and master-schedule HTML in the markup the
+parsers expect, with configurable numbers of pairings, legs and crew, for
+benchmarks and offline tests.
+"""
+
+import random
+import calendar
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from airport_timezones import AIRPORT_TIMEZONES
+
+# Airports the generator flies between, with their zones from the shared table
+AIRPORTS = {code: AIRPORT_TIMEZONES[code] for code in
+            ('ORD', 'IAH', 'DEN', 'SFO', 'LAX', 'SEA', 'EWR', 'IAD', 'BOS', 'MCO', 'HNL', 'LHR', 'FRA', 'NRT')}
+AIRCRAFT = ['319', '320', '738', '739', '752', '763', '772', '789']
+POSITIONS = ['CA', 'FO', 'FA', 'FA', 'FA', 'FA', 'FA', 'FA']
+FIRST_NAMES = ['Pat', 'Sam', 'Alex', 'Jordan', 'Casey', 'Riley', 'Morgan', 'Taylor', 'Jamie', 'Drew']
+LAST_NAMES = ['Lee', 'Roe', 'Kim', 'Patel', 'Garcia', 'Nguyen', 'Smith', 'Cohen', 'Okafor', 'Silva']
+
+
+def _hmm(minutes):
+    return f"{minutes // 60}:{minutes % 60:02d}"
+
+
+def _crew(rng, crew_size):
+    crew = []
+    for position in range(crew_size):
+        crew.append((
+            f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            POSITIONS[position % len(POSITIONS)],
+            f"U{rng.randrange(100000, 999999)}",
+        ))
+    return crew
+
+
+def generate_print_view(pairings=10, legs_per_pairing=4, crew_size=5, year=2025, month=7, seed=0):
+    """
+    Return print-view HTML with one `pairing-details` table per pairing.
+
+    Leg times are airport-local, derived from a UTC schedule, so block times
+    are consistent with the airports' time zones.
+    """
+    rng = random.Random(seed)
+    codes = list(AIRPORTS)
+    start = datetime(year, month, 1, 12, tzinfo=timezone.utc)
+    parts = ['<html><head><title>Print View</title></head><body>']
+
+    for index in range(pairings):
+        departure = start + timedelta(days=index * 2, minutes=rng.randrange(0, 600, 5))
+        local_start = departure.astimezone(ZoneInfo(AIRPORTS['ORD']))
+        parts.append('<table class="pairing-details">')
+        parts.append(f'<tr><td class="pairing-header" colspan="8">Pairing {chr(65 + index % 26)}{1000 + index} - '
+                     f'{local_start:%m/%d/%Y}</td></tr>')
+        parts.append('<tr class="flight-header"><th>Flight</th><th>Dep</th><th>Arr</th><th>Date</th>'
+                     '<th>Out</th><th>In</th><th>Equip</th><th>Block</th></tr>')
+
+        origin = 'ORD'
+        total_block = 0
+        for _ in range(legs_per_pairing):
+            destination = rng.choice([c for c in codes if c != origin])
+            block = rng.randrange(45, 600, 1)
+            arrival = departure + timedelta(minutes=block)
+            dep_local = departure.astimezone(ZoneInfo(AIRPORTS[origin]))
+            arr_local = arrival.astimezone(ZoneInfo(AIRPORTS[destination]))
+            parts.append(
+                f'<tr class="flight-row"><td>UA{rng.randrange(1, 2999)}</td><td>{origin}</td><td>{destination}</td>'
+                f'<td>{dep_local:%m/%d/%Y}</td><td>{dep_local:%H%M}</td><td>{arr_local:%H%M}</td>'
+                f'<td>{rng.choice(AIRCRAFT)}</td><td>{_hmm(block)}</td></tr>'
+            )
+            total_block += block
+            origin = destination
+            departure = arrival + timedelta(minutes=rng.randrange(45, 900, 5))
+
+        credit = max(total_block, 5 * 60 * max(1, legs_per_pairing // 2))
+        parts.append(f'<tr class="pairing-totals"><td>Block</td><td>{_hmm(total_block)}</td>'
+                     f'<td>Credit</td><td>{_hmm(credit)}</td></tr>')
+
+        parts.append('<tr class="crew-header"><th>Name</th><th>Position</th><th>Employee ID</th></tr>')
+        for name, position, employee_id in _crew(rng, crew_size):
+            parts.append(f'<tr class="crew-row"><td>{name}</td><td>{position}</td><td>{employee_id}</td></tr>')
+        parts.append('</table>')
+
+    parts.append('</body></html>')
+    return '\n'.join(parts)
+
+
+def generate_master_schedule(pairings=10, days_per_pairing=3, year=2025, month=7, seed=0):
+    """
+    Return master-schedule HTML with one `sg-data-row` per duty day.
+
+    Days wrap around the month when there are more pairing days than the
+    month has, which keeps every date valid for large documents.
+    """
+    rng = random.Random(seed)
+    days_in_month = calendar.monthrange(year, month)[1]
+    parts = ['<html><body>', f'<div class="sg-header-text">{calendar.month_name[month]} {year}</div>']
+
+    day_index = 0
+    for index in range(pairings):
+        code = f"{chr(65 + index % 26)}{1000 + index}"
+        for _ in range(days_per_pairing):
+            day = day_index % days_in_month + 1
+            day_index += 1
+            report = rng.randrange(300, 1200, 5)
+            parts.append(
+                f'<div class="sg-data-row"><div class="sg-pairing">{code}</div>'
+                f'<div class="sg-day" title="Date: {month}/{day}/{year}">{day}</div>'
+                f'<div class="sg-description-row"><div class="sg-description-label">Report:</div>'
+                f'<div class="sg-description-data">{report // 60:02d}{report % 60:02d}</div></div>'
+                f'<div class="sg-description-row"><div class="sg-description-label">Layover:</div>'
+                f'<div class="sg-description-data">{rng.choice(list(AIRPORTS))}</div></div>'
+                f'</div>'
+            )
+
+    parts.append('</body></html>')
+    return '\n'.join(parts)
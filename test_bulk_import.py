@@ -0,0 +1,87 @@
+import os
+
+import bulk_import
+
+USER_A = '0b5c4a8e-1f4e-4c1a-9a57-0d2c7e3f6a11'
+USER_B = '7d1e2f30-5a6b-4c7d-8e9f-a0b1c2d3e4f5'
+
+PRINT_VIEW = """
+<html><body>
+<table class="pairing-details">
+  <tr><td class="pairing-header">Pairing {code} - 07/0{day}/2025</td></tr>
+  <tr class="flight-row"><td>UA101</td><td>ORD</td><td>SFO</td></tr>
+  <tr class="crew-row"><td>Pat Lee</td><td>FO</td><td>U1</td></tr>
+</table>
+</body></html>
+"""
+
+
+class MemoryWriter:
+    def __init__(self, hashes=()):
+        self.hashes = set(hashes)
+        self.batches = []
+
+    def existing_hashes(self):
+        return set(self.hashes)
+
+    def write_batch(self, documents):
+        self.batches.append(list(documents))
+        self.hashes.update(digest for _, _, digest, _ in documents)
+        return sum(len(parsed) for _, _, _, parsed in documents)
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(text)
+
+
+def make_archive(root):
+    write(os.path.join(root, USER_A, 'output', 'schedule_printview_20250701_000000.html'), PRINT_VIEW.format(code='A1', day=1))
+    write(os.path.join(root, USER_A, 'output', 'schedule_printview_20250801_000000.html'), PRINT_VIEW.format(code='A2', day=2))
+    write(os.path.join(root, USER_B, 'schedule_printview_20250701_000000.html'), PRINT_VIEW.format(code='B1', day=3))
+    # Same content saved twice is only imported once
+    write(os.path.join(root, USER_B, 'copy', 'schedule_printview_20250701_000001.html'), PRINT_VIEW.format(code='B1', day=3))
+    write(os.path.join(root, USER_B, 'notes.html'), '<html></html>')
+
+
+def test_archive_is_parsed_and_written_in_batches(tmp_path):
+    make_archive(str(tmp_path))
+    writer = MemoryWriter()
+    reporter = bulk_import.run_import(str(tmp_path), writer, workers=2, batch_docs=2)
+
+    documents = [doc for batch in writer.batches for doc in batch]
+    assert sorted((user, parsed[0][0]) for user, _, _, parsed in documents) == [
+        (USER_A, 'A1'), (USER_A, 'A2'), (USER_B, 'B1')]
+    assert all(len(batch) <= 2 for batch in writer.batches)
+    assert reporter.docs == 3
+    assert reporter.skipped == 1
+
+
+def test_rerun_skips_already_imported_content(tmp_path):
+    make_archive(str(tmp_path))
+    writer = MemoryWriter()
+    bulk_import.run_import(str(tmp_path), writer, workers=1)
+    writer.batches.clear()
+
+    reporter = bulk_import.run_import(str(tmp_path), writer, workers=1)
+    assert writer.batches == []
+    assert reporter.skipped == 4
+
+
+def test_user_directories_are_normalised_to_canonical_uuids(tmp_path):
+    root = str(tmp_path)
+    write(os.path.join(root, '{' + USER_A.upper() + '}', 'schedule_printview_1.html'), PRINT_VIEW.format(code='A1', day=1))
+    write(os.path.join(root, USER_B.replace('-', ''), 'schedule_printview_1.html'), PRINT_VIEW.format(code='B1', day=2))
+    write(os.path.join(root, 'lost+found', 'schedule_printview_1.html'), PRINT_VIEW.format(code='X1', day=3))
+    assert [user for user, _ in bulk_import.iter_archive(root)] == [USER_B, USER_A]
+
+
+def test_parse_document_returns_compact_tuples(tmp_path):
+    path = str(tmp_path / 'schedule_printview_1.html')
+    write(path, PRINT_VIEW.format(code='A1', day=1))
+    code, start, end, block, credit, flights, crew = bulk_import.parse_document(path)[0]
+    assert (code, start, end) == ('A1', '2025-07-01', '2025-07-02')  # end dates are exclusive
+    assert (block, credit) == (None, None)
+    assert flights[0][:3] == ('UA101', 'ORD', 'SFO')
+    assert crew == (('U1', 'Pat Lee', 'FO'),)
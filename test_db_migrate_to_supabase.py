@@ -0,0 +1,142 @@
+import sqlite3
+
+import db_migrate_to_supabase as migrator
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.result = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def copy_expert(self, sql, payload):
+        self.conn.pending.append((sql, payload.read()))
+
+    def execute(self, sql, params=None):
+        if sql.startswith('SELECT last_rowid'):
+            self.result = self.conn.checkpoints.get(params[0])
+        elif 'migration_checkpoints' in sql:
+            self.conn.pending_checkpoint = params
+
+    def fetchone(self):
+        return self.result
+
+
+class FakePostgres:
+    """Records COPY payloads and checkpoints, applying them only on commit."""
+
+    def __init__(self, fail_after_commits=None):
+        self.copies = []
+        self.checkpoints = {}
+        self.pending = []
+        self.pending_checkpoint = None
+        self.commits = 0
+        self.fail_after_commits = fail_after_commits
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        if self.fail_after_commits is not None and self.commits >= self.fail_after_commits:
+            raise migrator.psycopg2.OperationalError("connection lost")
+        self.copies.extend(self.pending)
+        if self.pending_checkpoint:
+            name, last_rowid, copied = self.pending_checkpoint
+            self.checkpoints[name] = (last_rowid, copied)
+        self.pending, self.pending_checkpoint = [], None
+        self.commits += 1
+
+    def rollback(self):
+        self.pending, self.pending_checkpoint = [], None
+
+
+def make_sqlite(rows=7):
+    conn = sqlite3.connect(':memory:')
+    conn.execute("CREATE TABLE pairings (id INTEGER PRIMARY KEY, user_id INTEGER, pairing_code TEXT, start_date TEXT, "
+                 "end_date TEXT, block_time INTEGER, credit_time INTEGER, trip_value TEXT, created_at TEXT)")
+    conn.execute("CREATE TABLE flights (id INTEGER PRIMARY KEY, pairing_id INTEGER, flight_number TEXT, "
+                 "departure_airport TEXT, arrival_airport TEXT, scheduled_departure TEXT, scheduled_arrival TEXT, "
+                 "aircraft_type TEXT, actual_departure TEXT, actual_arrival TEXT, notes TEXT)")
+    conn.execute("CREATE TABLE flight_crew (id INTEGER PRIMARY KEY, flight_id INTEGER, crew_member_id INTEGER, position TEXT)")
+    for i in range(1, rows + 1):
+        conn.execute("INSERT INTO pairings VALUES (?, ?, ?, '2025-07-01', '2025-07-03', 600, NULL, 'a\tb', NULL)",
+                     (i, 1 if i % 3 else 2, f"P{i}"))
+        conn.execute("INSERT INTO flights (id, pairing_id, flight_number, departure_airport, arrival_airport, "
+                     "scheduled_departure, scheduled_arrival) VALUES (?, ?, 'UA1', 'ORD', 'SFO', 'x', 'y')", (i, i))
+        conn.execute("INSERT INTO flight_crew VALUES (?, ?, 1, 'CA')", (i, i))
+    return conn
+
+
+def specs(sqlite_conn=None, user_id_map=None):
+    user_id_map = {'1': 'user-uuid-1'} if user_id_map is None else user_id_map
+    skipped_ids = migrator.find_skipped_ids(sqlite_conn, user_id_map) if sqlite_conn else None
+    return {spec.name: spec for spec in migrator.build_table_specs(user_id_map, skipped_ids)}
+
+
+def test_rows_are_streamed_in_chunks_with_mapped_ids():
+    pg = FakePostgres()
+    copied = migrator.migrate_table(make_sqlite(), pg, specs()['pairings'], chunk_size=3)
+
+    # user 2 is not in the user map, so its rows (3 and 6) are skipped
+    assert copied == 5
+    assert len(pg.copies) == 3
+    assert pg.checkpoints['pairings'] == (7, 5)
+
+    first_row = pg.copies[0][1].splitlines()[0].split('\t')
+    assert first_row[0] == migrator.uuid_for('pairings')(1)
+    assert first_row[1] == 'user-uuid-1'
+    assert first_row[6] == '\\N'
+    assert first_row[7] == 'a\\tb'
+    # created_at is NOT NULL in Supabase, so a missing one gets the migration time
+    assert first_row[8].startswith('20') and first_row[8] != '\\N'
+
+
+def test_foreign_keys_map_to_the_same_uuids():
+    pg = FakePostgres()
+    migrator.migrate_table(make_sqlite(), pg, specs()['flights'], chunk_size=100)
+    flight = pg.copies[0][1].splitlines()[0].split('\t')
+    assert flight[1] == migrator.uuid_for('pairings')(1)
+
+
+def test_resume_continues_after_last_committed_chunk():
+    sqlite_conn = make_sqlite()
+    pg = FakePostgres(fail_after_commits=2)  # checkpoint lookup + first chunk
+    try:
+        migrator.migrate_table(sqlite_conn, pg, specs()['pairings'], chunk_size=3)
+    except migrator.psycopg2.OperationalError:
+        pass
+    assert pg.checkpoints['pairings'] == (3, 2)
+
+    pg.fail_after_commits = None
+    assert migrator.migrate_table(sqlite_conn, pg, specs()['pairings'], chunk_size=3) == 5
+    codes = [line.split('\t')[2] for _, payload in pg.copies for line in payload.splitlines()]
+    assert codes == ['P1', 'P2', 'P4', 'P5', 'P7']
+
+
+def test_tables_are_grouped_by_dependency_level():
+    levels = migrator.dependency_levels(list(specs().values()))
+    names = [sorted(spec.name for spec in level) for level in levels]
+    assert names[0] == ['crew_members', 'pairings', 'statistics']
+    assert names[1] == ['flights', 'user_crew_lists']
+    assert names[2] == ['flight_crew']
+
+
+def test_children_of_skipped_pairings_are_skipped():
+    sqlite_conn = make_sqlite()
+    tables = specs(sqlite_conn)
+    pg = FakePostgres()
+    # Pairings 3 and 6 belong to unmapped user 2, and so do their flights and crew
+    assert migrator.migrate_table(sqlite_conn, pg, tables['flights']) == 5
+    assert migrator.migrate_table(sqlite_conn, pg, tables['flight_crew']) == 5
+    flight_ids = {line.split('\t')[1] for line in pg.copies[0][1].splitlines()}
+    assert flight_ids == {migrator.uuid_for('pairings')(i) for i in (1, 2, 4, 5, 7)}
+
+    # Without a user map nothing owned by a user, directly or not, is copied
+    tables = specs(sqlite_conn, user_id_map={})
+    assert migrator.migrate_table(sqlite_conn, FakePostgres(), tables['flights']) == 0
+    assert migrator.migrate_table(sqlite_conn, FakePostgres(), tables['flight_crew']) == 0
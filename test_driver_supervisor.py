@@ -0,0 +1,128 @@
+import os
+import subprocess
+import sys
+
+import driver_supervisor
+from driver_supervisor import DriverSupervisor
+
+
+class FakeScraper:
+    """Stands in for CcsScraper, with a sleeping child process as its 'driver'."""
+
+    def __init__(self):
+        self.process = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)'])
+        self.driver = self.process
+        self.closed = False
+
+    @property
+    def driver_pid(self):
+        return self.process.pid if self.driver else None
+
+    def session_alive(self):
+        return not self.closed and self.process.poll() is None
+
+    def close(self):
+        self.closed = True
+        self.process.kill()
+        self.process.wait()
+        self.driver = None
+
+
+def test_tree_rss_includes_children():
+    child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)'])
+    try:
+        rss, processes = driver_supervisor.tree_rss_bytes(os.getpid())
+        assert processes >= 2 and rss > driver_supervisor.rss_bytes(os.getpid())
+        assert child.pid in driver_supervisor.process_tree(os.getpid())
+    finally:
+        child.kill()
+        child.wait()
+
+
+def test_orphans_are_driver_processes_without_a_parent(monkeypatch):
+    monkeypatch.setattr(driver_supervisor, '_owned_by_us', lambda pid: True)
+    me = os.getpid()
+    table = {
+        100: (1, 'chromedriver', '/usr/bin/chromedriver --port=4444'),
+        101: (100, 'chrome', '/opt/chrome --enable-automation'),
+        200: (1, 'chrome', '/opt/chrome --type=browser'),  # a regular browser
+        300: (me, 'chromedriver', 'chromedriver'),  # our own driver
+        400: (999, 'chrome', '/opt/chrome --remote-debugging-port=0'),  # parent gone
+    }
+    assert sorted(driver_supervisor.find_orphans(table)) == [100, 400]
+
+
+def test_orphans_reparented_to_a_subreaper_are_found(monkeypatch):
+    monkeypatch.setattr(driver_supervisor, '_owned_by_us', lambda pid: True)
+    table = {
+        50: (1, 'tini', 'tini -- worker'),
+        60: (50, 'python3.12', 'python3.12 worker.py'),
+        100: (50, 'chromedriver', 'chromedriver --port=4444'),  # its worker exited
+        101: (100, 'chrome', '/opt/chrome --enable-automation'),
+        102: (101, 'chrome', '/opt/chrome --type=renderer --enable-automation'),
+        200: (60, 'chromedriver', 'chromedriver --port=5555'),  # a live worker's driver
+        201: (200, 'chrome', '/opt/chrome --enable-automation'),
+    }
+    assert driver_supervisor.find_orphans(table) == [100]
+    killed = []
+    monkeypatch.setattr(driver_supervisor.os, 'kill', lambda pid, sig: killed.append(pid))
+    assert driver_supervisor.reap_orphans(table) == killed == [102, 101, 100]
+
+
+def test_recycle_only_kills_driver_processes_still_running(monkeypatch):
+    me = os.getpid()
+    before = {
+        10: (me, 'chromedriver', 'chromedriver --port=4444'),
+        11: (10, 'chrome', '/opt/chrome --enable-automation'),
+        12: (11, 'chrome', '/opt/chrome --type=renderer'),
+        13: (10, 'sh', 'sh -c true'),
+    }
+    # After quit(): the driver's pid was reused, one renderer is left over
+    after = {
+        10: (1, 'python3', 'python3 other.py'),
+        12: (1, 'chrome', '/opt/chrome --type=renderer'),
+    }
+    tables = iter([before, after])
+    monkeypatch.setattr(driver_supervisor, 'process_table', lambda: next(tables))
+    killed = []
+    monkeypatch.setattr(driver_supervisor.os, 'kill', lambda pid, sig: killed.append(pid))
+
+    class QuitScraper:
+        driver = object()
+        driver_pid = 10
+        closed = False
+
+        def close(self):
+            self.closed = True
+
+    supervisor = DriverSupervisor(factory=QuitScraper, reap=False)
+    entry = supervisor._new_entry()
+    supervisor.recycle(entry, 'age')
+    assert entry.scraper.closed and killed == [12]
+
+
+def test_drivers_are_reused_until_they_exceed_a_budget():
+    supervisor = DriverSupervisor(factory=FakeScraper, reap=False)
+    with supervisor.lease() as first:
+        pass
+    with supervisor.lease() as second:
+        assert second is first
+    assert supervisor.stats()[0]['processes'] == 1
+
+    supervisor.max_rss = 1  # every driver is now over budget
+    with supervisor.lease() as third:
+        pass
+    assert first.closed and third is not first
+    assert supervisor.stats() == []
+    assert driver_supervisor.DRIVER_RECYCLES.value(reason='memory') >= 1
+
+
+def test_failed_lease_recycles_the_driver():
+    supervisor = DriverSupervisor(factory=FakeScraper, reap=False)
+    try:
+        with supervisor.lease() as scraper:
+            raise RuntimeError('boom')
+    except RuntimeError:
+        pass
+    assert scraper.closed
+    supervisor.close()
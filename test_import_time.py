@@ -0,0 +1,38 @@
+import os
+import sys
+import subprocess
+
+import pytest
+
+# Slow-to-import packages the web apps must only load once a request needs them (cold starts)
+DEFERRED_PACKAGES = ('selenium', 'webdriver_manager', 'supabase', 'postgrest', 'gotrue', 'googleapiclient',
+                     'google_auth_oauthlib', 'google.oauth2', 'bs4', 'requests')
+IMPORT_BUDGET_MS = float(os.environ.get('IMPORT_BUDGET_MS', '750'))
+
+
+def import_times(module):
+    """{module name: cumulative import time in ms} of importing `module` in a fresh interpreter."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr[-2000:]
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative) / 1000
+    return times
+
+
+@pytest.mark.parametrize('module', ['app', 'supabase_api'])
+def test_web_app_import_defers_heavy_packages(module):
+    times = import_times(module)
+    loaded = sorted(name for name in times
+                    if any(name == package or name.startswith(package + '.') for package in DEFERRED_PACKAGES))
+    assert not loaded, f"importing {module} loads {loaded}"
+
+
+def test_app_import_time_budget():
+    # Best of three, to ride out a busy machine
+    best = min(import_times('app')['app'] for _ in range(3))
+    assert best < IMPORT_BUDGET_MS, f"importing app took {best:.0f}ms (budget {IMPORT_BUDGET_MS:.0f}ms)"
@@ -0,0 +1,66 @@
+import pytest
+from flask import Flask
+
+import instrumentation
+from instrumentation import MetricsRegistry, span, current_span, upstream_call
+
+
+def test_nested_spans_share_trace_and_link_parent():
+    with span('outer') as outer:
+        with span('inner') as inner:
+            assert current_span() is inner
+        assert current_span() is outer
+    assert current_span() is None
+    assert inner.trace is outer.trace
+    assert inner.parent is outer
+    assert [s.name for s in outer.trace.finished] == ['inner', 'outer']
+
+
+def test_span_records_error_status():
+    before = instrumentation.SPAN_DURATION.count(span='failing', status='error')
+    with pytest.raises(ValueError):
+        with span('failing'):
+            raise ValueError('boom')
+    assert instrumentation.SPAN_DURATION.count(span='failing', status='error') == before + 1
+
+
+def test_upstream_call_counts_outcomes():
+    counter = instrumentation.UPSTREAM_CALLS
+    ok_before = counter.value(service='test', operation='op', status='ok')
+    error_before = counter.value(service='test', operation='op', status='error')
+    with upstream_call('test', 'op'):
+        pass
+    with pytest.raises(RuntimeError):
+        with upstream_call('test', 'op'):
+            raise RuntimeError('down')
+    assert counter.value(service='test', operation='op', status='ok') == ok_before + 1
+    assert counter.value(service='test', operation='op', status='error') == error_before + 1
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    histogram = registry.histogram('demo_seconds', 'Demo.', ('route',), buckets=(0.1, 1.0))
+    histogram.observe(0.05, route='/a')
+    histogram.observe(0.5, route='/a')
+    text = registry.render()
+    assert 'demo_seconds_bucket{route="/a",le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{route="/a",le="1.0"} 2' in text
+    assert 'demo_seconds_bucket{route="/a",le="+Inf"} 2' in text
+    assert 'demo_seconds_count{route="/a"} 2' in text
+
+
+def test_metrics_endpoint_reports_requests():
+    app = Flask(__name__)
+    instrumentation.init_app(app)
+
+    @app.route('/ping')
+    def ping():
+        return 'pong'
+
+    with app.test_client() as client:
+        assert client.get('/ping').status_code == 200
+        resp = client.get('/metrics')
+    assert resp.status_code == 200
+    body = resp.get_data(as_text=True)
+    assert 'ccs_http_requests_total{method="GET",endpoint="/ping",status="200"}' in body
+    assert 'ccs_http_request_duration_seconds_bucket' in body
@@ -0,0 +1,96 @@
+import json
+
+import pytest
+from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.webdriver.common.by import By
+
+from locators import LocatorEngine
+
+STEPS = {
+    'login.submit': (
+        ('id', By.ID, 'loginButton'),
+        ('xpath', By.XPATH, "//input[@type='submit']"),
+    ),
+}
+LAST_RESORT = {'login.submit': (('any_button', By.XPATH, '//button'),)}
+
+
+class FakeElement:
+    def is_displayed(self):
+        return True
+
+    def is_enabled(self):
+        return True
+
+
+class FakeDriver:
+    """Returns an element for the selectors present on the page."""
+
+    def __init__(self, present=()):
+        self.present = set(present)
+        self.lookups = []
+
+    def find_elements(self, by, selector):
+        self.lookups.append(selector)
+        return [FakeElement()] if selector in self.present else []
+
+    def find_element(self, by, selector):
+        elements = self.find_elements(by, selector)
+        if not elements:
+            raise NoSuchElementException(selector)
+        return elements[0]
+
+
+def test_fallback_strategy_is_remembered(tmp_path):
+    cache = tmp_path / 'locators.json'
+    engine = LocatorEngine(cache_path=str(cache), steps=STEPS, grace=0)
+    engine.find(FakeDriver({"//input[@type='submit']"}), 'login.submit', timeout=1)
+    assert json.loads(cache.read_text()) == {'login.submit': 'xpath'}
+    assert engine.stats()['login.submit']['fallback'] == 1
+
+    # A new engine tries the remembered strategy first and counts a hit
+    engine = LocatorEngine(cache_path=str(cache), steps=STEPS, grace=0)
+    driver = FakeDriver({"//input[@type='submit']"})
+    engine.find(driver, 'login.submit', timeout=1)
+    assert driver.lookups == ["//input[@type='submit']"]
+    assert engine.stats()['login.submit'] == {'hit': 1, 'fallback': 0, 'last_resort': 0, 'miss': 0, 'preferred': 'xpath'}
+
+
+def test_preferred_strategy_wins_when_both_match(tmp_path):
+    engine = LocatorEngine(cache_path=str(tmp_path / 'locators.json'), steps=STEPS)
+    engine.find(FakeDriver({'loginButton', "//input[@type='submit']"}), 'login.submit', timeout=1)
+    assert engine.stats()['login.submit']['hit'] == 1
+
+
+def test_no_match_is_a_miss(tmp_path):
+    engine = LocatorEngine(cache_path=str(tmp_path / 'locators.json'), steps=STEPS)
+    with pytest.raises(TimeoutException):
+        engine.find(FakeDriver(), 'login.submit', timeout=0.3)
+    assert engine.stats()['login.submit']['miss'] == 1
+    assert not (tmp_path / 'locators.json').exists()
+
+
+def test_catch_all_is_only_tried_after_timeout_and_never_remembered(tmp_path):
+    cache = tmp_path / 'locators.json'
+    engine = LocatorEngine(cache_path=str(cache), steps=STEPS, last_resort=LAST_RESORT, last_resort_timeout=0.3)
+    driver = FakeDriver({'//button', "//input[@type='submit']"})
+    engine.find(driver, 'login.submit', timeout=2)
+    # The specific fallback wins even though the catch-all matched all along
+    assert '//button' not in driver.lookups
+    assert json.loads(cache.read_text()) == {'login.submit': 'xpath'}
+
+    engine.find(FakeDriver({'//button'}), 'login.submit', timeout=0.3)
+    assert engine.stats()['login.submit']['last_resort'] == 1
+    assert json.loads(cache.read_text()) == {'login.submit': 'xpath'}
+
+
+def test_forgotten_and_stale_preferences_are_dropped(tmp_path):
+    cache = tmp_path / 'locators.json'
+    cache.write_text(json.dumps({'login.submit': 'any_button'}))
+    engine = LocatorEngine(cache_path=str(cache), steps=STEPS, grace=0)
+    assert engine._preferred == {}
+
+    engine.find(FakeDriver({"//input[@type='submit']"}), 'login.submit', timeout=1)
+    engine.forget('login.submit')
+    assert json.loads(cache.read_text()) == {}
+    assert engine.candidates('login.submit')[0][0] == 'id'
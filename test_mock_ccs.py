@@ -0,0 +1,58 @@
+import time
+from datetime import date
+
+import pytest
+
+from mock_ccs import create_app
+from schedule_parser import parse_schedule
+
+
+@pytest.fixture
+def client():
+    app = create_app(users={'pilot': 'secret'}, today=date(2025, 12, 1))
+    with app.test_client() as client:
+        yield client
+
+
+def login(client, prefix='ctl01_mHolder_'):
+    return client.post('/CCS/default.aspx', data={f'{prefix}txtUserID': 'pilot', f'{prefix}txtGlobalPassword': 'secret'})
+
+
+def test_login_form_uses_the_live_site_ids(client):
+    page = client.get('/CCS/default.aspx').get_data(as_text=True)
+    for element_id in ('ctl01_mHolder_txtUserID', 'ctl01_mHolder_txtGlobalPassword', 'ctl01_mHolder_loginButton'):
+        assert f'id="{element_id}"' in page
+
+    bad = client.post('/CCS/default.aspx', data={'ctl01_mHolder_txtUserID': 'pilot', 'ctl01_mHolder_txtGlobalPassword': 'nope'})
+    assert 'Invalid user ID' in bad.get_data(as_text=True)
+    assert client.get('/CCS/schedule').status_code == 302
+
+    response = login(client)
+    assert response.headers['Location'].endswith('/CCS/home')
+    assert 'class="quick-link"><a href="/CCS/schedule#/myschedule">My Schedule</a>' in client.get('/CCS/home').get_data(as_text=True)
+
+
+def test_schedule_page_navigates_months_and_opens_the_print_view(client):
+    login(client)
+    page = client.get('/CCS/schedule').get_data(as_text=True)
+    assert '<span class="month-title">December 2025</span>' in page
+    assert '/CCS/schedule?year=2026&amp;month=1#/myschedule' in page
+    assert 'class="icon-PrintSVG"></i>Print</a>' in page and 'Printing Options' in page
+    assert 'window.open("/CCS/printview?year=2025\\u0026month=12"' in page
+    master = parse_schedule(page, format='master_schedule', use_cache=False)
+    assert master.pairings and (master.year, master.month) == (2025, 12)
+
+    schedule = parse_schedule(client.get('/CCS/printview?year=2026&month=2').get_data(as_text=True), use_cache=False)
+    assert schedule.pairings and (schedule.year, schedule.month) == (2026, 2)
+
+
+def test_drifted_variant_and_delays():
+    app = create_app(variant='drifted', delays_ms={'preview': 100})
+    with app.test_client() as client:
+        page = client.get('/CCS/default.aspx').get_data(as_text=True)
+        assert 'ctl01_' not in page and 'id="ctl02_mHolder_txtUserID"' in page
+        login(client, prefix='ctl02_mHolder_')
+        assert 'icon-PrintSVG' not in client.get('/CCS/schedule').get_data(as_text=True)
+        started = time.perf_counter()
+        client.get('/CCS/printview')
+        assert time.perf_counter() - started >= 0.1
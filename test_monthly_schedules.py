@@ -0,0 +1,206 @@
+import os
+
+import pytest
+
+import enhanced_scraper
+from enhanced_scraper import CcsScraper, LEAN_BLOCKED_URLS, PREVIEW_READY_SCRIPT
+from locators import LocatorEngine
+
+
+class FakeSwitchTo:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def window(self, handle):
+        if handle not in self.driver.windows:
+            raise RuntimeError(f"no such window {handle}")
+        self.driver.current_window_handle = handle
+
+
+class FakeBrowser:
+    """
+    Windows of one browser session. A print preview window becomes ready
+    after `polls_to_ready[month]` readiness checks (default: the first).
+    """
+
+    def __init__(self, polls_to_ready=None):
+        self.windows = {'main': None}  # handle -> (year, month) of its print preview
+        self.current_window_handle = 'main'
+        self.switch_to = FakeSwitchTo(self)
+        self.polls_to_ready = dict(polls_to_ready or {})
+        self.current_url = 'https://ccs.test/#/myschedule'
+        self.blocked = {}  # handle -> URL patterns blocked through DevTools
+        self.opened = []
+
+    @property
+    def window_handles(self):
+        return list(self.windows)
+
+    def open_preview(self, shown):
+        handle = f"preview-{len(self.opened) + 1}"
+        self.windows[handle] = shown
+        self.opened.append(handle)
+        return handle
+
+    def execute_cdp_cmd(self, cmd, params):
+        if cmd == 'Network.setBlockedURLs':
+            self.blocked[self.current_window_handle] = params['urls']
+
+    def execute_script(self, script):
+        assert script == PREVIEW_READY_SCRIPT
+        shown = self.windows[self.current_window_handle]
+        left = self.polls_to_ready.get(shown, 1) - 1
+        self.polls_to_ready[shown] = left
+        return left <= 0
+
+    @property
+    def page_source(self):
+        year, month = self.windows[self.current_window_handle]
+        return f"<table><td>{year}-{month:02d}</td></table>"
+
+    def close(self):
+        del self.windows[self.current_window_handle]
+
+
+class BrowserlessScraper(CcsScraper):
+    """CcsScraper with the CCS pages replaced by a FakeBrowser."""
+
+    def __init__(self, browser, profile='default'):
+        super().__init__(locators=LocatorEngine(cache_path=None), profile=profile)
+        self.driver = browser
+        self.shown = None
+        self.print_calls = []
+
+    def login(self, username, password):
+        self.main_window = 'main'
+        self.logged_in = True
+        return True
+
+    def navigate_to_my_schedule(self, timeout=20):
+        self.shown = (2025, 7)
+        return True
+
+    def navigate_to_month(self, year, month, timeout=20):
+        self.shown = (year, month)
+        return True
+
+    def open_print_dialog(self, wait_for_preview=True):
+        self.print_calls.append(wait_for_preview)
+        self.driver.open_preview(self.shown)
+        return True
+
+
+@pytest.fixture(autouse=True)
+def in_tmp_path(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+
+def test_months_are_streamed_from_one_session_and_saved_once():
+    scraper = BrowserlessScraper(FakeBrowser())
+    results = scraper.get_schedule_range('pilot', 'secret', 2025, 11, 3)
+    assert not scraper.print_calls  # nothing runs until the stream is read
+
+    year, month, html, path = next(results)
+    assert (year, month) == (2025, 11) and '2025-11' in html
+    assert scraper.driver.window_handles == ['main']
+
+    assert [(year, month) for year, month, _, _ in results] == [(2025, 12), (2026, 1)]
+    # The print dialog never waited for the preview itself, so each month is saved once
+    assert scraper.print_calls == [False, False, False]
+    saved = sorted(os.listdir('output'))
+    assert len(saved) == 3
+    assert [name[-12:-5] for name in saved] == ['2025-11', '2025-12', '2026-01']
+
+
+def test_lean_profile_blocks_resources_in_every_preview_window():
+    browser = FakeBrowser()
+    scraper = BrowserlessScraper(browser, profile='lean')
+    assert len(list(scraper.iter_monthly_schedules('pilot', 'secret', [(2025, 7), (2025, 8)]))) == 2
+    assert sorted(browser.blocked) == browser.opened == ['preview-1', 'preview-2']
+    assert all(urls == LEAN_BLOCKED_URLS for urls in browser.blocked.values())
+
+    browser = FakeBrowser()
+    list(BrowserlessScraper(browser).iter_monthly_schedules('pilot', 'secret', [(2025, 7)]))
+    assert browser.blocked == {}
+
+
+def test_parallel_months_arrive_as_their_previews_finish():
+    # July's preview is slow, so August and September overtake it
+    browser = FakeBrowser(polls_to_ready={(2025, 7): 3})
+    scraper = BrowserlessScraper(browser, profile='lean')
+    results = scraper.iter_monthly_schedules_parallel('pilot', 'secret', [(2025, 7), (2025, 8), (2025, 9)],
+                                                      max_windows=3, poll_interval=0)
+    arrived = [(year, month, html) for year, month, html, _ in results]
+    assert [(year, month) for year, month, _ in arrived] == [(2025, 8), (2025, 9), (2025, 7)]
+    assert all(f"{year}-{month:02d}" in html for year, month, html in arrived)
+    assert sorted(browser.blocked) == browser.opened
+    assert browser.window_handles == ['main'] and browser.current_window_handle == 'main'
+
+
+def test_parallel_previews_are_closed_when_the_consumer_stops_early():
+    browser = FakeBrowser(polls_to_ready={(2025, 7): 50, (2025, 8): 50})
+    scraper = BrowserlessScraper(browser)
+    results = scraper.iter_monthly_schedules_parallel('pilot', 'secret', [(2025, 7), (2025, 8), (2025, 9)],
+                                                      max_windows=3, poll_interval=0)
+    assert next(results)[:2] == (2025, 9)
+    assert len(browser.window_handles) == 3  # July and August still loading
+
+    results.close()
+    assert browser.window_handles == ['main'] and browser.current_window_handle == 'main'
+
+
+class FakeElement:
+    def __init__(self, on_click=None):
+        self.on_click = on_click
+
+    def click(self):
+        if self.on_click:
+            self.on_click()
+
+    def is_selected(self):
+        return True
+
+    def get_attribute(self, name):
+        return None
+
+
+class DialogBrowser(FakeBrowser):
+    """FakeBrowser whose print dialog finds every option already selected."""
+
+    def save_screenshot(self, filename):
+        return True
+
+    def find_element(self, by, value):
+        return FakeElement()
+
+    def find_elements(self, by, value):
+        return []
+
+    def execute_script(self, script, *args):
+        if script == PREVIEW_READY_SCRIPT:
+            return super().execute_script(script)
+        return FakeElement()
+
+
+class DialogLocators:
+    def __init__(self, browser):
+        self.browser = browser
+
+    def find(self, driver, step, timeout=15, clickable=False):
+        if step == 'print.submit':
+            return FakeElement(lambda: self.browser.open_preview((2025, 7)))
+        return FakeElement()
+
+
+def test_waiting_print_dialog_saves_the_preview_like_the_step_machine(monkeypatch):
+    monkeypatch.setattr(enhanced_scraper.time, 'sleep', lambda seconds: None)
+    browser = DialogBrowser()
+    scraper = CcsScraper(locators=DialogLocators(browser), profile='lean')
+    scraper.driver = browser
+    assert scraper.open_print_dialog(wait_for_preview=True)
+    assert browser.current_window_handle == 'preview-1'
+    assert browser.blocked == {'preview-1': LEAN_BLOCKED_URLS}
+    [saved] = os.listdir('output')
+    assert saved.startswith('schedule_printview_') and saved.endswith('.html')
+    with open(os.path.join('output', saved), encoding='utf-8') as f:
+        assert '2025-07' in f.read()
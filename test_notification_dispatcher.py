@@ -0,0 +1,127 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from notification_dispatcher import NotificationDispatcher, find_crew_matches
+
+
+class StubResendHandler(BaseHTTPRequestHandler):
+    """Local stand-in for the notifications function."""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        self.server.requests.append(body)
+        status = self.server.statuses.pop(0) if self.server.statuses else 200
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.end_headers()
+        self.wfile.write(b'{}')
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubResendHandler)
+    server.requests = []
+    server.statuses = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_dispatcher(server, **kwargs):
+    endpoint = f"http://127.0.0.1:{server.server_address[1]}/notifications"
+    return NotificationDispatcher(endpoint=endpoint, rate_limit=0, backoff=0, **kwargs)
+
+
+PAIRINGS = [
+    {'pairing_code': 'A100', 'start_date': '2025-07-01', 'crew': [
+        {'name': 'Pat Lee', 'position': 'FO', 'employee_id': 'U1'},
+        {'name': 'Sam Roe', 'position': 'FA', 'employee_id': 'U2'},
+    ]},
+    {'pairing_code': 'A200', 'start_date': '2025-07-05', 'crew': [
+        {'name': 'Pat Lee', 'position': 'FO', 'employee_id': 'U1'},
+    ]},
+]
+CREW_LISTS = [
+    {'employee_id': 'U1', 'list_type': 'friends'},
+    {'employee_id': 'U2', 'list_type': 'do_not_fly'},
+]
+
+
+def test_matches_are_coalesced_into_one_digest_per_user(stub_server):
+    dispatcher = make_dispatcher(stub_server)
+    matches = find_crew_matches(PAIRINGS, CREW_LISTS)
+    assert len(matches) == 3
+
+    assert dispatcher.queue_sync('user-1', 'one@example.com', matches) == 3
+    assert dispatcher.queue_sync('user-2', 'two@example.com', matches[:1]) == 1
+    assert dispatcher.flush() == 2
+
+    assert len(stub_server.requests) == 1
+    emails = stub_server.requests[0]['emails']
+    assert [e['to'] for e in emails] == ['one@example.com', 'two@example.com']
+    assert 'Do Not Fly' in emails[0]['html']
+
+
+def test_already_notified_matches_are_not_resent(stub_server):
+    dispatcher = make_dispatcher(stub_server)
+    matches = find_crew_matches(PAIRINGS, CREW_LISTS)
+    dispatcher.queue_sync('user-1', 'one@example.com', matches[:2])
+    dispatcher.flush()
+
+    assert dispatcher.queue_sync('user-1', 'one@example.com', matches[:2]) == 0
+    assert dispatcher.queue_sync('user-1', 'one@example.com', matches) == 1
+    dispatcher.flush()
+    assert len(stub_server.requests) == 2
+    assert 'A200' in stub_server.requests[1]['emails'][0]['html']
+
+
+def test_batches_respect_batch_size(stub_server):
+    dispatcher = make_dispatcher(stub_server, batch_size=2)
+    matches = find_crew_matches(PAIRINGS, CREW_LISTS)
+    for i in range(5):
+        dispatcher.queue_sync(f'user-{i}', f'{i}@example.com', matches)
+    assert dispatcher.flush() == 5
+    assert [len(r['emails']) for r in stub_server.requests] == [2, 2, 1]
+
+
+def test_transient_failures_are_retried(stub_server):
+    stub_server.statuses = [503, 429]
+    dispatcher = make_dispatcher(stub_server)
+    dispatcher.queue_sync('user-1', 'one@example.com', find_crew_matches(PAIRINGS, CREW_LISTS))
+    assert dispatcher.flush() == 1
+    assert len(stub_server.requests) == 3
+
+
+def test_failed_batch_is_retried_on_next_sync(stub_server):
+    stub_server.statuses = [500, 500]
+    dispatcher = make_dispatcher(stub_server, max_retries=1)
+    matches = find_crew_matches(PAIRINGS, CREW_LISTS)
+    dispatcher.queue_sync('user-1', 'one@example.com', matches)
+    assert dispatcher.flush() == 0
+
+    assert dispatcher.queue_sync('user-1', 'one@example.com', matches) == 3
+    assert dispatcher.flush() == 1
+
+
+def test_flush_later_sends_queued_digests_in_one_background_batch(stub_server):
+    dispatcher = make_dispatcher(stub_server, flush_delay=0.2)
+    matches = find_crew_matches(PAIRINGS, CREW_LISTS)
+    dispatcher.queue_sync('user-1', 'one@example.com', matches)
+    dispatcher.flush_later()
+    dispatcher.queue_sync('user-2', 'two@example.com', matches)
+    dispatcher.flush_later()  # already due; joins the same batch
+    assert not stub_server.requests
+
+    timer = dispatcher._timer
+    timer.join(5)
+    assert len(stub_server.requests) == 1
+    assert len(stub_server.requests[0]['emails']) == 2
+    assert dispatcher._timer is None
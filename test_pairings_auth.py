@@ -1,3 +1,4 @@
+from types import SimpleNamespace
 import pytest
 from flask import Flask
 import supabase_api
@@ -23,3 +24,53 @@ def test_malformed_authorization_header(client):
     resp = client.get('/pairings', headers={'Authorization': 'Bearer'})
     assert resp.status_code == 400
     assert resp.get_json()['error'] == 'Malformed authorization header'
+
+class FakeQuery:
+    def __init__(self, data):
+        self.data = data
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        return self
+
+class NotifySupabase:
+    """Account emails from auth, one crew-list entry per user."""
+
+    def __init__(self):
+        self.auth = SimpleNamespace(admin=SimpleNamespace(get_user_by_id=lambda user_id: SimpleNamespace(
+            user=SimpleNamespace(email=f'{user_id}@account.example'))))
+
+    def table(self, name):
+        if name == 'user_crew_lists':
+            return FakeQuery([{'list_type': 'friends', 'crew_members': {'employee_id': 'U1', 'name': 'Pat Lee'}}])
+        return FakeQuery([])
+
+class RecordingDispatcher:
+    def __init__(self):
+        self.queued = []
+        self.flushes_scheduled = 0
+
+    def queue_sync(self, user_id, email, matches):
+        self.queued.append((user_id, email, len(matches)))
+        return len(matches)
+
+    def flush_later(self):
+        self.flushes_scheduled += 1
+
+def test_notifications_go_to_the_account_email(monkeypatch):
+    monkeypatch.setattr(supabase_api, 'supabase', NotifySupabase())
+    dispatcher = RecordingDispatcher()
+    monkeypatch.setattr(supabase_api, 'notification_dispatcher', dispatcher)
+    pairings = [{'pairing_code': 'A100', 'start_date': '2025-07-01', 'crew': [{'employee_id': 'U1', 'name': 'Pat Lee'}]}]
+    supabase_api.notify_crew_matches('user-1', pairings)
+    assert dispatcher.queued == [('user-1', 'user-1@account.example', 1)]
+    assert dispatcher.flushes_scheduled == 1
+
+def test_dispatcher_keeps_notified_matches_in_supabase(monkeypatch):
+    client = NotifySupabase()
+    monkeypatch.setattr(supabase_api, 'supabase', client)
+    monkeypatch.setattr(supabase_api, 'notification_dispatcher', None)
+    store = supabase_api.get_notification_dispatcher().state_store
+    assert isinstance(store, supabase_api.SupabaseSyncStateStore) and store.client is client
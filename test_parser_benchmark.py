@@ -0,0 +1,45 @@
+import os
+
+import pytest
+
+from benchmarks import parser as parser_benchmark
+from enhanced_parser import EnhancedParser
+from parser import parse_and_group_schedule
+from synthetic_schedules import generate_master_schedule, generate_print_view
+
+
+def test_synthetic_print_view_parses_to_requested_shape():
+    html = generate_print_view(pairings=7, legs_per_pairing=3, crew_size=4, seed=1)
+    pairings = EnhancedParser(html).parse()
+    assert len(pairings) == 7
+    assert all(len(p['flights']) == 3 and len(p['crew']) == 4 for p in pairings)
+    assert pairings[0]['pairing_code'] == 'A1000'
+    assert pairings[0]['start_date'].startswith('2025-07-')
+
+
+def test_synthetic_master_schedule_groups_into_trips():
+    html = generate_master_schedule(pairings=5, days_per_pairing=3, year=2025, month=7)
+    trips, month, year = parse_and_group_schedule(html)
+    assert (month, year) == (7, 2025)
+    assert [len(t['days']) for t in trips] == [3] * 5
+    assert (trips[0]['start_date'], trips[0]['end_date']) == ('2025-07-01', '2025-07-04')
+
+
+def test_generator_is_deterministic():
+    assert generate_print_view(pairings=3, seed=42) == generate_print_view(pairings=3, seed=42)
+    assert generate_print_view(pairings=3, seed=42) != generate_print_view(pairings=3, seed=43)
+
+
+def test_regressions_are_flagged_beyond_tolerance():
+    baseline = {'case': {'seconds': 1.0, 'peak_kib': 100.0}}
+    assert parser_benchmark.find_regressions({'case': {'seconds': 1.4, 'peak_kib': 100.0}}, baseline, 1.5) == []
+    flagged = parser_benchmark.find_regressions({'case': {'seconds': 1.6, 'peak_kib': 200.0}}, baseline, 1.5)
+    assert [f.split(':')[0] for f in flagged] == ['case.seconds', 'case.peak_kib']
+
+
+@pytest.mark.skipif(not os.environ.get('CCS_BENCHMARK'), reason="set CCS_BENCHMARK=1 to run parser benchmarks")
+def test_parsers_stay_within_baseline():
+    cases = ['print_view_small', 'print_view_medium', 'master_small', 'master_medium']
+    results = parser_benchmark.run_cases(cases, repeat=3)
+    tolerance = float(os.environ.get('CCS_BENCHMARK_TOLERANCE', parser_benchmark.DEFAULT_TOLERANCE))
+    assert parser_benchmark.find_regressions(results, parser_benchmark.load_baseline(), tolerance) == []
@@ -0,0 +1,67 @@
+import os
+import time
+
+from flask import Flask
+
+import profiling
+
+
+def busy_wait(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def make_app(tmp_path, **kwargs):
+    app = Flask(__name__)
+    profiling.init_app(app, directory=str(tmp_path), interval_ms=1, **kwargs)
+
+    @app.route('/slow')
+    def slow():
+        busy_wait(0.1)
+        return 'done'
+
+    @app.route('/fast')
+    def fast():
+        return 'done'
+
+    return app
+
+
+def test_sampler_collects_stacks_of_target_thread():
+    sampler = profiling.StackSampler(interval_ms=1)
+    sampler.start()
+    busy_wait(0.1)
+    samples = sampler.stop()
+    assert samples
+    assert any('busy_wait' in stack for stack in samples)
+
+
+def test_slow_requests_are_written_as_collapsed_stacks(tmp_path):
+    app = make_app(tmp_path, enabled=True, threshold_ms=50)
+    with app.test_client() as client:
+        client.get('/fast')
+        client.get('/slow')
+    files = os.listdir(tmp_path)
+    assert len(files) == 1 and '_slow_' in files[0]
+    with open(tmp_path / files[0]) as f:
+        stack, count = f.readline().rsplit(' ', 1)
+    assert int(count) > 0 and ';' in stack
+
+
+def test_header_trigger_requires_token(tmp_path):
+    app = make_app(tmp_path, enabled=False, token='secret')
+    with app.test_client() as client:
+        assert profiling.PROFILE_FILE_HEADER not in client.get('/slow', headers={'X-CCS-Profile': 'wrong'}).headers
+        assert client.get('/fast', headers={'X-CCS-Profile': 'sécret'}).status_code == 200
+        resp = client.get('/slow', headers={'X-CCS-Profile': 'secret'})
+    assert os.listdir(tmp_path) == [resp.headers[profiling.PROFILE_FILE_HEADER]]
+
+
+def test_retention_keeps_newest_files(tmp_path):
+    for i in range(5):
+        path = tmp_path / f'{i}.collapsed'
+        path.write_text('main 1\n')
+        os.utime(path, (i, i))
+    profiling.prune_profiles(str(tmp_path), max_files=2)
+    assert sorted(os.listdir(tmp_path)) == ['3.collapsed', '4.collapsed']
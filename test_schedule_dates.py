@@ -0,0 +1,34 @@
+from datetime import date, timedelta
+
+import pytest
+
+from schedule_dates import mdy_to_iso, month_number, iso_date, next_iso_date, month_iso_days
+
+
+def test_month_table_matches_datetime():
+    for year, month in [(2024, 2), (2025, 2), (2025, 7), (2025, 12)]:
+        days = month_iso_days(year, month)
+        for day in range(1, len(days) - 1):
+            assert days[day] == date(year, month, day).isoformat()
+            assert next_iso_date(year, month, day) == (date(year, month, day) + timedelta(days=1)).isoformat()
+
+
+def test_mdy_dates():
+    assert mdy_to_iso('07/04/2025') == '2025-07-04'
+    assert mdy_to_iso('7/4/2025') == '2025-07-04'
+    assert mdy_to_iso('02/29/2024') == '2024-02-29'
+    for bad in ('02/29/2025', '13/01/2025', '07-04-2025'):
+        with pytest.raises(ValueError):
+            mdy_to_iso(bad)
+
+
+def test_month_names():
+    assert month_number('July') == 7
+    assert month_number('dec') == 12
+    with pytest.raises(ValueError):
+        month_number('Smarch')
+
+
+def test_day_out_of_range():
+    with pytest.raises(ValueError):
+        iso_date(2025, 4, 31)
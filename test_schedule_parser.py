@@ -0,0 +1,190 @@
+import json
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+import schedule_parser
+import schedule_records
+from schedule_parser import parse_schedule, detect_format, register_parser, ScheduleFormatError
+from schedule_records import ParsedSchedule, Pairing
+from synthetic_schedules import generate_master_schedule, generate_print_view
+
+
+def test_formats_are_detected_from_the_document_start():
+    assert detect_format(generate_print_view(pairings=2)) == 'print_view'
+    assert detect_format(generate_master_schedule(pairings=2)) == 'master_schedule'
+    assert detect_format('<html><body>nothing here</body></html>') is None
+
+
+def test_markers_past_the_sniff_window_are_still_found():
+    html = '<html><head>' + ' ' * (schedule_parser.SNIFF_CHARS * 2) + '</head>' + generate_print_view(pairings=1)
+    assert detect_format(html) == 'print_view'
+
+
+def test_print_view_parses_into_records():
+    result = parse_schedule(generate_print_view(pairings=3, legs_per_pairing=2, crew_size=3, seed=2))
+    assert result.format == 'print_view'
+    assert [p.pairing_code for p in result.pairings] == ['A1000', 'B1001', 'C1002']
+    pairing = result.pairings[0]
+    assert len(pairing.legs) == 2 and len(pairing.crew) == 3
+    assert pairing.legs[0].departure_airport == 'ORD'
+    assert pairing.crew[0].employee_id.startswith('U')
+    assert (result.month, result.year) == (7, 2025)
+
+
+def test_master_schedule_groups_days_into_pairings():
+    result = parse_schedule(generate_master_schedule(pairings=2, days_per_pairing=2, month=2))
+    assert (result.month, result.year) == (2, 2025)
+    first = result.pairings[0]
+    assert (first.start_date, first.end_date) == ('2025-02-01', '2025-02-03')
+    assert first.description.startswith('Report: ')
+    assert first.to_dict()['days'][0]['layover'] in first.description
+
+
+def test_markup_variations_match_beautifulsoup_text():
+    html = """
+    <table class="pairing-details"><tr><td class="pairing-header"><b>Pairing</b> Z9 - 07/04/2025</td></tr>
+    <tr class="flight-row"><td> UA1 <span>x</span></td><td>ORD</td><td>SFO &amp; more</td>
+    <tr class="crew-row"><td>A &lt;B&gt;</td><td>CA</td><td>U9</td></tr>
+    <tr><td><table><tr><td>nested</td></tr></table></td></tr>
+    </table>"""
+    pairing = parse_schedule(html).pairings[0]
+    assert (pairing.pairing_code, pairing.start_date) == ('Z9', '2025-07-04')
+    assert (pairing.legs[0].flight_number, pairing.legs[0].arrival_airport) == ('UA1 x', 'SFO & more')
+    assert pairing.crew[0].name == 'A <B>'
+
+
+def test_results_are_cached_by_content():
+    html = generate_print_view(pairings=2, seed=7)
+    assert parse_schedule(html) is parse_schedule(html)
+    assert parse_schedule(html, use_cache=False) is not parse_schedule(html)
+
+
+def test_unknown_documents_are_rejected():
+    with pytest.raises(ScheduleFormatError):
+        parse_schedule('<html></html>')
+
+
+def test_custom_backends_can_be_registered(monkeypatch):
+    monkeypatch.setattr(schedule_parser, '_registry', schedule_parser.OrderedDict(schedule_parser._registry))
+    register_parser('plain', lambda text: text.startswith('PAIRING '),
+                    lambda html: ParsedSchedule('plain', (Pairing(html.split()[1], '2025-07-01'),)))
+    assert parse_schedule('PAIRING Q1').pairings[0].pairing_code == 'Q1'
+
+
+def test_records_are_slotted_with_interned_codes():
+    result = parse_schedule(generate_print_view(pairings=2, legs_per_pairing=3), use_cache=False)
+    legs = [leg for pairing in result.pairings for leg in pairing.legs]
+    assert not hasattr(legs[0], '__dict__')
+    origin = legs[0].departure_airport
+    assert all(leg.departure_airport is origin for leg in legs if leg.departure_airport == origin)
+    with pytest.raises(AttributeError):
+        legs[0].flight_number = 'UA0'
+
+
+def test_rows_and_json():
+    pairing = parse_schedule(generate_print_view(pairings=1, legs_per_pairing=1, crew_size=1)).pairings[0]
+    assert pairing.to_row('u1') == ('u1', pairing.pairing_code, pairing.start_date, pairing.end_date,
+                                    pairing.block_time, pairing.credit_time)
+    assert dict(zip(Pairing.ROW_COLUMNS, pairing.to_row('u1')))['user_id'] == 'u1'
+    decoded = json.loads(pairing.to_json())
+    assert decoded == json.loads(json.dumps(pairing.to_dict()))
+    assert json.loads(schedule_records.dumps([pairing]))[0]['flights'][0]['flight_number'] == pairing.legs[0].flight_number
+
+
+def test_json_without_orjson_matches(monkeypatch):
+    pairing = parse_schedule(generate_master_schedule(pairings=1)).pairings[0]
+    expected = json.loads(pairing.to_json())
+    monkeypatch.setattr(schedule_records, 'orjson', None)
+    assert json.loads(pairing.to_json()) == expected
+
+
+def test_leg_times_resolve_to_utc_with_block_and_credit_totals():
+    result = parse_schedule(generate_print_view(pairings=4, legs_per_pairing=4, seed=3), use_cache=False)
+    for pairing in result.pairings:
+        assert pairing.block_time == sum(leg.block_minutes for leg in pairing.legs)
+        assert pairing.credit_time >= pairing.block_time
+        for leg in pairing.legs:
+            departure = datetime.fromisoformat(leg.scheduled_departure)
+            arrival = datetime.fromisoformat(leg.scheduled_arrival)
+            assert departure.utcoffset() == timedelta(0)
+            assert (arrival - departure) == timedelta(minutes=leg.block_minutes)
+        for previous, following in zip(pairing.legs, pairing.legs[1:]):
+            assert following.scheduled_departure > previous.scheduled_arrival
+        assert pairing.end_date > pairing.start_date
+
+
+def test_arrival_without_block_crosses_midnight_and_date_line():
+    html = """<table class="pairing-details"><tr><td class="pairing-header">Pairing X1 - 03/08/2025</td></tr>
+    <tr class="flight-row"><td>UA837</td><td>SFO</td><td>NRT</td><td>03/08/2025</td><td>1100</td><td>1530</td><td>789</td><td></td></tr>
+    <tr class="pairing-totals"><td>Block</td><td>11:30</td><td>Credit</td><td>12:00</td></tr>
+    </table>"""
+    pairing = parse_schedule(html).pairings[0]
+    leg = pairing.legs[0]
+    assert leg.scheduled_departure == '2025-03-08T19:00:00+00:00'  # PST, the day before DST starts
+    assert leg.scheduled_arrival == '2025-03-09T06:30:00+00:00'  # next day in Tokyo
+    assert leg.block_minutes == 11 * 60 + 30
+    # Lands on 03/09 in Tokyo; end dates are exclusive
+    assert (pairing.end_date, pairing.block_time, pairing.credit_time) == ('2025-03-10', 690, 720)
+
+
+def test_unknown_airports_keep_local_fields_only():
+    html = """<table class="pairing-details"><tr><td class="pairing-header">Pairing X2 - 07/01/2025</td></tr>
+    <tr class="flight-row"><td>UA1</td><td>ZZZ</td><td>ORD</td><td>07/01/2025</td><td>0800</td><td>1000</td><td>320</td><td>2:00</td></tr>
+    </table>"""
+    leg = parse_schedule(html).pairings[0].legs[0]
+    assert (leg.scheduled_departure, leg.block_minutes, leg.aircraft_type) == (None, 120, '320')
+
+
+@pytest.mark.parametrize('host_zone', ['UTC', 'Asia/Tokyo', 'America/Los_Angeles'])
+def test_unknown_arrival_airport_dates_in_the_departure_zone(monkeypatch, host_zone):
+    monkeypatch.setenv('TZ', host_zone)
+    time.tzset()
+    try:
+        # Departs ORD 20:00 CDT, lands 22:00 Chicago time on 07/01 (03:00 UTC on 07/02)
+        html = """<table class="pairing-details"><tr><td class="pairing-header">Pairing X3 - 07/01/2025</td></tr>
+        <tr class="flight-row"><td>UA2</td><td>ORD</td><td>ZZZ</td><td>07/01/2025</td><td>2000</td><td></td><td>320</td><td>2:00</td></tr>
+        </table>"""
+        pairing = parse_schedule(html, use_cache=False).pairings[0]
+    finally:
+        monkeypatch.undo()
+        time.tzset()
+    assert pairing.legs[0].scheduled_arrival == '2025-07-02T03:00:00+00:00'
+    assert pairing.end_date == '2025-07-02'
+
+
+def test_both_formats_give_the_same_exclusive_end_date():
+    master = parse_schedule(generate_master_schedule(pairings=1, days_per_pairing=2), use_cache=False)
+    print_view = parse_schedule("""<table class="pairing-details"><tr><td class="pairing-header">Pairing A1000 - 07/01/2025</td></tr>
+    <tr class="flight-row"><td>UA1</td><td>ORD</td><td>FRA</td><td>07/01/2025</td><td>1700</td><td></td><td>789</td><td>8:30</td></tr>
+    <tr class="flight-row"><td>UA2</td><td>FRA</td><td>ORD</td><td>07/02/2025</td><td>1200</td><td></td><td>789</td><td>9:00</td></tr>
+    </table>""", use_cache=False)
+    assert master.pairings[0].pairing_code == print_view.pairings[0].pairing_code == 'A1000'
+    assert master.pairings[0].end_date == print_view.pairings[0].end_date == '2025-07-03'
+
+    # A same-day trip still ends after it starts, so calendar events are never empty
+    same_day = parse_schedule("""<table class="pairing-details"><tr><td class="pairing-header">Pairing T1 - 07/05/2025</td></tr>
+    <tr class="flight-row"><td>UA3</td><td>ORD</td><td>DEN</td><td>07/05/2025</td><td>0800</td><td></td><td>320</td><td>2:30</td></tr>
+    </table>""", use_cache=False).pairings[0]
+    assert (same_day.start_date, same_day.end_date) == ('2025-07-05', '2025-07-06')
+
+
+def test_dom_extraction_output_builds_the_same_records():
+    from bs4 import BeautifulSoup
+
+    # What PRINT_VIEW_EXTRACT_SCRIPT returns, computed here with BeautifulSoup
+    html = generate_print_view(pairings=3, seed=5)
+    kinds = {'flight-row': 1, 'crew-row': 2, 'pairing-totals': 3}
+    tables = []
+    for table in BeautifulSoup(html, 'html.parser').select('table.pairing-details'):
+        entry = [table.select_one('td.pairing-header').get_text(), [], [], []]
+        for row in table.find_all('tr'):
+            kind = next((kinds[name] for name in kinds if name in row.get('class', [])), None)
+            if kind:
+                entry[kind].append([cell.get_text().strip() for cell in row.find_all('td')])
+        tables.append(entry)
+
+    assert schedule_parser.parse_print_view_json(json.dumps(tables)) == parse_schedule(html, use_cache=False)
+    with pytest.raises(ScheduleFormatError):
+        schedule_parser.parse_print_view_json('[["header only"]]')
@@ -0,0 +1,67 @@
+from scrape_steps import StepMachine, Step, RetryPolicy
+
+
+class FlakyStep:
+    """Fails the first `failures` calls, then returns its name."""
+
+    def __init__(self, name, failures=0):
+        self.name = name
+        self.failures = failures
+        self.calls = 0
+
+    def __call__(self, context):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise RuntimeError(f"{self.name} not ready")
+        return self.name
+
+
+def make_machine(failures=None, **policies):
+    failures = failures or {}
+    funcs = {name: FlakyStep(name, failures.get(name, 0)) for name in ('login', 'schedule', 'print', 'preview')}
+    steps = [Step(name, funcs[name], policies.get(name, RetryPolicy(attempts=2, delay=0)),
+                  checkpoint=name in ('login', 'schedule'))
+             for name in funcs]
+    return StepMachine(steps, sleep=lambda seconds: None), funcs
+
+
+def test_failed_step_is_retried_without_repeating_earlier_steps():
+    machine, funcs = make_machine({'print': 1})
+    assert machine.run() == 'preview'
+    assert [funcs[name].calls for name in funcs] == [1, 1, 2, 1]
+    assert [(r.step, r.attempt, r.ok) for r in machine.history] == [
+        ('login', 1, True), ('schedule', 1, True), ('print', 1, False), ('print', 2, True), ('preview', 1, True)]
+    assert machine.history[2].error == 'print not ready'
+
+
+def test_exhausted_step_rewinds_to_earlier_step():
+    machine, funcs = make_machine({'preview': 2}, preview=RetryPolicy(attempts=2, delay=0, rewind_to='print'))
+    assert machine.run() == 'preview'
+    assert (funcs['login'].calls, funcs['print'].calls, funcs['preview'].calls) == (1, 2, 3)
+
+
+def test_failed_run_resumes_after_last_checkpoint():
+    machine, funcs = make_machine({'print': 2})
+    assert machine.run() is None
+    assert machine.checkpoint == 'schedule'
+
+    assert machine.run() == 'preview'
+    assert (funcs['login'].calls, funcs['schedule'].calls, funcs['print'].calls) == (1, 1, 3)
+    assert machine.run(resume=False) == 'preview'
+    assert funcs['login'].calls == 2
+
+
+def test_retry_delays_back_off():
+    policy = RetryPolicy(attempts=4, delay=2, backoff=3)
+    assert [policy.delay_before(attempt) for attempt in (2, 3, 4)] == [2, 6, 18]
+
+
+def test_run_can_stop_early_and_continue_from_there():
+    machine, funcs = make_machine()
+    assert machine.run(stop_after='schedule') == 'schedule'
+    assert funcs['print'].calls == 0
+    assert machine.run() == 'preview'
+    assert (funcs['login'].calls, funcs['schedule'].calls, funcs['print'].calls) == (1, 1, 1)
+    # Past the stop step already: it runs again rather than being skipped
+    assert machine.run(stop_after='schedule') == 'schedule'
+    assert funcs['schedule'].calls == 2
@@ -31,7 +31,7 @@ def main():
     
     # Initialize scraper with headless=False to see the browser
     print("\nStarting browser automation...")
-    scraper = None
+    scraper = CcsScraper(headless=False, debug=True)
     result_file = None
     
     for attempt in range(1, MAX_ATTEMPTS + 1):
@@ -39,22 +39,15 @@ def main():
             logger.info(f"\n=== Attempt {attempt}/{MAX_ATTEMPTS} ===")
             print(f"\nAttempt {attempt}/{MAX_ATTEMPTS} to extract schedule data...")
             
-            # Create a new scraper instance for each attempt
-            if scraper:
-                try:
-                    scraper.close()
-                except:
-                    pass
-                    
-            scraper = CcsScraper(headless=False, debug=True)
-            
-            # Run the extraction with increased timeouts for each retry
+            # Each step retries on its own; a further attempt resumes from the
+            # last checkpoint (login or My Schedule) in the same browser session
             result_file = scraper.get_detailed_schedule(
                 username, 
                 password, 
                 debug=True, 
                 pause_after_login=2
             )
+            print(f"\nStep timings:\n{scraper.steps.summary()}")
             
             if result_file:
                 logger.info(f"SUCCESS! Schedule data extracted on attempt {attempt}")
@@ -0,0 +1,103 @@
+import threading
+
+import httpx
+import pytest
+import supabase
+
+from supabase_client import SupabaseClientProvider, RetryingTransport, RetryBudget
+
+
+@pytest.fixture
+def seen():
+    return []
+
+
+@pytest.fixture
+def provider(seen):
+    def handler(request):
+        seen.append((request.url.path, request.headers['apikey'], request.headers['authorization']))
+        return httpx.Response(200, json=[{'pairing_code': 'P1'}])
+    return SupabaseClientProvider(url='https://example.supabase.co', key='service-key', anon_key='anon-key',
+                                  transport=httpx.MockTransport(handler))
+
+
+def test_user_scoped_clients_share_the_service_client_pool(provider, seen):
+    client = provider.get_client()
+    assert client.table('pairings').select('*').execute().data == [{'pairing_code': 'P1'}]
+    first, second = provider.for_user('jwt-1'), provider.for_user('jwt-2')
+    first.from_('pairings').select('*').execute()
+    second.from_('pairings').select('*').execute()
+
+    assert seen == [('/rest/v1/pairings', 'service-key', 'Bearer service-key'),
+                    ('/rest/v1/pairings', 'anon-key', 'Bearer jwt-1'),
+                    ('/rest/v1/pairings', 'anon-key', 'Bearer jwt-2')]
+    assert client.postgrest.session is first.session is second.session is provider.http_client()
+
+
+def test_user_scoped_clients_need_the_anon_key(monkeypatch):
+    monkeypatch.delenv('SUPABASE_ANON_KEY', raising=False)
+    provider = SupabaseClientProvider(url='https://example.supabase.co', key='service-key')
+    with pytest.raises(ValueError):
+        provider.for_user('jwt-1')
+    assert provider.get_client() is not None  # the service client doesn't need it
+
+
+def test_concurrent_first_use_creates_one_client(provider, monkeypatch):
+    created = []
+    real_create_client = supabase.create_client
+
+    def counting_create_client(*args, **kwargs):
+        created.append(args[0])
+        return real_create_client(*args, **kwargs)
+
+    monkeypatch.setattr(supabase, 'create_client', counting_create_client)
+    barrier = threading.Barrier(8)
+    clients = []
+
+    def first_use():
+        barrier.wait()
+        clients.append(provider.get_client())
+
+    threads = [threading.Thread(target=first_use) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(created) == 1 and len({id(client) for client in clients}) == 1
+
+
+class FailingTransport:
+    """Raises the given errors in turn, then answers 200."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def handle_request(self, request):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return httpx.Response(200)
+
+
+def send(transport, method='GET'):
+    return transport.handle_request(httpx.Request(method, 'https://example.supabase.co/rest/v1/pairings'))
+
+
+def test_connection_failures_are_retried_within_the_budget():
+    inner = FailingTransport(httpx.ConnectError('refused'), httpx.ReadError('reset'))
+    assert send(RetryingTransport(inner, retries=2, sleep=lambda seconds: None)).status_code == 200
+    assert inner.calls == 3
+
+    # A POST may have reached the server before the connection broke
+    inner = FailingTransport(httpx.ReadError('reset'))
+    with pytest.raises(httpx.ReadError):
+        send(RetryingTransport(inner, sleep=lambda seconds: None), method='POST')
+    assert inner.calls == 1
+
+    budget = RetryBudget(ratio=0.0, reserve=1)
+    transport = RetryingTransport(FailingTransport(*[httpx.ConnectError('refused')] * 3), retries=5,
+                                  budget=budget, sleep=lambda seconds: None)
+    with pytest.raises(httpx.ConnectError):
+        send(transport)
+    assert transport.transport.calls == 2
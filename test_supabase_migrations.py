@@ -0,0 +1,101 @@
+import pytest
+
+from supabase_migrations import (
+    MigrationError, apply_migration, discover_migrations, pending_migrations, split_sql_statements
+)
+
+
+def test_split_respects_dollar_quoted_bodies():
+    script = """
+    CREATE TABLE a (id int); -- trailing comment; with a semicolon
+    CREATE FUNCTION f() RETURNS trigger AS $$
+    BEGIN
+      NEW.updated_at = now();
+      RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql;
+    DO $body$ BEGIN PERFORM 1; END $body$;
+    """
+    statements = split_sql_statements(script)
+    assert len(statements) == 3
+    assert 'CREATE FUNCTION' in statements[1]
+    assert statements[1].endswith('$$ LANGUAGE plpgsql')
+    assert statements[2] == 'DO $body$ BEGIN PERFORM 1; END $body$'
+
+
+def test_split_respects_quotes_and_comments():
+    script = """
+    INSERT INTO t VALUES ('a;b', 'it''s; fine', E'back\\'slash;');
+    SELECT "odd;name" FROM t /* block; /* nested; */ comment */ WHERE x = $1;
+    -- only a comment;
+    """
+    statements = split_sql_statements(script)
+    assert len(statements) == 2
+    assert statements[0].endswith("E'back\\'slash;')")
+    assert statements[1].endswith('WHERE x = $1')
+
+
+def test_initial_schema_splits_into_whole_statements():
+    migrations = discover_migrations()
+    assert [m.version for m in migrations][:2] == ['0001', '0002']
+
+    with open(migrations[0].path) as f:
+        statements = split_sql_statements(f.read())
+    functions = [s for s in statements if 'CREATE OR REPLACE FUNCTION' in s]
+    assert len(functions) == 2
+    assert all(s.rstrip().endswith(('plpgsql', 'SECURITY DEFINER')) for s in functions)
+
+
+def test_only_unapplied_migrations_are_pending():
+    migrations = discover_migrations()
+    applied = {migrations[0].version: migrations[0].checksum}
+    assert pending_migrations(migrations, applied) == migrations[1:]
+
+
+def test_edited_applied_migration_is_rejected():
+    migrations = discover_migrations()
+    with pytest.raises(MigrationError):
+        pending_migrations(migrations, {migrations[0].version: 'not-the-checksum'})
+
+
+class RecordingConnection:
+    """Records each statement with whether it ran in autocommit."""
+
+    def __init__(self):
+        self.autocommit = False
+        self.executed = []
+        self.commits = 0
+
+    def cursor(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def execute(self, statement, params=None):
+        self.executed.append((statement, self.autocommit))
+
+    def commit(self):
+        self.commits += 1
+
+
+def test_index_migration_runs_outside_a_transaction():
+    index_migration = discover_migrations()[1]
+    conn = RecordingConnection()
+    apply_migration(conn, index_migration)
+
+    *indexes, record = conn.executed
+    assert len(indexes) == 7
+    assert all('CONCURRENTLY' in statement and autocommit for statement, autocommit in indexes)
+    assert 'INSERT INTO public.schema_migrations' in record[0] and record[1] is False
+    assert conn.autocommit is False
+
+
+def test_other_migrations_run_in_one_transaction():
+    conn = RecordingConnection()
+    apply_migration(conn, discover_migrations()[0])
+    assert not any(autocommit for _, autocommit in conn.executed)
+    assert conn.commits == 1
@@ -0,0 +1,105 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+from sync_state import MemorySyncStateStore
+from sync_planner import SyncPlanner, change_rate, parse_days, HISTORY_KEY, days_until_next_trip
+
+NOW = datetime(2025, 7, 10, 12).timestamp()
+
+
+class Clock:
+    def __init__(self, now=NOW):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def outcome(changed, pairings=(), year=2025, month=7):
+    schedule = SimpleNamespace(pairings=[SimpleNamespace(start_date=start, end_date=end) for start, end in pairings])
+    return SimpleNamespace(tier='full' if changed else 'probe', changed=changed, schedule=schedule if changed else None,
+                           year=year, month=month)
+
+
+def make_planner(results=None, **kwargs):
+    calls = []
+
+    def sync(user_id):
+        calls.append(user_id)
+        return (results or {}).get(user_id, outcome(False))
+
+    kwargs.setdefault('clock', Clock())
+    kwargs.setdefault('bid_award_days', '')
+    return SyncPlanner(sync, min_interval=900, max_interval=21600, **kwargs), calls
+
+
+def test_interval_follows_change_history_trips_and_bid_awards():
+    store = MemorySyncStateStore()
+    store.set('busy', HISTORY_KEY, [[NOW - 3600 * i, True] for i in range(5, 0, -1)])
+    store.set('quiet', HISTORY_KEY, [[NOW - 3600 * i, False] for i in range(5, 0, -1)])
+    planner, _ = make_planner(state_store=store, budget_per_hour=10000)
+    planner.add_user('busy')
+    planner.add_user('quiet')
+    planner.add_user('flying', trips=['2025-07-11'])
+    planner.add_user('later', trips=['2025-07-20'])
+
+    intervals = {user_id: plan.interval for user_id, plan in planner.plans.items()}
+    assert intervals['busy'] == 900 and intervals['quiet'] == 21600
+    assert intervals['flying'] == 1800 and intervals['later'] > 1800
+
+    award_day, _ = make_planner(state_store=store, bid_award_days='9-11')
+    award_day.add_user('quiet')
+    assert award_day.plans['quiet'].interval == 900
+
+
+def test_due_syncs_update_history_and_trips():
+    clock = Clock()
+    planner, calls = make_planner({'a': outcome(True, [('2025-07-11', '2025-07-13')])}, clock=clock, budget_per_hour=10000)
+    planner.add_user('a')
+    planner.add_user('b')
+    assert sorted(planner.tick()) == ['a', 'b']
+    assert planner.tick() == []
+
+    assert planner.plans['a'].trips == (('2025-07-11', '2025-07-13'),)
+    assert planner.plans['a'].interval == 900  # changed in its only sync
+    assert planner.state_store.get('b', HISTORY_KEY) == [[NOW, False]]
+
+    clock.now += 900
+    assert planner.tick() == ['a']
+    assert sorted(calls) == ['a', 'a', 'b']
+
+
+def test_load_is_kept_under_the_budget():
+    clock = Clock()
+    planner, calls = make_planner(clock=clock, budget_per_hour=60)
+    for index in range(50):
+        planner.add_user(f"user-{index}")
+
+    # New users are all due, but only the bucket's burst is started
+    first = planner.tick()
+    assert len(first) == 5
+    # 50 users at an expected 3 units every ~74 minutes is twice the budget
+    assert 2.0 < planner.stretch < 2.1
+    for _ in range(24):
+        clock.now += 150
+        planner.tick()
+    # 60 units/h for an hour, plus the initial burst
+    assert len(calls) <= 60 + 5
+
+
+def test_change_rate_and_days():
+    assert change_rate([]) == 0.5
+    assert change_rate([[0, False], [1, True]]) > 0.5 > change_rate([[0, True], [1, False]])
+    assert parse_days('18-20, 25') == {18, 19, 20, 25}
+
+
+def test_syncing_a_month_keeps_the_trips_of_other_months():
+    clock = Clock(datetime(2025, 7, 30, 12).timestamp())
+    results = {'a': outcome(True, [('2025-07-02', '2025-07-04'), ('2025-07-20', '2025-07-22')])}
+    planner, _ = make_planner(results, clock=clock, budget_per_hour=10000)
+    planner.add_user('a', trips=[('2025-07-25', '2025-07-27'), ('2025-08-01', '2025-08-03')])
+    planner.tick()
+
+    # July's trips are replaced by the sync, all of which have ended; August's stays
+    assert planner.plans['a'].trips == (('2025-08-01', '2025-08-03'),)
+    assert days_until_next_trip(planner.plans['a'].trips, datetime.fromtimestamp(clock.now).date()) == 2
@@ -0,0 +1,156 @@
+from types import SimpleNamespace
+
+from enhanced_scraper import CcsScraper
+from locators import LocatorEngine
+from schedule_parser import parse_schedule
+from sync_state import MemorySyncStateStore, SupabaseSyncStateStore
+from synthetic_schedules import generate_master_schedule, generate_print_view
+from tiered_sync import TieredSync, schedule_fingerprint
+
+
+class FakeScraper:
+    """Serves synthetic schedules; `pairings` and `seed` stand in for the crew member's current schedule."""
+
+    def __init__(self, pairings=4, seed=1, fail_full=False):
+        self.pairings = pairings
+        self.seed = seed
+        self.fail_full = fail_full
+        self.full_scrapes = 0
+        self.printed_months = []
+        self.last_schedule = None
+        self.closed = False
+
+    def get_master_schedule(self, username, password, year=None, month=None):
+        return generate_master_schedule(pairings=self.pairings, year=year or 2025, month=month or 7, seed=self.seed)
+
+    def get_detailed_schedule(self, username, password, extract='html', year=None, month=None):
+        self.full_scrapes += 1
+        self.printed_months.append((year, month))
+        if self.fail_full:
+            return None
+        self.last_schedule = parse_schedule(generate_print_view(pairings=self.pairings, seed=self.seed), use_cache=False)
+        return 'output/print.json'
+
+    def close(self):
+        self.closed = True
+
+
+def test_unchanged_master_schedule_skips_the_print_view():
+    sync = TieredSync(MemorySyncStateStore())
+    scraper = FakeScraper()
+
+    first = sync.sync('user-1', 'pilot', 'secret', scraper=scraper)
+    assert (first.tier, first.changed, (first.year, first.month)) == ('full', True, (2025, 7))
+    assert first.schedule.pairings
+
+    second = sync.sync('user-1', 'pilot', 'secret', scraper=scraper)
+    assert (second.tier, second.changed, second.fingerprint) == ('probe', False, first.fingerprint)
+    assert scraper.full_scrapes == 1
+
+    scraper.seed = 2  # only report times and layovers change
+    assert sync.sync('user-1', 'pilot', 'secret', scraper=scraper).tier == 'probe'
+    scraper.pairings = 5
+    assert sync.sync('user-1', 'pilot', 'secret', scraper=scraper).tier == 'full'
+    assert sync.sync('user-1', 'pilot', 'secret', scraper=scraper, force=True).tier == 'full'
+    # Months are fingerprinted separately
+    assert sync.sync('user-1', 'pilot', 'secret', year=2025, month=8, scraper=scraper).tier == 'full'
+    assert scraper.full_scrapes == 4 and not scraper.closed
+    assert scraper.printed_months == [(2025, 7)] * 3 + [(2025, 8)]
+
+
+def test_fingerprint_is_stored_only_after_a_successful_full_scrape():
+    store = MemorySyncStateStore()
+    failing = FakeScraper(fail_full=True)
+    assert TieredSync(store, scraper_factory=lambda: failing).sync('user-1', 'pilot', 'secret') is None
+    assert failing.closed
+
+    scraper = FakeScraper()
+    assert TieredSync(store).sync('user-1', 'pilot', 'secret', scraper=scraper).tier == 'full'
+
+
+def test_fingerprint_ignores_order_and_details():
+    pairing = lambda code, start, end: SimpleNamespace(pairing_code=code, start_date=start, end_date=end)
+    a = [pairing('P1', '2025-07-01', '2025-07-03'), pairing('P2', '2025-07-10', None)]
+    b = [pairing('P2', '2025-07-10', '2025-07-10'), pairing('P1', '2025-07-01', '2025-07-03')]
+    assert schedule_fingerprint(a) == schedule_fingerprint(b)
+    assert schedule_fingerprint(a) != schedule_fingerprint(a[:1])
+
+
+class FakeTable:
+    def __init__(self, rows):
+        self.rows = rows
+        self.filters = {}
+
+    def select(self, columns):
+        return self
+
+    def eq(self, column, value):
+        self.filters[column] = value
+        return self
+
+    def limit(self, count):
+        return self
+
+    def upsert(self, row, on_conflict):
+        self.rows[(row['user_id'], row['key'])] = row
+        return self
+
+    def execute(self):
+        row = self.rows.get((self.filters.get('user_id'), self.filters.get('key')))
+        return SimpleNamespace(data=[row] if row else [])
+
+
+def test_supabase_sync_state_store_round_trip():
+    rows = {}
+    client = SimpleNamespace(table=lambda name: FakeTable(rows))
+    store = SupabaseSyncStateStore(client)
+    assert store.get('user-1', 'master_fingerprint:2025-07', 'none') == 'none'
+    store.set('user-1', 'master_fingerprint:2025-07', 'abc')
+    assert store.get('user-1', 'master_fingerprint:2025-07') == 'abc'
+
+
+class BrowserlessScraper(CcsScraper):
+    """CcsScraper whose browser actions only track the month My Schedule shows."""
+
+    def __init__(self, print_failures):
+        super().__init__(locators=LocatorEngine(cache_path=None))
+        self.driver = SimpleNamespace(window_handles=['main'])
+        self.logged_in = True
+        self.shown = None
+        self.print_failures = print_failures
+        self.printed = []
+
+    def session_alive(self):
+        return True
+
+    def navigate_to_my_schedule(self, timeout=20):
+        self.shown = (2025, 7)  # My Schedule opens on its default month
+        return True
+
+    def navigate_to_month(self, year, month, timeout=20):
+        self.shown = (year, month)
+        return True
+
+    def return_to_main_window(self):
+        return True
+
+    def open_print_dialog(self, wait_for_preview=True):
+        if self.print_failures:
+            self.print_failures -= 1
+            return False
+        self.printed.append(self.shown)
+        return True
+
+    def _step_preview(self, context, timeout=30):
+        return True
+
+    def _step_extract(self, context):
+        return 'output/print.json'
+
+
+def test_rewind_to_my_schedule_keeps_the_requested_month():
+    scraper = BrowserlessScraper(print_failures=3)  # exhausts print_dialog, rewinds to my_schedule
+    scraper.steps = scraper._build_steps()
+    scraper.steps.sleep = lambda seconds: None
+    assert scraper.get_detailed_schedule('pilot', 'secret', extract='dom', year=2025, month=8)
+    assert scraper.printed == [(2025, 8)]
@@ -0,0 +1,114 @@
+"""
+Tiered schedule sync for CCS Hyper.
+A full print-view scrape (print dialog, preview window, crew and legs) is the
+slowest thing the scraper does. Most of the time nothing has changed, so a
+sync first takes the cheap tier: it reads the My Schedule master grid right
+after login and fingerprints its pairing codes and dates. Only when that
+fingerprint differs from the one stored at the last sync does it escalate to
+the print-view scrape, in the same browser session. The fingerprint is
+stored only after the full scrape succeeds, so a failed escalation is
+retried next time.
+
+Usage:
+    sync = TieredSync(SupabaseSyncStateStore(client))
+    outcome = sync.sync(user_id, username, password, scraper=scraper)
+    if outcome and outcome.changed:
+        save(outcome.schedule)
+"""
+
+import hashlib
+import logging
+from dataclasses import dataclass
+
+from instrumentation import registry, span
+from schedule_parser import parse_schedule
+from sync_state import MemorySyncStateStore
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+FINGERPRINT_KEY = 'master_fingerprint'  # sync state key, suffixed with the month
+
+SYNC_TIERS = registry.counter(
+    'ccs_sync_tier_total', 'Schedule syncs by the tier that finished them.', ('tier',))
+
+
+def schedule_fingerprint(pairings):
+    """Order-independent hash of the pairing codes and dates of a schedule."""
+    keys = sorted(f"{p.pairing_code}|{p.start_date}|{p.end_date or p.start_date}" for p in pairings)
+    return hashlib.sha256('\n'.join(keys).encode('utf-8')).hexdigest()
+
+
+def fingerprint_key(year, month):
+    return f"{FINGERPRINT_KEY}:{year:04d}-{month:02d}" if year and month else FINGERPRINT_KEY
+
+
+@dataclass(frozen=True)
+class SyncOutcome:
+    """What a tiered sync did: 'probe' (unchanged, stopped early) or 'full'."""
+    tier: str
+    changed: bool
+    fingerprint: str
+    schedule: object = None  # ParsedSchedule of the print view, for 'full'
+    year: int = None
+    month: int = None
+
+
+class TieredSync:
+    """Master-schedule probe first, print-view scrape only when the probe shows a change."""
+
+    def __init__(self, state_store=None, scraper_factory=None):
+        self.state_store = state_store or MemorySyncStateStore()
+        self.scraper_factory = scraper_factory or _default_scraper
+
+    def probe(self, scraper, username, password, year=None, month=None):
+        """(fingerprint, master ParsedSchedule) of the month's master schedule, or None on failure."""
+        with span('sync.probe'):
+            html = scraper.get_master_schedule(username, password, year, month)
+            if html is None:
+                return None
+            master = parse_schedule(html, format='master_schedule', use_cache=False)
+        return schedule_fingerprint(master.pairings), master
+
+    def sync(self, user_id, username, password, year=None, month=None, force=False, scraper=None):
+        """
+        Sync one user's month (default: the month My Schedule opens on).
+        Returns a SyncOutcome, or None when the scrape failed. force=True
+        always escalates to the print-view scrape.
+        """
+        owned = scraper is None
+        scraper = scraper or self.scraper_factory()
+        try:
+            probed = self.probe(scraper, username, password, year, month)
+            if probed is None:
+                logger.error(f"Master schedule probe failed for user {user_id}")
+                return None
+            fingerprint, master = probed
+            year, month = year or master.year, month or master.month
+            key = fingerprint_key(year, month)
+
+            if not force and self.state_store.get(user_id, key) == fingerprint:
+                logger.info(f"Schedule of user {user_id} for {month}/{year} unchanged; skipping print view")
+                SYNC_TIERS.inc(tier='probe')
+                return SyncOutcome('probe', False, fingerprint, year=year, month=month)
+
+            with span('sync.full'):
+                # Resumes after the probe's My Schedule step; passing the month keeps it
+                # printing the probed month even when a step rewinds to My Schedule
+                if not scraper.get_detailed_schedule(username, password, extract='dom', year=year, month=month):
+                    logger.error(f"Print view scrape failed for user {user_id}")
+                    return None
+            self.state_store.set(user_id, key, fingerprint)
+            SYNC_TIERS.inc(tier='full')
+            logger.info(f"Schedule of user {user_id} for {month}/{year} changed; scraped "
+                        f"{len(scraper.last_schedule.pairings)} pairings from the print view")
+            return SyncOutcome('full', True, fingerprint, scraper.last_schedule, year, month)
+        finally:
+            if owned:
+                scraper.close()
+
+
+def _default_scraper():
+    from enhanced_scraper import CcsScraper
+    return CcsScraper(headless=True)